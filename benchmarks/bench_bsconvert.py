@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of converting a directory of basis set files with ``bsconvert``.
+
+``nfiles`` Gaussian files with ``nelements`` basis sets each are converted
+to all the ``formats``:
+
+- ``single``: one ``bsconvert`` process per file and format, writing with
+  ``-o`` as was the only option before the batch mode,
+- ``batch`` : a single ``bsconvert`` process converting the whole directory
+  with ``--jobs`` processes.
+
+Usage::
+
+    python benchmarks/bench_bsconvert.py --nfiles 20 --formats molpro nwchem
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from chemtools.basisset import BasisSet
+
+
+COMMAND = 'import sys; from chemtools.cli import bsconvert; sys.exit(bsconvert())'
+
+SYMBOLS = 'H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar'.split()
+
+
+def write_inputs(indir, nfiles, nelements):
+    'Write ``nfiles`` files in the Gaussian format to ``indir``'
+
+    for i in range(nfiles):
+        with open(os.path.join(indir, 'basis{0:d}.gbs'.format(i)), 'w') as fobj:
+            for symbol in SYMBOLS[:nelements]:
+                bs = BasisSet.from_sequence(
+                    name='basis{0:d}'.format(i), element=symbol,
+                    funs=[('s', 'et', 16 + i % 4, (0.01, 2.5)),
+                          ('p', 'et', 10, (0.02, 2.5)),
+                          ('d', 'et', 4, (0.1, 2.5))])
+                fobj.write(bs.to_gaussian())
+
+
+def bsconvert(*args):
+    'Run bsconvert in a new process'
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.getcwd(),
+                                         env.get('PYTHONPATH', '')])
+    subprocess.check_call([sys.executable, '-c', COMMAND] + list(args),
+                          env=env, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nfiles', type=int, default=8,
+                        help='number of input files, default: 8')
+    parser.add_argument('--nelements', type=int, default=10,
+                        help='number of basis sets per file, default: 10')
+    parser.add_argument('--formats', nargs='+', default=['molpro', 'nwchem'],
+                        help='output formats, default: molpro nwchem')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='number of processes, default: number of CPUs')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        indir = os.path.join(tmpdir, 'inputs')
+        os.makedirs(indir)
+        write_inputs(indir, args.nfiles, args.nelements)
+        fnames = sorted(os.listdir(indir))
+
+        single = os.path.join(tmpdir, 'single')
+        os.makedirs(single)
+        start = time.time()
+        for fname in fnames:
+            for fmt in args.formats:
+                bsconvert(os.path.join(indir, fname), '-from', 'gaussian',
+                          '-to', fmt, '-o',
+                          os.path.join(single, fname + '.' + fmt))
+        tsingle = time.time() - start
+
+        batch = os.path.join(tmpdir, 'batch')
+        start = time.time()
+        jobs = ['-j', str(args.jobs)] if args.jobs else []
+        formats = [opt for fmt in args.formats for opt in ('-to', fmt)]
+        bsconvert(indir, '-from', 'gaussian', *(formats + ['-d', batch] +
+                                                jobs))
+        tbatch = time.time() - start
+
+        nout = len(os.listdir(batch))
+        assert nout == args.nfiles * args.nelements * len(args.formats)
+        print('{0:d} files, {1:d} conversions, {2:d} output files'.format(
+            args.nfiles, args.nfiles * len(args.formats), nout))
+        print('{0:>8s} {1:10.3f} s'.format('single', tsingle))
+        print('{0:>8s} {1:10.3f} s'.format('batch', tbatch))
+        print('speedup: {0:.1f}'.format(tsingle / tbatch))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of the parallel scaling of the overlap integrals.
+
+A linear chain of ``natoms`` atoms with an even tempered s-f basis set is
+built and ``chemtools.integrals.completeness_profile`` is timed with a
+varying number of worker processes. All the profiles are checked to be
+identical to the serial one.
+
+Usage::
+
+    python benchmarks/bench_integrals.py --natoms 32 --workers 1 2 4 8 16 32
+'''
+
+from __future__ import print_function
+
+import argparse
+import time
+
+import numpy as np
+
+from chemtools.basisset import BasisSet
+from chemtools.integrals import (completeness_profile, contraction_matrix,
+                                 get_basinfo)
+
+
+def build_system(natoms, distance):
+    'Return the record arrays of the chain and scanning functions and the contractions'
+
+    bs = BasisSet.from_sequence(name='et', element='C',
+                                funs=[('s', 'et', 10, (0.05, 2.5)),
+                                      ('p', 'et', 8, (0.1, 2.5)),
+                                      ('d', 'et', 4, (0.3, 2.5)),
+                                      ('f', 'et', 2, (0.6, 2.5))])
+    bases = [bs] * natoms
+    positions = [(0.0, 0.0, distance * i) for i in range(natoms)]
+
+    scan = BasisSet.from_sequence(name='scan', element='H',
+                                  funs=[('s', 'et', 100, (0.001, 1.2))])
+    zetas = get_basinfo([scan], [(0.0, 0.0, 0.0)])
+
+    return get_basinfo(bases, positions), contraction_matrix(bases), zetas
+
+
+def timeit(func, repeat):
+    'Return the best time out of `repeat` runs and the result'
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        best = min(best, time.time() - start)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--natoms', type=int, default=16,
+                        help='number of atoms in the chain, default: 16')
+    parser.add_argument('--distance', type=float, default=2.5,
+                        help='distance between the atoms in bohr, default: 2.5')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16, 32],
+                        help='numbers of workers, default: 1 2 4 8 16 32')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions, default: 3')
+    args = parser.parse_args()
+
+    basinfo, cc, zetas = build_system(args.natoms, args.distance)
+    print('atoms = {0:d}, primitives = {1:d}, contracted = {2:d}'.format(
+        args.natoms, basinfo.size, cc.shape[1]))
+
+    serial = None
+    for workers in args.workers:
+        elapsed, profile = timeit(
+            lambda: completeness_profile(basinfo, cc, zetas, workers=workers),
+            args.repeat)
+        if serial is None:
+            serial = (elapsed, profile)
+        assert np.array_equal(profile, serial[1])
+        print('workers = {0:3d} {1:10.4f} s  speedup {2:6.2f}'.format(
+            workers, elapsed, serial[0] / elapsed))
+
+
+if __name__ == '__main__':
+    main()
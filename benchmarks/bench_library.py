@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of loading a single basis set from a large basis set library.
+
+A synthetic library with ``nnames`` basis sets for ``nelements`` elements
+each is written in the Gaussian format, similar to a dump of the EMSL Basis
+Set Exchange, and a single element is loaded with:
+
+- ``full``  : ``BasisSet.from_str`` parsing the whole file, with the comments
+  separating the basis sets removed since the plain parser cannot skip them,
+- ``index`` : ``BasisLibrary`` scanning the file once to build the offset
+  index,
+- ``get``   : ``BasisLibrary.get`` parsing only the requested element,
+- ``cached``: ``BasisLibrary.get`` for an already parsed element.
+
+Usage::
+
+    python benchmarks/bench_library.py --nnames 130 --nelements 86
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from chemtools.basislibrary import BasisLibrary
+from chemtools.basisset import BasisSet
+
+
+SYMBOLS = ('H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn '
+           'Fe Co Ni Cu Zn Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag '
+           'Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm '
+           'Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn').split()
+
+
+def write_library(fname, nnames, nelements):
+    'Write a synthetic library in the Gaussian format to `fname`'
+
+    with open(fname, 'w') as fobj:
+        for iname in range(nnames):
+            name = 'basis-{0:d}'.format(iname)
+            fobj.write('!' + '-' * 70 + '\n')
+            fobj.write('!   Basis set: {0:s}\n'.format(name))
+            fobj.write('!' + '-' * 70 + '\n\n')
+            for symbol in SYMBOLS[:nelements]:
+                bs = BasisSet.from_sequence(
+                    name=name, element=symbol,
+                    funs=[('s', 'et', 20, (0.01, 2.5)),
+                          ('p', 'et', 15, (0.02, 2.5)),
+                          ('d', 'et', 10, (0.05, 2.5)),
+                          ('f', 'et', 6, (0.1, 2.5)),
+                          ('g', 'et', 4, (0.2, 2.5))])
+                fobj.write(bs.to_gaussian())
+            fobj.write('\n')
+
+
+def timeit(func):
+    'Return the time and the result of a single call'
+
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nnames', type=int, default=32,
+                        help='number of basis sets in the library, default: 32')
+    parser.add_argument('--nelements', type=int, default=86,
+                        help='number of elements per basis set, default: 86')
+    parser.add_argument('--element', default='Ne',
+                        help='element to load, default: Ne')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'library.gbs')
+        write_library(fname, args.nnames, args.nelements)
+        name = 'basis-{0:d}'.format(args.nnames // 2)
+        print('library size = {0:.2f} MB, loading "{1:s}" for {2:s}'.format(
+            os.path.getsize(fname) / 1.0e6, name, args.element))
+
+        def full_parse():
+            with open(fname, 'r') as fobj:
+                lines = [line for line in fobj if not line.startswith('!')]
+            return BasisSet.from_str(''.join(lines).replace('\n\n', '\n'),
+                                     fmt='gaussian')
+
+        tfull, full = timeit(full_parse)
+        lib = BasisLibrary(fname, 'gaussian')
+        tindex, _ = timeit(lambda: lib.index)
+        tget, bs = timeit(lambda: lib.get(args.element, name))
+        tcached, _ = timeit(lambda: lib.get(args.element, name))
+
+        # the full parse keeps only the last basis set for every element
+        last = BasisLibrary(fname, 'gaussian').get(
+            args.element, 'basis-{0:d}'.format(args.nnames - 1))
+        assert full[args.element].functions.keys() == last.functions.keys()
+        assert bs.nf() == last.nf()
+
+        for label, elapsed in [('full', tfull), ('index', tindex),
+                               ('get', tget), ('cached', tcached)]:
+            print('{0:>8s} {1:10.4f} s'.format(label, elapsed))
+        print('index + get speedup over full parse: {0:.1f}'.format(
+            tfull / (tindex + tget)))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of the basis set parsers.
+
+A synthetic basis set library with ``nelements`` elements and generally
+contracted shells is written in the Molpro, Gaussian and GAMESS(US)
+formats and parsed with:
+
+- ``legacy`` : the former parsers converting every token with a regular
+  expression substitution and building the contracted functions with
+  ``zip``,
+- ``bulk``   : ``chemtools.basisparse.parse_basis`` converting all the
+  numbers of a library in a single pass.
+
+The throughput is reported in MB/s and both results are checked to be
+identical. The legacy parsers only support blocks with fewer than 10
+primitives so the contractions are limited to 9 primitives. The legacy
+GAMESS(US) parser looks up every element in the ``mendeleev`` database and
+takes a fraction of a second per element.
+
+Usage::
+
+    python benchmarks/bench_parsers.py --nelements 86 --copies 4 --fortran
+    python benchmarks/bench_parsers.py --formats molpro gaussian
+'''
+
+from __future__ import print_function
+
+import argparse
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+from mendeleev import element
+
+from chemtools.basisparse import CFDTYPE, ORBITALS, merge_exponents, parse_basis
+from chemtools.basisset import BasisSet, eventemp
+
+
+SYMBOLS = ('H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn '
+           'Fe Co Ni Cu Zn Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag '
+           'Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm '
+           'Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn').split()
+
+# shell, number of exponents, number of contracted functions
+SHELLS = [('s', 12, 3), ('p', 9, 2), ('d', 6, 2), ('f', 3, 1), ('g', 2, 1)]
+
+LEGACY = {'molpro': lambda string: legacy_parse_molpro_basis(string),
+          'gaussian': lambda string: legacy_parse_gaussian_basis(string),
+          'gamessus': lambda string: legacy_parse_gamessus_basis(string)}
+
+
+def legacy_parse_molpro_basis(string):
+    'legacy parse_molpro_basis'
+
+    bas_re = re.compile(r'basis\s*=\s*\{(.*?)\}', flags=re.DOTALL | re.I)
+
+    m = bas_re.search(string)
+    if m:
+        lines = m.group(1).split("\n")
+    else:
+        raise ValueError('basis string: "basis={*}" not found')
+
+    start = []
+    for i, line in enumerate(lines):
+        if line.split(",")[0].lower() in ORBITALS:
+            start.append(i)
+    if len(start) == 0:
+        return None
+
+    startstop = []
+    for i in range(len(start) - 1):
+        startstop.append((start[i], start[i + 1]))
+    startstop.append((start[-1], len(lines)))
+
+    bs = {}
+    for i in startstop:
+        at_symbol, shell = legacy_parse_molpro_shell(lines[i[0]],
+                                              lines[i[0] + 1: i[1]])
+        if at_symbol in bs.keys():
+            bs[at_symbol] = dict(list(bs[at_symbol].items()) +
+                                 list(shell.items()))
+        else:
+            bs[at_symbol] = shell
+    return bs
+
+
+def legacy_parse_molpro_shell(expsline, coeffs):
+    'legacy parse_molpro_shell'
+
+    real = re.compile(r'[dD]')
+    # remove empty strings and whitespace line breaks and tabs
+    coeffs = [x.strip() for x in coeffs if x.strip() not in ['', '\n', '\t']]
+
+    fs = {}
+
+    shell = expsline.split(",")[0].lower()
+    at_symbol = expsline.split(",")[1].strip().capitalize()
+    exps = np.array([float(real.sub('E', x))
+                     for x in expsline.rstrip(";").split(",")[2:]])
+
+    fs[shell] = {'e': exps, 'cf': []}
+    if len(coeffs) != 0:
+        for line in coeffs:
+            lsp = line.rstrip(";").split(",")
+            if lsp[0] == "c":
+                i, j = [int(x) for x in lsp[1].split(".")]
+                coeffs = [float(real.sub('E', x)) for x in lsp[2:]]
+                fs[shell]['cf'].append(np.array(list(zip(list(range(i - 1, j)),
+                                                coeffs)), dtype=CFDTYPE))
+    else:
+        for i in range(len(exps)):
+            fs[shell]['cf'].append(np.array([tuple([i, 1.0])], dtype=CFDTYPE))
+    return at_symbol, fs
+
+
+def legacy_parse_gaussian_basis(string):
+    'legacy parse_gaussian_basis'
+
+    shellre = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>[1-9]+)\s*(?P<scale>\-?\d+\.\d+)')
+    out = dict()
+    for i, item in enumerate(string.split('****\n')):
+        if len(item) > 5:
+            atomline, basis = item.split('\n', 1)
+            atom = atomline.split()[0]
+            bslines = basis.split('\n')
+            functions = dict()
+            for i, line in enumerate(bslines):
+                match = shellre.search(line)
+                if match:
+                    shells, nf, scale = match.group('shells').lower(), match.group('nf'), match.group('scale')
+                    exps, indxs, coeffs = legacy_parse_gaussian_function(bslines[i + 1: i + int(nf) + 1])
+                    for shell, cc in zip(shells, coeffs.T):
+                        if shell in functions.keys():
+                            sexp, idxs, idxo = merge_exponents(functions[shell]['e'], exps)
+                            functions[shell]['e'] = sexp * float(scale)**2
+                            for cf in functions[shell]['cf']:
+                                cf['idx'] = idxs[cf['idx']]
+                            newcf = np.array(list(zip(idxo[indxs], cc)),
+                                             dtype=CFDTYPE)
+                            functions[shell]['cf'].append(newcf)
+                        else:
+                            functions[shell] = dict()
+                            functions[shell]['cf'] = list()
+                            functions[shell]['e'] = exps
+                            functions[shell]['cf'].append(np.array(list(zip(indxs, cc)), dtype=CFDTYPE))
+                out[atom] = functions
+    return out
+
+
+def legacy_parse_gaussian_function(lines):
+    'legacy parse_gaussian_function'
+
+    real = re.compile(r'[dD]')
+
+    indxs = np.arange(len(lines), dtype=np.int32)
+    exps = np.array([float(real.sub('E', line.split()[0])) for line in lines],
+                    dtype=np.float64)
+    coeffs = np.array([[float(real.sub('E', x))
+                        for x in line.split()[1:]] for line in lines],
+                      dtype=np.float64)
+    return (exps, indxs, coeffs)
+
+
+def legacy_parse_gamessus_basis(string):
+    'legacy parse_gamessus_basis'
+
+    bas_re = re.compile(r'\$DATA\n(.*?)\$END', flags=re.DOTALL | re.IGNORECASE)
+
+    m = bas_re.search(string)
+    if m:
+        basisstr = m.group(1)
+    else:
+        raise ValueError("basis not found, should be inside '$DATA' and '$END' group")
+
+    pat = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>[1-9]+)')
+    res = dict()
+
+    for item in basisstr.split('\n\n'):
+        if len(item) > 0:
+            atom, basis = item.split('\n', 1)
+            if atom != "":
+                functions = dict()
+                elem = element(atom.capitalize())
+                bslines = basis.split("\n")
+                for i, line in enumerate(bslines):
+                    match = pat.search(line)
+                    if match:
+                        shells, nf = match.group("shells").lower(), match.group("nf")
+                        exps, indxs, coeffs = legacy_parse_gamessus_function(bslines[i + 1: i + int(nf) + 1])
+                        if shells in ['L', 'l']:
+                            shells = ['s', 'p']
+                        for shell, cc in zip(shells, coeffs.T):
+                            if shell in functions.keys():
+                                sexp, idxs, idxo = merge_exponents(functions[shell]['e'], exps)
+                                functions[shell]['e'] = sexp
+                                for cf in functions[shell]['cf']:
+                                    cf['idx'] = idxs[cf['idx']]
+                                newcf = np.array(list(zip(idxo[indxs-1], cc)),
+                                                 dtype=CFDTYPE)
+                                functions[shell]['cf'].append(newcf)
+                            else:
+                                functions[shell] = dict()
+                                functions[shell]['cf'] = list()
+                                functions[shell]['e'] = exps
+                                functions[shell]['cf'].append(np.array(list(zip(indxs - 1, cc)), dtype=CFDTYPE))
+                res[elem.symbol] = functions
+    return res
+
+
+def legacy_parse_gamessus_function(lines):
+    'legacy parse_gamessus_function'
+
+    real = re.compile(r'[dD]')
+
+    indxs = np.array([int(line.split()[0]) for line in lines], dtype=np.int32)
+    exps = np.array([float(real.sub('E', line.split()[1])) for line in lines],
+                    dtype=np.float64)
+    coeffs = np.array([[float(real.sub('E', x)) for x in line.split()[2:]]
+                        for line in lines], dtype=np.float64)
+    return (exps, indxs, coeffs)
+
+
+
+def build_library(nelements, seed=42):
+    'Return a list of generally contracted basis sets for `nelements` atoms'
+
+    rng = np.random.RandomState(seed)
+    bases = []
+    for number in range(nelements):
+        functions = OrderedDict()
+        for shell, nexp, ncon in SHELLS:
+            exps = eventemp(nexp, (0.01 * rng.uniform(1.0, 2.0), 2.5))
+            nprim = min(9, nexp - ncon)
+            cfs = [np.array(list(zip(range(nprim),
+                                     rng.uniform(-1.0, 1.0, nprim))),
+                            dtype=CFDTYPE) for _ in range(ncon)]
+            cfs.extend(np.array([(idx, 1.0)], dtype=CFDTYPE)
+                       for idx in range(nprim, nexp))
+            functions[shell] = {'e': exps, 'cf': cfs}
+        bases.append(BasisSet(name='synthetic', functions=functions,
+                              element=SYMBOLS[number % len(SYMBOLS)]))
+    return bases
+
+
+def library_strings(bases, copies, fortran):
+    'Return the library in all the formats, repeated `copies` times'
+
+    efmt = '20.10E' if fortran else '20.10f'
+    cfmt = '18.10E' if fortran else '15.8f'
+    strings = OrderedDict()
+    strings['molpro'] = 'basis={\n' + ''.join(
+        bs.to_molpro(efmt=efmt, cfmt=cfmt) for bs in bases) * copies + '}\n'
+    strings['gaussian'] = ''.join(
+        bs.to_gaussian(efmt=efmt, cfmt=cfmt) for bs in bases) * copies
+    strings['gamessus'] = '$DATA\n' + ''.join(
+        bs.element + '\n' + bs.to_gamessus(efmt=efmt, cfmt=cfmt)
+        for bs in bases) * copies + '$END\n'
+
+    if fortran:
+        for fmt, string in strings.items():
+            strings[fmt] = re.sub(r'(\d)E([+-])', r'\1D\2', string)
+    return strings
+
+
+def assert_same(first, second):
+    'Check that two parsed libraries are identical'
+
+    assert list(first.keys()) == list(second.keys())
+    for elem, functions in first.items():
+        assert list(functions.keys()) == list(second[elem].keys())
+        for shell, fs in functions.items():
+            assert np.array_equal(fs['e'], second[elem][shell]['e'])
+            for cf, other in zip(fs['cf'], second[elem][shell]['cf']):
+                assert np.array_equal(cf, other)
+
+
+def timeit(func, repeat):
+    'Return the best time out of `repeat` runs and the result'
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        best = min(best, time.time() - start)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nelements', type=int, default=86,
+                        help='number of elements in the library, default: 86')
+    parser.add_argument('--copies', type=int, default=4,
+                        help='number of times the library is repeated in '
+                             'the file, default: 4')
+    parser.add_argument('--fortran', action='store_true',
+                        help='write the numbers with Fortran D exponents')
+    parser.add_argument('--formats', nargs='+', choices=list(LEGACY.keys()),
+                        default=list(LEGACY.keys()),
+                        help='formats to benchmark, default: all')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions, default: 3')
+    args = parser.parse_args()
+
+    bases = build_library(args.nelements)
+    strings = library_strings(bases, args.copies, args.fortran)
+
+    print('{0:>10s} {1:>8s} {2:>12s} {3:>12s} {4:>8s}'.format(
+        'format', 'MB', 'legacy MB/s', 'bulk MB/s', 'speedup'))
+    for fmt in args.formats:
+        string = strings[fmt]
+        size = len(string) / 1.0e6
+        told, old = timeit(lambda: LEGACY[fmt](string), args.repeat)
+        tnew, new = timeit(lambda: parse_basis(string, fmt=fmt), args.repeat)
+        assert_same(old, new)
+        print('{0:>10s} {1:8.3f} {2:12.2f} {3:12.2f} {4:8.2f}'.format(
+            fmt, size, size / told, size / tnew, told / tnew))
+
+
+if __name__ == '__main__':
+    main()
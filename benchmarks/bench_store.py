@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of loading a collection of basis sets from the pickle, JSON and
+binary formats.
+
+``nbases`` basis sets are saved as a single pickled list, a JSON file with
+one basis set per line and with ``write_binary``, and loaded with:
+
+- ``pickle``        : ``pickle.load`` of the list,
+- ``json``          : ``BasisSet.from_json`` for every line,
+- ``binary``        : ``BasisStore(...).to_list()``,
+- ``binary compact``: the same with ``CompactBasisSet`` sharing the arrays,
+- ``binary one``    : opening the store and loading a single basis set.
+
+Usage::
+
+    python benchmarks/bench_store.py --nbases 2000
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from chemtools.basisset import BasisSet
+from chemtools.basisstore import BasisStore, write_binary
+from chemtools.compactbasis import CompactBasisSet
+
+
+def make_bases(nbases):
+    'Return a list of even tempered basis sets with unique names'
+
+    bases = []
+    for i in range(nbases):
+        bs = BasisSet.from_sequence(
+            name='basis-{0:d}'.format(i), element='Ne',
+            funs=[('s', 'et', 16 + i % 5, (0.01, 2.5)),
+                  ('p', 'et', 12, (0.02, 2.5)),
+                  ('d', 'et', 6, (0.05, 2.5)),
+                  ('f', 'et', 3, (0.1, 2.5))])
+        bases.append(bs)
+    return bases
+
+
+def timeit(func, repeat):
+    'Return the best time out of ``repeat`` calls and the result'
+
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nbases', type=int, default=2000,
+                        help='number of basis sets, default: 2000')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions, default: 3')
+    args = parser.parse_args()
+
+    bases = make_bases(args.nbases)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fpickle = os.path.join(tmpdir, 'bases.pkl')
+        fjson = os.path.join(tmpdir, 'bases.json')
+        fbinary = os.path.join(tmpdir, 'bases.bsb')
+        with open(fpickle, 'wb') as fobj:
+            pickle.dump(bases, fobj)
+        with open(fjson, 'w') as fobj:
+            fobj.write('\n'.join(bs.to_json() for bs in bases))
+        write_binary(bases, fbinary)
+
+        def load_pickle():
+            with open(fpickle, 'rb') as fobj:
+                return pickle.load(fobj)
+
+        def load_json():
+            with open(fjson, 'r') as fobj:
+                return [BasisSet.from_json(line) for line in fobj]
+
+        timings = [
+            ('pickle', load_pickle),
+            ('json', load_json),
+            ('binary', lambda: BasisStore(fbinary).to_list()),
+            ('binary compact',
+             lambda: BasisStore(fbinary, basiscls=CompactBasisSet).to_list()),
+            ('binary one',
+             lambda: [BasisStore(fbinary).get('Ne', 'basis-{0:d}'.format(
+                 args.nbases // 2))]),
+        ]
+
+        reference = [bs.to_json() for bs in bases]
+        print('{0:>16s} {1:>10s} {2:>10s}'.format('format', 'size [MB]',
+                                                  'time [s]'))
+        for label, func in timings:
+            elapsed, loaded = timeit(func, args.repeat)
+            if label == 'binary one':
+                assert loaded[0].to_json() == reference[args.nbases // 2]
+                size = os.path.getsize(fbinary)
+            else:
+                assert [bs.to_json() for bs in loaded] == reference
+                size = os.path.getsize({'pickle': fpickle,
+                                        'json': fjson}.get(label, fbinary))
+            print('{0:>16s} {1:10.3f} {2:10.4f}'.format(label, size / 1.0e6,
+                                                        elapsed))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
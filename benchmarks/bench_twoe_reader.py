@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of the readers of the GAMESS(US) sequential files with the
+two-electron integrals.
+
+A synthetic ``.F08`` file with all the unique integrals for ``nbf`` orbitals
+(int8 words with two small labels each) is written together with a minimal
+log file and read with:
+
+- ``legacy``  : the former per integral loop decoding the labels with Python
+  bit shifts,
+- ``readseq`` : the vectorized ``SequentialFile.readseq``.
+
+Usage::
+
+    python benchmarks/bench_twoe_reader.py --nbf 40
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from chemtools.calculators.gamessreader import SequentialFile
+
+
+def write_seqfile(fname, nbf, buff_size=15000):
+    'Write the synthetic sequential file and return the number of integrals'
+
+    idx = np.array([(i, j, k, l)
+                    for i in range(1, nbf + 1) for j in range(1, i + 1)
+                    for k in range(1, i + 1) for l in range(1, k + 1)
+                    if (i * (i - 1) // 2 + j) >= (k * (k - 1) // 2 + l)],
+                   dtype=np.uint64)
+    labels = (idx[:, 0] << np.uint64(24)) | (idx[:, 1] << np.uint64(16)) |\
+        (idx[:, 2] << np.uint64(8)) | idx[:, 3]
+    values = np.random.RandomState(0).uniform(-1.0, 1.0, size=labels.size)
+
+    nidx = (buff_size + 1) // 2
+    reclen = 8 + 8 * nidx + 8 * buff_size
+    with open(fname, 'wb') as fobj:
+        for start in range(0, labels.size, buff_size):
+            lab = labels[start:start + buff_size]
+            packed = np.zeros(2 * nidx, dtype=np.uint64)
+            packed[:lab.size] = lab
+            words = (packed[0::2] << np.uint64(32)) | packed[1::2]
+            vbuff = np.zeros(buff_size)
+            vbuff[:lab.size] = values[start:start + buff_size]
+            length = lab.size if start + buff_size < labels.size else -lab.size
+            fobj.write(np.array([reclen], dtype='i4').tobytes())
+            fobj.write(np.array([length], dtype='i8').tobytes())
+            fobj.write(words.view('i8').tobytes())
+            fobj.write(vbuff.tobytes())
+            fobj.write(np.array([reclen], dtype='i4').tobytes())
+
+    return labels.size
+
+
+def legacy_readseq(seq, buff_size=15000, int_size=8):
+    'Former implementation of readseq for int8 words and small labels'
+
+    nt = seq.nao * (seq.nao + 1) // 2
+    ints = np.zeros(nt * (nt + 1) // 2, dtype=float, order='F')
+    int_type = np.dtype('i' + str(int_size))
+    nidx = seq.get_index_buffsize(buff_size, int_size)
+
+    seq.seek(0)
+    length = 1
+    while length > 0:
+        seq.seek(seq.tell() + 4)
+        length = int(seq.read(int_type))
+        index_buffer = seq.read(int_type, shape=(nidx, ))
+        value_buffer = seq.read('f8', shape=(buff_size, ))
+        for m in range(1, abs(length) + 1):
+            if m % 2 == 0:
+                label = int(index_buffer[m // 2 - 1])
+                i = label >> 24 & 255
+                j = label >> 16 & 255
+                k = label >> 8 & 255
+                l = label & 255
+            else:
+                label = int(index_buffer[m // 2])
+                i = label >> 56 & 255
+                j = label >> 48 & 255
+                k = label >> 40 & 255
+                l = label >> 32 & 255
+            ints[seq.ijkl(i, j, k, l)] = value_buffer[m - 1]
+        seq.seek(seq.tell() + 4)
+    return ints
+
+
+def timeit(func, repeat):
+    'Return the best time out of `repeat` runs and the result'
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        best = min(best, time.time() - start)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nbf', type=int, default=40,
+                        help='number of orbitals, default: 40')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions, default: 3')
+    parser.add_argument('--no-legacy', action='store_true',
+                        help='skip the (slow) legacy reader')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'bench.F08')
+        with open(os.path.join(tmpdir, 'bench.log'), 'w') as flog:
+            flog.write(' NUMBER OF CARTESIAN GAUSSIAN BASIS FUNCTIONS = {0:5d}\n'
+                       ' ISPHER=-1\n'.format(args.nbf))
+        nints = write_seqfile(fname, args.nbf)
+        print('nbf = {0:d}, integrals = {1:d}, file size = {2:.1f} MB'.format(
+            args.nbf, nints, os.path.getsize(fname) / 1.0e6))
+
+        seq = SequentialFile(fname)
+        readers = [('readseq', seq.readseq)]
+        if not args.no_legacy:
+            readers.insert(0, ('legacy', lambda: legacy_readseq(seq)))
+
+        reference = None
+        for name, func in readers:
+            elapsed, ints = timeit(func, args.repeat)
+            if reference is None:
+                reference = ints
+            assert np.array_equal(ints, reference)
+            print('{0:<10s} {1:10.4f} s {2:12.2f} Mints/s'.format(
+                name, elapsed, nints / elapsed / 1.0e6))
+        seq.file.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark of the basis set writers.
+
+A synthetic multi-element basis set library with generally contracted
+shells is written in every supported format with:
+
+- ``legacy`` : the former writers building the output with repeated string
+  concatenation and a ``format`` call per number,
+- ``block``  : the current ``BasisSet`` writers formatting whole blocks of
+  exponents and coefficients with a single ``str.format`` call.
+
+Both outputs are checked to be identical.
+
+Usage::
+
+    python benchmarks/bench_writers.py --nelements 36 --scale 2
+'''
+
+from __future__ import print_function
+
+import argparse
+import re
+import time
+from collections import OrderedDict
+from copy import deepcopy
+
+import numpy as np
+
+from chemtools.basisparse import CFDTYPE, get_l
+from chemtools.basisset import (BasisSet, eventemp, has_consecutive_indices,
+                                reorder_shell_to_consecutive, splitlist)
+
+
+SHELLS = [('s', 12, 4), ('p', 9, 3), ('d', 5, 2), ('f', 3, 2), ('g', 2, 1),
+          ('h', 1, 1)]
+
+SYMBOLS = ('H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn '
+           'Fe Co Ni Cu Zn Ga Ge As Se Br Kr').split()
+
+WRITERS = ['to_cfour', 'to_dalton', 'to_gamessus', 'to_gaussian', 'to_latex',
+           'to_molpro', 'to_nwchem', 'print_functions']
+
+
+def legacy_to_cfour(bs, comment="", efmt="15.8f", cfmt="15.8f"):
+    'legacy to_cfour'
+    am, ne, cf = [], [], []
+    for shell, shellfs in sorted(bs.functions.items(),
+                                 key=lambda x: get_l(x[0])):
+        am.append(get_l(shell))
+        ne.append(len(shellfs["e"]))
+        cf.append(len(shellfs["cf"]))
+
+    res = "\n{e}:{s}\n{c}\n\n".format(e=bs.element, s=bs.name,
+                                      c=comment)
+    res += "{0:3d}\n".format(len(bs.functions.keys()))
+    res += "".join(["{0:5d}".format(x) for x in am]) + "\n"
+    res += "".join(["{0:5d}".format(x) for x in cf]) + "\n"
+    res += "".join(["{0:5d}".format(x) for x in ne]) + "\n"
+    res += "\n"
+
+    for shell, fs in bs.functions.items():
+        for lst in splitlist(fs['e'], 5):
+            res += "".join(["{0:>{efmt}}".format(e, efmt=efmt)
+                            for e in lst]) + "\n"
+        res += "\n"
+        # create an array with all the contraction coefficients for a given shell
+        cc = bs.contraction_matrix(shell)
+        for row in cc:
+            for splitrow in splitlist(row, 5):
+                res += "{c}".format(c="".join(["{0:{cfmt}}".format(c, cfmt=cfmt) for c in splitrow])) + "\n"
+        res += "\n"
+    return res
+
+
+def legacy_to_dalton(bs, fmt='prec'):
+    'legacy to_dalton'
+    formats = {'prec': '20.10f', 'default': '10.4f'}
+
+    ffmt = formats.get(fmt, fmt)
+
+    if fmt == 'prec':
+        ffmt = '20.10f'
+        nitems = 3
+        fmtlabel = 'H'
+    elif fmt == 'default':
+        ffmt = '10.4f'
+        nitems = 7
+        fmtlabel = ' '
+    else:
+        ffmt = fmt
+        cwidth = int(ffmt.split('.')[0])
+        nitems = (80 - cwidth) // cwidth
+        fmtlabel = "{0:d}F{1}.{2}".format(nitems, ffmt.split('.')[0], re.sub('[A-Za-z]+', '', ffmt.split('.')[1]))
+
+    res = "! {s}\n".format(s=bs.name)
+    for shell, fs in bs.functions.items():
+        res += "! {s} functions\n".format(s=shell)
+        res += "{f:1s}{p:>4d}{c:>4d}\n".format(f=fmtlabel, p=len(fs['e']),
+                                               c=len(fs['cf']))
+        # create an array with all the contraction coefficients for a given shell
+        cc = bs.contraction_matrix(shell)
+        for expt, row in zip(fs['e'], cc):
+            it = splitlist(row, nitems)
+            res += "{e:>{efmt}}{c}".format(e=expt, efmt=ffmt, c="".join(["{0:{cfmt}}".format(c, cfmt=ffmt) for c in next(it)])) + "\n"
+
+            for row in it:
+                res += ' ' * int(ffmt.split('.')[0]) + \
+                    "".join(["{0:{cfmt}}".format(c, cfmt=ffmt) for c in row]) + "\n"
+    return res
+
+
+def legacy_to_gamessus(bs, efmt="20.10f", cfmt="15.8f"):
+    'legacy to_gamessus'
+    res = ''
+    for shell, fs in bs.functions.items():
+        for contraction in fs["cf"]:
+            res += "{s:<1s}{n:>3d}\n".format(s=shell.upper(),
+                                             n=len(contraction))
+            for i, (idx, coeff) in enumerate(contraction, start=1):
+                res += "{i:3d}{e:>{efmt}}{c:>{cfmt}}".format(i=i,
+                                                             e=fs['e'][idx],
+                                                             efmt=efmt,
+                                                             c=coeff,
+                                                             cfmt=cfmt) + "\n"
+    return res + "\n"
+
+
+def legacy_to_gaussian(bs, efmt="20.10f", cfmt="15.8f"):
+    'legacy to_gaussian'
+    res = "****\n{e:<7s}0\n".format(e=bs.element)
+    for shell, fs in bs.functions.items():
+        for contraction in fs["cf"]:
+            res += "{s:<1s}{n:>4d}{i:>7.2f}\n".format(s=shell.upper(),
+                                                      n=len(contraction),
+                                                      i=1.0)
+            for idx, coeff in contraction:
+                res += "{e:>{efmt}}{c:>{cfmt}}".format(e=fs['e'][idx],
+                                                       efmt=efmt, c=coeff,
+                                                       cfmt=cfmt) + "\n"
+    return res + "****\n"
+
+
+def legacy_to_latex(bs, efmt="20.10f", cfmt="15.8f"):
+    'legacy to_latex'
+    # get the number of contracted functions per shell
+    ncf = [sum([len(cfs) > 1 for cfs in fs['cf']])
+           for sh, fs in bs.functions.items()]
+    idx = np.argmax(ncf)
+    nccols = ncf[idx]
+
+    out = '\\begin{{tabular}}{{{}}}\n'.format('r' * (nccols + 2))
+    out += 'No. & \\multicolumn{1}{c}{Exponent} & ' +\
+           '\\multicolumn{{{0:d}}}{{c}}{{Coefficients }} \\\\ \n'.format(nccols)
+
+    for shell, fs in bs.functions.items():
+        out += '\\hline \n'
+        out += '\\multicolumn{{{0:d}}}{{c}}{{ {1:s} shell }} \\\\ \\hline \n'.format(nccols + 2, shell)
+
+        cc = bs.contraction_matrix(shell)
+        count = 0
+        # select columns with more than 1 non zero coefficients
+        nonzerocolmask = np.array([np.count_nonzero(col) > 1
+                                   for col in cc.T])
+        nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                   for row in cc[:, nonzerocolmask]])
+        if np.any(nonzerocolmask):
+            for expt, cfc in zip(fs['e'][nonzerorowmask],
+                                 cc[np.ix_(nonzerorowmask,
+                                           nonzerocolmask)]):
+                count += 1
+                coeffrow = " & ".join(["{0:{cfmt}}".format(c, cfmt=cfmt)
+                                       for c in cfc])
+                out += "{i:5d} & {e:>{efmt}} & {c}".format(i=count, e=expt,
+                                                           efmt=efmt,
+                                                           c=coeffrow) + " \\\\ \n"
+
+        if np.any(np.logical_not(nonzerocolmask)):
+            for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
+                count += 1
+                nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                           for row in cc[:, colidx]])
+                e = fs['e'][nonzerorowmask][0]
+                c = cc[nonzerorowmask, :][0][colidx]
+                out += "{i:5d} & {e:>{efmt}} & \\\\ \n".format(i=count, e=e,
+                                                              efmt=efmt)
+    out += '\\end{tabular}'
+    return out
+
+
+def legacy_to_molpro(bs, withpars=False, efmt="20.10f", cfmt="15.8f"):
+    'legacy to_molpro'
+    # reorder indices of cf if necessary without modiyfing the instance
+    funs = deepcopy(bs.functions)
+    for shell, fs in funs.items():
+        if not has_consecutive_indices(fs):
+            funs[shell] = reorder_shell_to_consecutive(fs)
+
+    res = ""
+    for shell, fs in funs.items():
+        exps = ", ".join(["{0:>{efmt}}".format(e, efmt=efmt).lstrip()
+                          for e in fs['e']]) + '\n'
+        res += "{s:>s}, {e:>s}, ".format(s=shell, e=bs.element) + exps
+
+        for icol, cf in enumerate(fs['cf']):
+            if cf.size == 1:
+                coeffs = ", ".join(["{0:>{cfmt}}".format(cc,
+                    cfmt=cfmt).lstrip() for cc in cf['cc']])
+                res += "c, {0:d}.{0:d}, ".format(cf['idx'][0] + 1) + \
+                    coeffs + '\n'
+            else:
+                # indices should be consecutive
+                coeffs = ", ".join(["{0:>{cfmt}}".format(cc,
+                    cfmt=cfmt).lstrip() for cc in cf['cc']])
+                res += "c, {0:d}.{1:d}, ".format(cf['idx'].min() + 1,
+                                                 cf['idx'].max() + 1) +\
+                    coeffs + '\n'
+    if withpars:
+        res = 'basis={\n' + res + '}'
+    return res
+
+
+def legacy_to_nwchem(bs, efmt="20.10f", cfmt="15.8f"):
+    'legacy to_nwchem'
+    res = 'BASIS "ao basis" PRINT\n'
+    for shell, fs in bs.functions.items():
+        # create an array of contraction coefficients for a given shell
+        cc = bs.contraction_matrix(shell)
+
+        # select columns with more than 1 non zero coefficients
+        nonzerocolmask = np.array([np.count_nonzero(col) > 1
+                                   for col in cc.T])
+        nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                   for row in cc[:, nonzerocolmask]])
+        if np.any(nonzerocolmask):
+            res += "{e} {s}\n".format(e=bs.element, s=shell)
+            for expt, cfc in zip(fs['e'][nonzerorowmask],
+                                 cc[np.ix_(nonzerorowmask, nonzerocolmask)]):
+                res += "{e:>{efmt}}{c}".format(e=expt, efmt=efmt, c="".join(["{0:{cfmt}}".format(c, cfmt=cfmt) for c in cfc])) + "\n"
+
+        if np.any(np.logical_not(nonzerocolmask)):
+            for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
+                res += "{e} {s}\n".format(e=bs.element, s=shell)
+                nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                           for row in cc[:, colidx]])
+                e = fs['e'][nonzerorowmask][0]
+                c = cc[nonzerorowmask, :][0][colidx]
+                res += "{e:>{efmt}}{c:>{cfmt}}".format(e=e, efmt=efmt, c=c,
+                                                       cfmt=cfmt) + "\n"
+    return res + "END\n"
+
+
+def legacy_print_functions(bs, efmt="20.10f", cfmt="15.8f"):
+    'legacy print_functions'
+    res = ''
+    for shell, fs in bs.functions.items():
+        # create an array with all the contraction coefficients
+        # for a given shell
+        res += "\n" + "{s} shell".format(s=shell).center(40, '=') + "\n"
+        cc = bs.contraction_matrix(shell)
+        count = 0
+        # select columns with more than 1 non zero coefficients
+        nonzerocolmask = np.array([np.count_nonzero(col) > 1
+                                   for col in cc.T])
+        nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                   for row in cc[:, nonzerocolmask]])
+        if np.any(nonzerocolmask):
+            res += 'Contracted:\n'
+            for expt, cfc in zip(fs['e'][nonzerorowmask],
+                                 cc[np.ix_(nonzerorowmask,
+                                           nonzerocolmask)]):
+                count += 1
+                coeffrow = "".join(["{0:{cfmt}}".format(c, cfmt=cfmt)
+                                    for c in cfc])
+                res += "{i:5d}{e:>{efmt}}{c}".format(i=count, e=expt,
+                                                     efmt=efmt,
+                                                     c=coeffrow) + "\n"
+
+        if np.any(np.logical_not(nonzerocolmask)):
+            res += 'Uncontracted:\n'
+            for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
+                count += 1
+                nonzerorowmask = np.array([np.count_nonzero(row) > 0
+                                           for row in cc[:, colidx]])
+                e = fs['e'][nonzerorowmask][0]
+                c = cc[nonzerorowmask, :][0][colidx]
+                res += "{i:5d}{e:>{efmt}}{c:>{cfmt}}".format(i=count, e=e,
+                                                             efmt=efmt,
+                                                             c=c,
+                                                             cfmt=cfmt) + "\n"
+    return res
+
+
+def build_library(nelements, scale, seed=42):
+    'Return a list of generally contracted basis sets for `nelements` atoms'
+
+    rng = np.random.RandomState(seed)
+    bases = []
+    for number in range(nelements):
+        functions = OrderedDict()
+        for shell, nexp, ncon in SHELLS:
+            nexp, ncon = nexp * scale, min(ncon * scale, nexp * scale - 1)
+            exps = eventemp(nexp, (0.01 * rng.uniform(1.0, 2.0), 2.5))
+            cfs = []
+            # general contractions over all but the most diffuse exponents
+            for _ in range(ncon):
+                cfs.append(np.array(list(zip(range(nexp - ncon),
+                                             rng.uniform(-1.0, 1.0, nexp - ncon))),
+                                    dtype=CFDTYPE))
+            # uncontracted diffuse functions
+            for idx in range(nexp - ncon, nexp):
+                cfs.append(np.array([(idx, 1.0)], dtype=CFDTYPE))
+            functions[shell] = {'e': exps, 'cf': cfs}
+        bases.append(BasisSet(name='synthetic', functions=functions,
+                              element=SYMBOLS[number % len(SYMBOLS)]))
+    return bases
+
+
+def timeit(func, repeat):
+    'Return the best time out of `repeat` runs and the result'
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        best = min(best, time.time() - start)
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nelements', type=int, default=36,
+                        help='number of elements in the library, default: 36')
+    parser.add_argument('--scale', type=int, default=2,
+                        help='multiplier of the number of exponents and '
+                             'contractions per shell, default: 2')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repetitions, default: 3')
+    args = parser.parse_args()
+
+    bases = build_library(args.nelements, args.scale)
+    print('elements = {0:d}, exponents = {1:d}, contracted = {2:d}'.format(
+        len(bases),
+        sum(fs['e'].size for bs in bases for fs in bs.functions.values()),
+        sum(len(fs['cf']) for bs in bases for fs in bs.functions.values())))
+    print('{0:>16s} {1:>10s} {2:>10s} {3:>8s} {4:>10s}'.format(
+        'writer', 'legacy [s]', 'block [s]', 'speedup', 'MB'))
+
+    for writer in WRITERS:
+        legacy = globals()['legacy_' + writer]
+        told, old = timeit(lambda: [legacy(bs) for bs in bases], args.repeat)
+        tnew, new = timeit(lambda: [getattr(bs, writer)() for bs in bases],
+                           args.repeat)
+        assert old == new, 'output of {} differs'.format(writer)
+        print('{0:>16s} {1:10.4f} {2:10.4f} {3:8.2f} {4:10.3f}'.format(
+            writer, told, tnew, told / tnew,
+            sum(len(out) for out in new) / 1.0e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+
+#The MIT License (MIT)
+#
+#Copyright (c) 2014 Lukasz Mentel
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+'''
+Lazy access to basis set libraries, files with many basis sets for many
+elements such as the dumps from the EMSL Basis Set Exchange.
+
+The file is scanned once to build an index of the byte offsets of the blocks
+belonging to every ``(element, basis name)`` pair and an element is parsed
+only when it is requested.
+'''
+
+from __future__ import division, print_function
+
+import mmap
+import os
+import re
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
+
+from chemtools.basisparse import (element_symbol, element_symbols, get_l,
+                                  parse_gamessus_basis, parse_gaussian_basis,
+                                  parse_molpro_lines)
+from chemtools.basisset import BasisSet
+
+LIBRARY_CACHE_SIZE = 32
+
+# libraries opened by get_library, kept to reuse their indices and caches
+LIBRARIES = OrderedDict()
+LIBRARIES_SIZE = 8
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# comments naming the basis set in the EMSL and Basis Set Exchange files,
+# "! cc-pVTZ  EMSL  Basis Set Exchange Library" or "!   Basis set: cc-pVTZ"
+NAME_PATTERN = br'^![ \t]*(?:basis set[ \t]*:[ \t]*(?P<name>[^\s]+)|(?P<emsl>[^\s]+)[ \t]+EMSL\b)[^\n]*'
+
+# patterns marking the blocks of the elements, all of them define the
+# ``start`` group for the start of an element and ``end`` for the end of
+# the last element in a group of basis sets, in the gaussian format the
+# element lines "XX   0" are only taken outside of the blocks, after the
+# closing "****", a comment or blank lines
+BLOCK_PATTERNS = {
+    'gaussian': br'(?P<start>^(?P<atom>[A-Za-z]{1,3})[ \t]+0[ \t]*\r?$)|(?P<end>^\*{4})',
+    'gamessus': br'(?P<start>(?<=\n)(?P<atom>[A-Za-z]+)[ \t]*\r?$)|(?P<end>^[ \t]*\$END)',
+    'molpro': br'(?P<start>^(?P<shell>[SPDFGHIKspdfghik])[ \t]*,[ \t]*(?P<atom>[A-Za-z]+)[ \t]*,)|(?P<end>^[ \t]*\})',
+}
+
+
+def index_library(data, fmt, name=None):
+    '''
+    Find the blocks of all the elements in a basis set library.
+
+    Args:
+        data : bytes or mmap
+            Contents of the file
+        fmt : str
+            Format of the library, *molpro*, *gamessus* or *gaussian*
+        name : str
+            Name of the basis sets preceding the first comment with a name
+
+    Returns:
+        index : OrderedDict
+            Dictionary with ``(element, basis name)`` tuples as keys and
+            lists of ``(start, end)`` byte offsets of the blocks as values
+    '''
+
+    if fmt not in BLOCK_PATTERNS:
+        raise ValueError('unknown format: "{}", should be one of: {}'.format(
+            fmt, ', '.join(sorted(BLOCK_PATTERNS.keys()))))
+
+    pattern = re.compile(NAME_PATTERN + b'|' + BLOCK_PATTERNS[fmt],
+                         flags=re.M | re.I)
+
+    index = OrderedDict()
+    current = None
+    start = None
+    for match in pattern.finditer(data):
+        if match.group('name') or match.group('emsl'):
+            newname = (match.group('name') or match.group('emsl')).decode()
+            if current is not None and newname != name:
+                index.setdefault(current, []).append((start, match.start()))
+                current = None
+            name = newname
+        elif match.group('start'):
+            atom = match.group('atom').decode()
+            if fmt == 'gaussian':
+                if current is not None or \
+                        atom.lower() not in element_symbols():
+                    continue
+                key = (element_symbol(atom), name)
+            elif fmt == 'gamessus':
+                # element names start the blocks after a blank line or $DATA
+                previous = data[max(0, match.start() - 8):match.start()]
+                if atom.lower() not in element_symbols() or \
+                        not (previous.endswith(b'\n\n') or
+                             previous.rstrip().upper().endswith(b'$DATA')):
+                    continue
+                key = (element_symbol(atom), name)
+            else:
+                key = (atom.capitalize(), name)
+            if key == current and fmt == 'molpro':
+                continue
+            if current is not None:
+                index.setdefault(current, []).append((start, match.start()))
+            current, start = key, match.start()
+        elif match.group('end') and current is not None:
+            end = match.start()
+            if fmt == 'gaussian':
+                # the closing separator belongs to the block
+                end = data.find(b'\n', match.end()) + 1 or len(data)
+            index.setdefault(current, []).append((start, end))
+            current = None
+
+    if current is not None:
+        index.setdefault(current, []).append((start, len(data)))
+    return index
+
+
+def parse_block(string, fmt):
+    '''
+    Parse the functions of a single element from a block of a basis set
+    library.
+
+    Args:
+        string : str
+            Text of the block(s) belonging to the element
+        fmt : str
+            Format of the library, *molpro*, *gamessus* or *gaussian*
+
+    Returns:
+        functions : dict
+            Dictionary of functions with shells as keys
+    '''
+
+    if fmt == 'molpro':
+        res = parse_molpro_lines(string.split('\n'))
+    elif fmt == 'gamessus':
+        res = parse_gamessus_basis('$DATA\n' + string.strip('\n') + '\n\n$END')
+    elif fmt == 'gaussian':
+        if not string.rstrip().endswith('****'):
+            string = string.rstrip('\n') + '\n****\n'
+        res = parse_gaussian_basis(string)
+    else:
+        raise ValueError('unknown format: "{}"'.format(fmt))
+
+    functions = {}
+    for fs in res.values():
+        functions.update(fs)
+    return functions
+
+
+class BasisLibrary(object):
+    '''
+    Basis set library stored in a single file, parsed lazily one element at
+    a time.
+
+    Args:
+        fname : str
+            Name of the file
+        fmt : str
+            Format of the library, *molpro*, *gamessus* or *gaussian*
+        name : str
+            Name of the basis sets not preceded by a comment with the name,
+            by default the name of the file without extension
+        cachesize : int
+            Number of the parsed basis sets kept in memory
+        basiscls : class
+            Class of the returned basis sets, ``BasisSet`` or a subclass
+
+    >>> lib = BasisLibrary('emsl_dump.gbs', fmt='gaussian')
+    >>> lib.get('Ne', 'cc-pVQZ')
+    '''
+
+    def __init__(self, fname, fmt, name=None, cachesize=LIBRARY_CACHE_SIZE,
+                 basiscls=BasisSet):
+
+        if fmt not in BLOCK_PATTERNS:
+            raise ValueError('unknown format: "{}", should be one of: {}'.format(
+                fmt, ', '.join(sorted(BLOCK_PATTERNS.keys()))))
+        if not os.path.exists(fname):
+            raise ValueError("File: {} does not exist".format(fname))
+
+        self.fname = fname
+        self.fmt = fmt
+        self.name = name if name is not None else \
+            os.path.splitext(os.path.basename(fname))[0]
+        self.cachesize = cachesize
+        self.basiscls = basiscls
+        self._index = None
+        self._cache = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def index(self):
+        '''
+        Return the index of the library, (re)building it if the file changed
+        since the last scan.
+        '''
+
+        stat = os.stat(self.fname)
+        if self._index is None or \
+                self._index['stat'] != (stat.st_mtime_ns, stat.st_size):
+            self._index = {'blocks': self.build_index(),
+                           'stat': (stat.st_mtime_ns, stat.st_size)}
+            self._cache.clear()
+        return self._index
+
+    def build_index(self):
+        '''
+        Scan the file once and return the offsets of the blocks, see
+        :py:func:`index_library`.
+        '''
+
+        with open(self.fname, 'rb') as fobj:
+            if os.fstat(fobj.fileno()).st_size == 0:
+                return OrderedDict()
+            data = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return index_library(data, self.fmt, name=self.name)
+            finally:
+                data.close()
+
+    def keys(self):
+        'Return the list of ``(element, basis name)`` tuples in the library'
+        return list(self.index['blocks'].keys())
+
+    def elements(self):
+        'Return the list of elements in the library'
+        return list(OrderedDict.fromkeys(el for el, _ in self.keys()))
+
+    def names(self, element=None):
+        '''
+        Return the list of basis set names in the library, optionally only
+        the ones available for ``element``
+        '''
+
+        return list(OrderedDict.fromkeys(
+            name for el, name in self.keys()
+            if element is None or el == element.capitalize()))
+
+    def __contains__(self, key):
+        try:
+            self.getkey(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.index['blocks'])
+
+    def __getitem__(self, key):
+        return self.get(*self.getkey(key))
+
+    def getkey(self, key):
+        '''
+        Return the ``(element, basis name)`` tuple for ``key`` given as
+        element symbol or a tuple, the name can be omitted if the element has
+        only one basis set in the library
+
+        Raises:
+            KeyError if the basis set is not present in the library
+        '''
+
+        if isinstance(key, tuple):
+            element, name = key
+        else:
+            element, name = key, None
+
+        element = element.capitalize()
+        if name is None:
+            names = self.names(element)
+            if len(names) != 1:
+                raise KeyError('{} basis sets for "{}" in the library, specify '
+                               'the name: {}'.format(len(names), element,
+                                                     ', '.join(names)))
+            name = names[0]
+
+        if (element, name) not in self.index['blocks']:
+            raise KeyError('basis set "{}" for "{}" not found in {}'.format(
+                name, element, self.fname))
+        return element, name
+
+    def read_blocks(self, element, name):
+        'Return the text of all the blocks of the ``(element, name)`` basis'
+
+        chunks = []
+        with open(self.fname, 'rb') as fobj:
+            for start, end in self.index['blocks'][(element, name)]:
+                fobj.seek(start)
+                chunks.append(fobj.read(end - start).decode())
+        return '\n'.join(chunks)
+
+    def get(self, element, name=None):
+        '''
+        Return the basis set for the ``element``, parsing it on first access
+
+        Args:
+            element : str
+                Symbol of the element
+            name : str
+                Name of the basis set, can be omitted if there is only one
+                basis set for the element
+
+        Returns:
+            bs : BasisSet
+                A copy of the cached basis set
+        '''
+
+        key = self.getkey((element, name))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return deepcopy(self._cache[key])
+
+        self._misses += 1
+        functions = parse_block(self.read_blocks(*key), self.fmt)
+        bs = self.basiscls(name=key[1], element=key[0],
+                           functions=OrderedDict(sorted(functions.items(),
+                                                 key=lambda x: get_l(x[0]))))
+        self._cache[key] = bs
+        while len(self._cache) > self.cachesize:
+            self._cache.popitem(last=False)
+        return deepcopy(bs)
+
+    def cache_info(self):
+        'Return the statistics of the cache of parsed basis sets'
+        return CacheInfo(self._hits, self._misses, self.cachesize,
+                         len(self._cache))
+
+    def __repr__(self):
+        return '<BasisLibrary(fname={}, fmt={}, entries={})>'.format(
+            self.fname, self.fmt, len(self))
+
+
+def get_library(fname, fmt, name=None, basiscls=BasisSet):
+    '''
+    Return a shared :py:class:`BasisLibrary` for the file, repeated calls
+    with the same arguments reuse the index and the cache of parsed basis
+    sets, the index is still rebuilt when the file changes
+
+    Args:
+        fname : str
+            Name of the file
+        fmt : str
+            Format of the library, *molpro*, *gamessus* or *gaussian*
+        name : str
+            Name of the basis sets not preceded by a comment with the name
+        basiscls : class
+            Class of the returned basis sets
+    '''
+
+    key = (os.path.abspath(fname), fmt, name, basiscls)
+    if key in LIBRARIES:
+        LIBRARIES.move_to_end(key)
+        return LIBRARIES[key]
+
+    library = BasisLibrary(fname, fmt, name=name, basiscls=basiscls)
+    LIBRARIES[key] = library
+    while len(LIBRARIES) > LIBRARIES_SIZE:
+        LIBRARIES.popitem(last=False)
+    return library
@@ -29,16 +29,24 @@ exponents of basis sets"""
 from __future__ import division, print_function
 
 import atexit
+import concurrent.futures
 import datetime
+import hashlib
+import json
 import os
+import pickle
 import pprint
 import random
+import shutil
+import sqlite3
 import string
 import sys
 import time
+import warnings
 from collections import OrderedDict
+from functools import partial
 import numpy as np
-from scipy.optimize import minimize
+from scipy.optimize import minimize, OptimizeResult, OptimizeWarning
 
 from chemtools.basisparse import ORBITALS
 from chemtools.basisset import BasisSet, get_num_params, sliceinto
@@ -79,7 +87,16 @@ class BSOptimizer(object):
             tempered formula with parameters 0.5 and 2.0
 
         optalg : dict
-            A dictionary specifying the optimization algorithm and its options
+            A dictionary specifying the optimization algorithm and its options,
+            for gradient based methods the ``jacob`` key can be set to
+            ``'forward'`` or ``'central'`` to use the finite difference
+            gradient from :py:func:`fd_objective_gradient
+            <chemtools.basisopt.fd_objective_gradient>` where all displaced
+            single points are run concurrently by at most ``workers``
+            processes, the step size is taken from ``options['eps']``.
+            Setting ``method`` to ``'mds'`` selects the parallel
+            :py:func:`multidirectional search <chemtools.basisopt.minimize_mds>`
+            evaluating all candidate points of an iteration concurrently
 
         fname : str
             Name of the job/input file for the single point calculator
@@ -106,13 +123,32 @@ class BSOptimizer(object):
         penaltykwargs : dict
             Keyword arguments for the penalty function, default
             ``{'alpha' : 25.0, 'smallestonly' : True}``
+
+        cache : str or :py:class:`ObjectiveCache <chemtools.basisopt.ObjectiveCache>`
+            Name of the file with the persistent cache of objective values or
+            an instance of the cache, if given, objectives for already
+            evaluated inputs are returned without running the calculator
+
+        cachesize : int
+            Maximal number of entries in the cache, the least recently used
+            ones are evicted first, default ``10000``
+
+        checkpoint : str
+            Name of the binary checkpoint file, if given the evaluation
+            history, current parameters and the optimization setup are saved
+            periodically so that the optimization can be continued with
+            :py:meth:`resume <chemtools.basisopt.BSOptimizer.resume>`
+
+        checkpointfreq : int
+            Number of new evaluations between the checkpoints, default ``1``
     '''
 
     def __init__(self, objective=None, core=None, template=None,
                  regexp=None, verbose=False, code=None, optalg=None, mol=None,
                  fsopt=None, staticbs=None, fname=None, uselogs=True,
                  runcore=False, penalize=None, penaltykwargs=None,
-                 logfile=None):
+                 logfile=None, cache=None, cachesize=10000, checkpoint=None,
+                 checkpointfreq=1):
 
         self.fsopt = fsopt
         self.staticbs = staticbs
@@ -130,6 +166,16 @@ class BSOptimizer(object):
         self.penalize = penalize
         self.penaltykwargs = penaltykwargs
         self.logfile = logfile
+        self.cachesize = cachesize
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.checkpointfreq = checkpointfreq
+        self.history = OrderedDict()
+        self.nevals = 0
+        self.pool = None
+        # evaluations not yet written to the checkpoint ``self._chkfile``
+        self._unsaved = []
+        self._chkfile = None
 
         if runcore:
             self.function = run_core_energy
@@ -177,10 +223,16 @@ class BSOptimizer(object):
                             }
 
         elif isinstance(value, dict):
-            if value.get('method').lower() == "nelder-mead":
+            if value.get('method').lower() in ["nelder-mead", "mds"]:
                 value['jacob'] = None
             else:
-                value['jacob'] = jac
+                value.setdefault('jacob', jac)
+                if value['jacob'] not in [False, None, 'forward', 'central']:
+                    raise ValueError("optalg['jacob'] should be one of: False, "
+                                     "None, 'forward', 'central', got: "
+                                     "{}".format(value['jacob']))
+            if 'options' not in value.keys():
+                value['options'] = {}
             if 'tol' not in value.keys():
                 value['tol'] = tol
             if 'maxiter' not in value['options'].keys():
@@ -253,6 +305,24 @@ class BSOptimizer(object):
             self.log = open(value, 'wt', buffering=1)
             atexit.register(self.finalize)
 
+    @property
+    def cache(self):
+        return self._cache
+
+    @cache.setter
+    def cache(self, value):
+        '''
+        Open the persistent objective cache if a file name is given
+        '''
+
+        if value is None or isinstance(value, ObjectiveCache):
+            self._cache = value
+        elif isinstance(value, str):
+            self._cache = ObjectiveCache(value, maxsize=self.cachesize)
+        else:
+            raise ValueError("cache should be a <str> or <ObjectiveCache>, "
+                             "got: {}".format(type(value)))
+
     def finalize(self):
 
         if self.log is not sys.stdout:
@@ -323,16 +393,238 @@ class BSOptimizer(object):
         starttime = time.time()
 
         x0 = self.get_x0()
-        self.result = minimize(self.function, x0,
-                               args=(self,),
-                               method=self.optalg["method"],
-                               jac=self.optalg['jacob'],
-                               tol=self.optalg["tol"],
-                               options=self.optalg["options"])
+        mds = self.optalg['method'].lower() == 'mds'
+        if mds or self.optalg.get('jacob') in ['forward', 'central']:
+            # single pool of workers for all the batches of the optimization
+            workers = self.optalg.get('workers')
+            if workers is None:
+                workers = os.cpu_count()
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max(1, workers))
+
+        try:
+            if mds:
+                batchfun = partial(evaluate_parallel,
+                                   workers=self.optalg.get('workers'))
+                if self.checkpoint is not None:
+                    batchfun = self.checkpointed(batchfun, batch=True)
+                self.result = minimize_mds(batchfun, x0, args=(self,),
+                                           tol=self.optalg['tol'],
+                                           **self.optalg['options'])
+            else:
+                if self.optalg['jacob'] in ['forward', 'central']:
+                    function = fd_objective_gradient
+                    jacob = True
+                else:
+                    function = self.function
+                    jacob = self.optalg['jacob']
+                if self.checkpoint is not None:
+                    function = self.checkpointed(function)
+                self.result = minimize(function, x0,
+                                       args=(self,),
+                                       method=self.optalg["method"],
+                                       jac=jacob,
+                                       tol=self.optalg["tol"],
+                                       options=self.optalg["options"])
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+        if self.checkpoint is not None:
+            self.save_checkpoint()
         self.log.write(str(self.result))
+        if self.cache is not None:
+            self.log.write("\n" + self.cache.stats() + "\n")
         self.log.write("Elapsed time : {0:>20.3f} sec".format(time.time() -
                                                               starttime))
 
+    def checkpointed(self, function, batch=False):
+        '''
+        Return a wrapper around the objective ``function`` that records every
+        evaluation in the ``history`` and writes a checkpoint every
+        ``checkpointfreq`` new evaluations.
+
+        Points already present in the ``history`` are not evaluated again,
+        the recorded value is returned instead. Since the optimizers are
+        deterministic, restarting from the same initial parameters replays
+        the recorded evaluations and restores the optimizer state exactly.
+
+        Args:
+            function : callable
+                Objective function ``function(x0, *args)`` or batch objective
+                ``function(points, *args)`` if ``batch`` is ``True``
+            batch : bool
+                Flag marking a batch objective
+        '''
+
+        def record(xin, xout, value):
+            self.history[xin.tobytes()] = (xin, xout, value)
+            self._unsaved.append((xin, xout, value))
+            self.nevals += 1
+            if self.nevals % self.checkpointfreq == 0:
+                self.save_checkpoint()
+
+        def wrapper(x0, *args):
+            xin = np.array(x0, dtype=np.float64)
+            entry = self.history.get(xin.tobytes())
+            if entry is not None:
+                # objectives may modify the parameters in place
+                x0[:] = entry[1]
+                return entry[2]
+            value = function(x0, *args)
+            record(xin, np.array(x0, dtype=np.float64), value)
+            return value
+
+        def batch_wrapper(points, *args):
+            xins = [np.array(x, dtype=np.float64) for x in points]
+            todo = [x for x in xins if x.tobytes() not in self.history]
+            if todo:
+                for x, value in zip(todo, function(todo, *args)):
+                    record(x, x, value)
+            return np.array([self.history[x.tobytes()][2] for x in xins])
+
+        if batch:
+            return batch_wrapper
+        return wrapper
+
+    def get_best(self):
+        '''
+        Return the parameters and the objective value of the best point in
+        the evaluation ``history`` or ``(None, None)`` if it's empty.
+        '''
+
+        best = (None, None)
+        for xin, xout, value in self.history.values():
+            fun = value[0] if isinstance(value, tuple) else value
+            if best[1] is None or fun < best[1]:
+                best = (xout, fun)
+        return best
+
+    def save_checkpoint(self, fname=None):
+        '''
+        Write the binary (pickle) checkpoint with the evaluation history,
+        current parameters, result and the optimization setup: ``fsopt``,
+        ``staticbs``, ``optalg`` and ``uselogs``.
+
+        The checkpoint is a stream of pickled records, the first one holds
+        the optimization setup and each of the following ones the
+        evaluations added since the previous record together with the
+        current parameters and result. Once the file has been written, only
+        the new evaluations are appended to it so the cost of a checkpoint
+        doesn't grow with the length of the history. The complete file is
+        first written under a temporary name and then moved to replace the
+        previous checkpoint, and an incomplete record left at the end by a
+        failure while appending is ignored by :py:meth:`load_checkpoint`.
+
+        Args:
+            fname : str
+                Name of the checkpoint file, default is ``self.checkpoint``
+        '''
+
+        if fname is None:
+            fname = self.checkpoint
+
+        if self.history:
+            current = next(reversed(self.history.values()))[1]
+        else:
+            current = self.get_x0()
+
+        if fname == self._chkfile and os.path.exists(fname):
+            records = [self._unsaved]
+            mode = 'ab'
+            target = fname
+        else:
+            header = {
+                'fsopt': self.fsopt,
+                'staticbs': self.staticbs,
+                'optalg': self.optalg,
+                'uselogs': self.uselogs,
+            }
+            records = [header, list(self.history.values())]
+            mode = 'wb'
+            target = fname + '.tmp'
+
+        records[-1] = {'history': records[-1], 'x0': current,
+                       'result': self.result}
+
+        with open(target, mode) as fchk:
+            for record in records:
+                pickle.dump(record, fchk, protocol=pickle.HIGHEST_PROTOCOL)
+        if target != fname:
+            os.replace(target, fname)
+
+        self._chkfile = fname
+        self._unsaved = []
+
+    @staticmethod
+    def load_checkpoint(fname):
+        '''
+        Read the checkpoint file written by :py:meth:`save_checkpoint` and
+        return the stored state as a ``dict`` with the optimization setup,
+        the complete ``history``, the current parameters ``x0``, the
+        ``result``, number of evaluations ``nevals`` and the best point
+        ``xbest`` with its objective ``funbest``.
+        '''
+
+        history = []
+        with open(fname, 'rb') as fchk:
+            state = pickle.load(fchk)
+            history.extend(state.pop('history', []))
+            while True:
+                try:
+                    record = pickle.load(fchk)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                history.extend(record.pop('history'))
+                state.update(record)
+
+        state['history'] = history
+        state['nevals'] = len(history)
+        state['xbest'], state['funbest'] = None, None
+        for xin, xout, value in history:
+            fun = value[0] if isinstance(value, tuple) else value
+            if state['funbest'] is None or fun < state['funbest']:
+                state['xbest'], state['funbest'] = xout, fun
+        return state
+
+    def resume(self, checkpoint):
+        '''
+        Continue the optimization from a checkpoint file.
+
+        The optimization setup (``fsopt``, ``staticbs``, ``optalg`` and
+        ``uselogs``) is restored from the checkpoint and the optimization is
+        restarted from the original initial parameters, all the evaluations
+        recorded in the checkpoint are replayed without running the
+        calculator so the optimizer continues where it was interrupted.
+
+        Args:
+            checkpoint : str
+                Name of the checkpoint file
+
+        Returns:
+            res : OptimizeResult
+                An instance of the ``scipy.optimize.OptimizeResult`` class
+        '''
+
+        state = self.load_checkpoint(checkpoint)
+
+        self.fsopt = state['fsopt']
+        self.staticbs = state['staticbs']
+        self.optalg = state['optalg']
+        self.uselogs = state['uselogs']
+        self.history = OrderedDict((xin.tobytes(), (xin, xout, value))
+                                   for xin, xout, value in state['history'])
+        self.nevals = len(self.history)
+        self._unsaved = []
+        self._chkfile = None
+        if self.checkpoint is None:
+            self.checkpoint = checkpoint
+
+        self.log.write("Resuming from checkpoint {0:s} with {1:d} "
+                       "evaluations\n".format(checkpoint, self.nevals))
+        self.run()
+        return self.result
+
     def get_basis(self, name=None, element=None):
         '''
         Construct the BasisSet object from the result of the
@@ -379,6 +671,166 @@ class BSOptimizer(object):
         return bsdict
 
 
+class ObjectiveCache(object):
+    '''
+    Persistent cache of the objective values stored in a SQLite database and
+    addressed by the hash of the calculation input, see
+    :py:func:`get_cache_key <chemtools.basisopt.get_cache_key>`.
+
+    Args:
+        path : str
+            Name of the database file, created if it doesn't exist
+
+        maxsize : int
+            Maximal number of stored objectives, when exceeded the least
+            recently used entries are evicted
+
+    The number of cache hits and misses is accumulated in the ``hits`` and
+    ``misses`` attributes.
+    '''
+
+    def __init__(self, path, maxsize=10000):
+
+        self.path = path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS objectives '
+                          '(key TEXT PRIMARY KEY, value REAL NOT NULL, '
+                          'atime INTEGER NOT NULL)')
+        self.conn.commit()
+        last = self.conn.execute('SELECT MAX(atime) FROM objectives').fetchone()[0]
+        self._clock = 0 if last is None else last
+
+    def _tick(self):
+        'Return the next value of the access clock'
+
+        self._clock += 1
+        return self._clock
+
+    def get(self, key):
+        '''
+        Return the objective stored under ``key`` or ``None`` if not present
+        '''
+
+        row = self.conn.execute('SELECT value FROM objectives WHERE key = ?',
+                                (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute('UPDATE objectives SET atime = ? WHERE key = ?',
+                          (self._tick(), key))
+        self.conn.commit()
+        return row[0]
+
+    def set(self, key, value):
+        '''
+        Store the objective ``value`` under ``key`` and evict the least
+        recently used entries if the size limit is exceeded
+        '''
+
+        self.conn.execute('INSERT OR REPLACE INTO objectives VALUES (?, ?, ?)',
+                          (key, float(value), self._tick()))
+        self.conn.execute('DELETE FROM objectives WHERE key IN '
+                          '(SELECT key FROM objectives ORDER BY atime DESC '
+                          'LIMIT -1 OFFSET ?)', (self.maxsize,))
+        self.conn.commit()
+
+    def clear(self):
+        'Remove all the entries and reset the counters'
+
+        self.conn.execute('DELETE FROM objectives')
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        'Close the database connection'
+
+        self.conn.close()
+
+    def stats(self):
+        'Return a string with the cache statistics'
+
+        return "Cache hits : {0:d}, misses : {1:d}, entries : {2:d}".format(
+            self.hits, self.misses, len(self))
+
+    def __contains__(self, key):
+        return self.conn.execute('SELECT 1 FROM objectives WHERE key = ?',
+                                 (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM objectives').fetchone()[0]
+
+    def __repr__(self):
+        return "<ObjectiveCache(path={}, maxsize={}, hits={}, misses={})>".format(
+            self.path, self.maxsize, self.hits, self.misses)
+
+
+def calculator_identity(code):
+    '''
+    Return a dict identifying the calculator ``code`` in the cache keys, the
+    type, name, executable, run options and, as a proxy for the program
+    version, the size and modification time of the executable
+    '''
+
+    executable = getattr(code, 'executable', None)
+    identity = {'type': type(code).__name__,
+                'name': getattr(code, 'name', None),
+                'executable': executable,
+                'runopts': getattr(code, 'runopts', None)}
+    if executable is not None and os.path.exists(executable):
+        stat = os.stat(executable)
+        identity['version'] = [stat.st_size, stat.st_mtime_ns]
+    return identity
+
+
+def get_cache_key(bso, bsdict, core):
+    '''
+    Return a hex digest identifying the calculation input composed from the
+    attributes of the :py:class:`BSOptimizer` and the basis sets in
+    ``bsdict``.
+
+    The hash covers the calculator (see :py:func:`calculator_identity`),
+    template, molecule, core specification, objective, the kind of the
+    objective (total or core energy) and the exponents and contraction
+    coefficients of all the basis sets, which are hashed using their binary
+    representation so that no precision is lost.
+    '''
+
+    sha = hashlib.sha256()
+
+    if callable(bso.objective):
+        objective = getattr(bso.objective, '__qualname__', repr(bso.objective))
+    else:
+        objective = bso.objective
+
+    header = [calculator_identity(bso.code), bso.template, objective,
+              bso.regexp, core, bso.function.__name__]
+    sha.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+
+    if bso.mol is not None:
+        sha.update('{0} {1} {2}'.format(bso.mol.charge, bso.mol.multiplicity,
+                                        bso.mol.symmetry).encode('utf-8'))
+        for atom in bso.mol.atoms:
+            sha.update('{0} {1}'.format(atom.symbol,
+                                        atom.atomic_number).encode('utf-8'))
+            sha.update(np.asarray(atom.xyz, dtype=np.float64).tobytes())
+
+    for elem in sorted(bsdict.keys()):
+        sha.update(elem.encode('utf-8'))
+        for shell, fs in bsdict[elem].functions.items():
+            sha.update(shell.encode('utf-8'))
+            sha.update(np.asarray(fs['e'], dtype=np.float64).tobytes())
+            for cf in fs['cf']:
+                sha.update(cf.tobytes())
+
+    return sha.hexdigest()
+
+
 def get_basis_dict(bso, x0):
     '''
     Return a dictionary with :py:class:`BasisSet` objects as values and
@@ -500,6 +952,18 @@ def run_total_energy(x0, *args):
             bso.log.write(atom + basis.print_functions())
             bso.log.flush()
 
+    if bso.cache is not None:
+        key = get_cache_key(bso, bsdict, bso.core)
+        objective = bso.cache.get(key)
+        if objective is not None:
+            if bso.verbose:
+                bso.log.write("x0 : " + ", ".join([str(x) for x in x0]) + "\n")
+                bso.log.write("{0:<20s} : {1:>30.10f}\n".format("Cached objective", objective))
+                bso.log.write(bso.cache.stats() + "\n")
+                bso.log.write("=" * 80 + "\n")
+                bso.log.flush()
+            return objective * penalty
+
     bso.code.write_input(fname=bso.fname, template=bso.template, basis=bsdict,
                          mol=bso.mol, core=bso.core)
     output = bso.code.run(bso.fname)
@@ -512,6 +976,8 @@ def run_total_energy(x0, *args):
 
         if objective is None:
             raise ValueError("Unable to parse the objective, check output")
+        if bso.cache is not None:
+            bso.cache.set(key, objective)
         if bso.verbose:
             bso.log.write("{0:<s}".format("Job Terminated without errors\n"))
             bso.log.write("x0 : " + ", ".join([str(x) for x in x0]) + "\n")
@@ -525,6 +991,344 @@ def run_total_energy(x0, *args):
         raise ValueError("something went wrong, check output {0:s}".format(output))
 
 
+def get_job_fname(fname, workdir):
+    '''
+    Return the name(s) of the input file(s) ``fname`` placed in the directory
+    ``workdir``, ``fname`` can be a string or a dict of strings (Dalton).
+    '''
+
+    if isinstance(fname, dict):
+        return {k: os.path.join(workdir, os.path.basename(v))
+                for k, v in fname.items()}
+    return os.path.join(workdir, os.path.basename(fname))
+
+
+def run_in_workdir(code, workdir, fname):
+    '''
+    Run a single job ``fname`` with calculator ``code`` from within the
+    ``workdir`` directory and return the absolute path to the output.
+
+    Intended to be executed in a separate worker process, since the working
+    directory of the process is changed.
+    '''
+
+    os.chdir(workdir)
+    return os.path.join(workdir, code.run(fname))
+
+
+def evaluate_parallel(xs, bso, workers=None):
+    '''
+    Evaluate the objective for all the parameter vectors in ``xs``
+    running the single point calculations concurrently.
+
+    All the inputs are written up front, each one in its own directory
+    ``<fname>_jobs/<index>`` so that the scratch and output files of the jobs
+    don't collide, and executed by the pool of processes ``bso.pool`` created
+    in :py:meth:`BSOptimizer.run <chemtools.basisopt.BSOptimizer.run>` or a
+    temporary pool of at most ``workers`` processes. The directories are
+    emptied before each evaluation so that outputs left from a previous one
+    are never parsed. Objectives present in the ``bso.cache`` are not
+    recalculated.
+
+    Args:
+        xs : sequence of numpy.array
+            Parameter vectors to evaluate
+        bso : :py:class:`BSOptimizer <chemtools.basisopt.BSOptimizer>`
+            Optimizer instance
+        workers : int
+            Maximal number of concurrently running jobs when ``bso.pool``
+            is not set, defaults to the number of CPUs
+
+    Returns:
+        out : numpy.array
+            Objective values (including the penalty) for all points
+    '''
+
+    runcore = bso.function is run_core_energy
+    values = np.zeros(len(xs), dtype=np.float64)
+    if isinstance(bso.fname, dict):
+        base = os.path.splitext(bso.fname['dal'])[0]
+    else:
+        base = os.path.splitext(bso.fname)[0]
+
+    pending = []
+    tasks = []
+    for ipoint, x0 in enumerate(xs):
+
+        x0 = np.array(x0, dtype=np.float64)
+        for atom, functs in bso.fsopt.items():
+            ni = 0
+            nt = 0
+            for shell, seq, nf, params in functs:
+                nt += nf
+                if seq not in ['le', 'legendre'] and not bso.uselogs:
+                    x0[ni:nt] = np.abs(x0[ni:nt])
+                ni += nf
+
+        bsdict = get_basis_dict(bso, x0)
+
+        if bso.penalize:
+            penalty = get_penalty(bsdict, **bso.penaltykwargs)
+        else:
+            penalty = 1.0
+
+        key = None
+        if bso.cache is not None:
+            key = get_cache_key(bso, bsdict, bso.core)
+            objective = bso.cache.get(key)
+            if objective is not None:
+                values[ipoint] = objective * penalty
+                continue
+
+        workdir = os.path.abspath(os.path.join(base + '_jobs',
+                                               '{0:04d}'.format(ipoint)))
+        if os.path.exists(workdir):
+            shutil.rmtree(workdir)
+        os.makedirs(workdir)
+
+        if runcore:
+            jobs = [(base + "_core" + str(sum(core)) + ".inp", core)
+                    for core in bso.core]
+        else:
+            jobs = [(bso.fname, bso.core)]
+
+        for fname, core in jobs:
+            bso.code.write_input(fname=get_job_fname(fname, workdir),
+                                 template=bso.template, basis=bsdict,
+                                 mol=bso.mol, core=core)
+            tasks.append((workdir, get_job_fname(fname, '')))
+        pending.append((ipoint, x0, key, penalty, len(jobs)))
+
+    if tasks:
+        pool = bso.pool
+        if pool is None:
+            if workers is None:
+                workers = os.cpu_count()
+            nproc = max(1, min(workers, len(tasks)))
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=nproc)
+        try:
+            futures = [pool.submit(run_in_workdir, bso.code, workdir, fname)
+                       for workdir, fname in tasks]
+            outputs = [future.result() for future in futures]
+        finally:
+            if pool is not bso.pool:
+                pool.shutdown()
+    else:
+        outputs = []
+
+    outiter = iter(outputs)
+    for ipoint, x0, key, penalty, njobs in pending:
+        pointouts = [next(outiter) for _ in range(njobs)]
+        if not all(bso.code.accomplished(out) for out in pointouts):
+            raise ValueError("something went wrong, check outputs {0:s}".format(
+                ", ".join(pointouts)))
+
+        if callable(bso.objective):
+            objs = [bso.objective(out) for out in pointouts]
+        else:
+            objs = [bso.code.parse(out, bso.objective, bso.regexp)
+                    for out in pointouts]
+        if any(obj is None for obj in objs):
+            raise ValueError("Unable to parse the objective, check outputs "
+                             "{0:s}".format(", ".join(pointouts)))
+
+        if runcore:
+            objective = objs[0] - objs[1]
+            if objective > 0.0:
+                objective = -1.0 * objective
+        else:
+            objective = objs[0]
+
+        if key is not None:
+            bso.cache.set(key, objective)
+        values[ipoint] = objective * penalty
+
+        if bso.verbose:
+            bso.log.write("x0 : " + ", ".join([str(x) for x in x0]) + "\n")
+            bso.log.write("{0:<20s} : {1:>30.10f}\n".format("Objective",
+                                                            values[ipoint]))
+            bso.log.flush()
+
+    return values
+
+
+def fd_objective_gradient(x0, *args):
+    '''
+    Calculate the objective and its finite difference gradient at ``x0``
+    evaluating all the displaced points concurrently through
+    :py:func:`evaluate_parallel <chemtools.basisopt.evaluate_parallel>`.
+
+    The difference scheme is taken from ``bso.optalg['jacob']`` (either
+    ``forward`` or ``central``), the step from ``bso.optalg['options']['eps']``
+    and the number of concurrent jobs from ``bso.optalg['workers']``.
+
+    Args:
+        x0 : numpy.array
+            Current parameters
+        args : tuple
+            Tuple with the :py:class:`BSOptimizer` instance
+
+    Returns:
+        out : tuple
+            Objective value and the gradient, as expected by
+            ``scipy.optimize.minimize`` with ``jac=True``
+    '''
+
+    bso = args[0]
+    x0 = np.asarray(x0, dtype=np.float64)
+    scheme = bso.optalg.get('jacob', 'forward')
+    eps = bso.optalg['options'].get('eps', np.sqrt(np.finfo(float).eps))
+
+    disp = eps * np.eye(x0.size)
+    if scheme == 'forward':
+        points = [x0] + [x0 + d for d in disp]
+    elif scheme == 'central':
+        points = [x0] + [x0 + d for d in disp] + [x0 - d for d in disp]
+    else:
+        raise ValueError("unknown finite difference scheme: {}".format(scheme))
+
+    values = evaluate_parallel(points, bso, workers=bso.optalg.get('workers'))
+
+    if scheme == 'forward':
+        grad = (values[1:] - values[0]) / eps
+    else:
+        grad = (values[1:x0.size + 1] - values[x0.size + 1:]) / (2.0 * eps)
+
+    return values[0], grad
+
+
+def minimize_mds(fun, x0, args=(), tol=None, maxiter=None, maxfev=None,
+                 xatol=1.0e-4, fatol=1.0e-4, expansion=2.0, contraction=0.5,
+                 disp=False, **unknown_options):
+    '''
+    Minimize a function using the multidirectional search simplex algorithm
+    of Torczon [Torczon1991]_.
+
+    In contrast to Nelder-Mead, every iteration transforms all but the best
+    vertex of the simplex, so the reflected and expanded points (``2n``
+    points for ``n`` parameters) are evaluated as a single batch and can be
+    calculated concurrently, followed by a batch of ``n`` contracted points
+    if none of the reflections improves the best vertex.
+
+    .. [Torczon1991] Torczon, V. (1991). "On the convergence of the
+       multidirectional search algorithm". SIAM Journal on Optimization,
+       1(1), 123–145.
+
+    Args:
+        fun : callable
+            Batch objective ``fun(points, *args)`` taking a list of parameter
+            vectors and returning an array of function values, e.g.
+            :py:func:`evaluate_parallel <chemtools.basisopt.evaluate_parallel>`
+        x0 : numpy.array
+            Starting point
+        args : tuple
+            Extra arguments passed to ``fun``
+        tol : float
+            If given overrides both ``xatol`` and ``fatol``
+        maxiter : int
+            Maximal number of iterations, default ``200 * n``
+        maxfev : int
+            Maximal number of function evaluations, default ``200 * n``
+        xatol : float
+            Absolute tolerance on the simplex size
+        fatol : float
+            Absolute tolerance on the spread of function values in the simplex
+        expansion : float
+            Expansion coefficient (> 1)
+        contraction : float
+            Contraction coefficient (between 0 and 1)
+        disp : bool
+            Print the convergence message
+        unknown_options :
+            Any other options trigger an ``OptimizeWarning``, the same way
+            as in the ``scipy.optimize`` solvers
+
+    Returns:
+        res : OptimizeResult
+            An instance of the ``scipy.optimize.OptimizeResult`` class
+    '''
+
+    if unknown_options:
+        warnings.warn("Unknown solver options: {0:s}".format(
+            ", ".join(map(str, unknown_options.keys()))), OptimizeWarning, 2)
+
+    if tol is not None:
+        xatol = fatol = tol
+
+    x0 = np.asarray(x0, dtype=np.float64).flatten()
+    n = x0.size
+    if maxiter is None:
+        maxiter = 200 * n
+    if maxfev is None:
+        maxfev = 200 * n
+
+    # initial simplex constructed the same way as in scipy's Nelder-Mead
+    sim = np.tile(x0, (n + 1, 1))
+    for k in range(n):
+        if sim[k + 1, k] != 0.0:
+            sim[k + 1, k] *= 1.05
+        else:
+            sim[k + 1, k] = 0.00025
+
+    fsim = np.asarray(fun(list(sim), *args), dtype=np.float64)
+    nfev = n + 1
+    nit = 0
+    status = 0
+
+    while True:
+
+        order = np.argsort(fsim)
+        sim = sim[order]
+        fsim = fsim[order]
+
+        if (np.max(np.abs(sim[1:] - sim[0])) <= xatol and
+                np.max(np.abs(fsim[1:] - fsim[0])) <= fatol):
+            break
+        if nit >= maxiter:
+            status = 2
+            break
+        if nfev >= maxfev:
+            status = 1
+            break
+
+        nit += 1
+        best = sim[0]
+        reflected = 2.0 * best - sim[1:]
+        expanded = (1.0 + expansion) * best - expansion * sim[1:]
+
+        fvals = np.asarray(fun(list(reflected) + list(expanded), *args),
+                           dtype=np.float64)
+        nfev += 2 * n
+        fref, fexp = fvals[:n], fvals[n:]
+
+        if np.min(fref) < fsim[0]:
+            if np.min(fexp) < np.min(fref):
+                sim[1:], fsim[1:] = expanded, fexp
+            else:
+                sim[1:], fsim[1:] = reflected, fref
+        else:
+            contracted = best + contraction * (sim[1:] - best)
+            fsim[1:] = np.asarray(fun(list(contracted), *args),
+                                  dtype=np.float64)
+            sim[1:] = contracted
+            nfev += n
+
+    messages = ['Optimization terminated successfully.',
+                'Maximum number of function evaluations has been exceeded.',
+                'Maximum number of iterations has been exceeded.']
+
+    if disp:
+        print(messages[status])
+        print("         Current function value: {0:f}".format(fsim[0]))
+        print("         Iterations: {0:d}".format(nit))
+        print("         Function evaluations: {0:d}".format(nfev))
+
+    return OptimizeResult(fun=fsim[0], x=sim[0], nit=nit, nfev=nfev,
+                          status=status, success=(status == 0),
+                          message=messages[status],
+                          final_simplex=(sim, fsim))
+
+
 def run_core_energy(x0, *args):
     '''
     Funtion for running two single point calculations and parsing the resulting
@@ -572,6 +1376,19 @@ def run_core_energy(x0, *args):
             bso.log.write(atom + "\n" + basis.print_functions())
             bso.log.flush()
 
+    if bso.cache is not None:
+        key = get_cache_key(bso, bsdict, bso.core)
+        coreenergy = bso.cache.get(key)
+        if coreenergy is not None:
+            if bso.verbose:
+                bso.log.write("x0 : " + ", ".join([str(x) for x in x0]) + "\n")
+                bso.log.write("{0:<20s} : {1:>30.10f}\n".format("Cached core energy",
+                                                                coreenergy))
+                bso.log.write(bso.cache.stats() + "\n")
+                bso.log.write("=" * 84)
+                bso.log.flush()
+            return coreenergy * penalty
+
     citote = []
     stats = []
     base = os.path.splitext(bso.fname)[0]
@@ -599,6 +1416,8 @@ def run_core_energy(x0, *args):
         coreenergy = citote[0] - citote[1]
         if coreenergy > 0.0:
             coreenergy = -1.0 * coreenergy
+        if bso.cache is not None:
+            bso.cache.set(key, coreenergy)
         if bso.verbose:
             bso.log.write("{0:<20s} : {1:>30.10f}\n".format("Core energy",
                                                             coreenergy))
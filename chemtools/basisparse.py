@@ -26,13 +26,21 @@ from __future__ import division, print_function
 
 import json
 import re
+from functools import lru_cache
 
 import numpy as np
 from mendeleev import element
+from mendeleev.fetch import fetch_table
 
 CFDTYPE = [('idx', np.int32), ('cc', np.float64)]
 ORBITALS = ('s', 'p', 'd', 'f', 'g', 'h', 'i', 'k')
 
+# translation table for the Fortran double precision exponents, 1.0D-03
+FORTRAN_EXPONENT = str.maketrans('dD', 'EE')
+
+GAUSSIAN_SHELL = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>\d+)\s*(?P<scale>\-?\d+\.\d+)')
+GAMESSUS_SHELL = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>\d+)')
+
 
 def get_l(shell):
     'Return the orbital angular momentum quantum number for a given subshell'
@@ -85,27 +93,80 @@ def parse_molpro_basis(string):
     else:
         raise ValueError('basis string: "basis={*}" not found')
 
-    start = []
-    for i, line in enumerate(lines):
-        if line.split(",")[0].lower() in ORBITALS:
-            start.append(i)
-    if len(start) == 0:
+    bs = parse_molpro_lines(lines)
+    if len(bs) == 0:
         return None
+    return bs
 
-    startstop = []
-    for i in range(len(start) - 1):
-        startstop.append((start[i], start[i + 1]))
-    startstop.append((start[-1], len(lines)))
 
-    bs = {}
-    for i in startstop:
-        at_symbol, shell = parse_molpro_shell(lines[i[0]],
-                                              lines[i[0] + 1: i[1]])
-        if at_symbol in bs.keys():
-            bs[at_symbol] = dict(list(bs[at_symbol].items()) +
-                                 list(shell.items()))
+def parse_molpro_lines(lines):
+    '''
+    Parse all the shells from a list of lines in Molpro format.
+
+    The numerical fields of all the shells are collected first and converted
+    to floats in a single pass.
+
+    Args:
+      lines : list of str
+        Lines with the shells, exponents lines start with the shell label
+        and contraction lines with ``c``
+
+    Returns:
+      bs : dict
+        A dictionary with element symbols as keys and dictionaries of
+        functions as values
+    '''
+
+    # (element, shell, [(first, last), ...]) of each shell and the strings
+    # with the numbers of each line
+    shells = []
+    numeric = []
+    for line in lines:
+        fields = line.split(",", 2)
+        if fields[0].lower() in ORBITALS:
+            shells.append((fields[1].strip().capitalize(), fields[0].lower(),
+                           []))
+            numeric.append(fields[2].strip().rstrip(";"))
+        elif shells:
+            fields = line.strip().rstrip(";").split(",", 2)
+            if fields[0] == "c":
+                first, last = fields[1].split(".")
+                shells[-1][2].append((int(first) - 1, int(last)))
+                numeric.append(fields[2])
+
+    counts = [item.count(",") + 1 for item in numeric]
+    offsets = np.cumsum([0] + counts)
+    # the coefficient of the uncontracted functions is stored after the
+    # parsed numbers
+    values = np.append(parse_reals(",".join(numeric), sep=","), 1.0)
+
+    # first exponent index, number of coefficients and the offset in values
+    # of every contracted function
+    firsts, sizes, starts = [], [], []
+    line = 0
+    for _, _, bounds in shells:
+        if len(bounds) > 0:
+            for i, (first, last) in enumerate(bounds, start=line + 1):
+                firsts.append(first)
+                sizes.append(min(last - first, counts[i]))
+                starts.append(offsets[i])
         else:
-            bs[at_symbol] = shell
+            firsts.extend(range(counts[line]))
+            sizes.extend([1] * counts[line])
+            starts.extend([values.size - 1] * counts[line])
+        line += len(bounds) + 1
+
+    cfs = ragged_contractions(firsts, sizes, starts, values)
+
+    bs = {}
+    line, ncf = 0, 0
+    for at_symbol, shell, bounds in shells:
+        nshell = len(bounds) if len(bounds) > 0 else counts[line]
+        bs.setdefault(at_symbol, {})[shell] = {
+            'e': values[offsets[line]:offsets[line + 1]],
+            'cf': cfs[ncf:ncf + nshell]}
+        line += len(bounds) + 1
+        ncf += nshell
     return bs
 
 
@@ -114,29 +175,8 @@ def parse_molpro_shell(expsline, coeffs):
     Parse functions of one shell in molpro format.
     '''
 
-    real = re.compile(r'[dD]')
-    # remove empty strings and whitespace line breaks and tabs
-    coeffs = [x.strip() for x in coeffs if x.strip() not in ['', '\n', '\t']]
-
-    fs = {}
-
-    shell = expsline.split(",")[0].lower()
-    at_symbol = expsline.split(",")[1].strip().capitalize()
-    exps = np.array([float(real.sub('E', x))
-                     for x in expsline.rstrip(";").split(",")[2:]])
-
-    fs[shell] = {'e': exps, 'cf': []}
-    if len(coeffs) != 0:
-        for line in coeffs:
-            lsp = line.rstrip(";").split(",")
-            if lsp[0] == "c":
-                i, j = [int(x) for x in lsp[1].split(".")]
-                coeffs = [float(real.sub('E', x)) for x in lsp[2:]]
-                fs[shell]['cf'].append(np.array(list(zip(list(range(i - 1, j)),
-                                                coeffs)), dtype=CFDTYPE))
-    else:
-        for i in range(len(exps)):
-            fs[shell]['cf'].append(np.array([tuple([i, 1.0])], dtype=CFDTYPE))
+    bs = parse_molpro_lines([expsline] + list(coeffs))
+    at_symbol, fs = bs.popitem()
     return at_symbol, fs
 
 
@@ -200,34 +240,21 @@ def parse_gaussian_basis(string):
     gaussian format.
     '''
 
-    shellre = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>[1-9]+)\s*(?P<scale>\-?\d+\.\d+)')
     out = dict()
-    for i, item in enumerate(string.split('****\n')):
+    for item in string.split('****\n'):
         if len(item) > 5:
             atomline, basis = item.split('\n', 1)
             atom = atomline.split()[0]
-            bslines = basis.split('\n')
-            functions = dict()
-            for i, line in enumerate(bslines):
-                match = shellre.search(line)
-                if match:
-                    shells, nf, scale = match.group('shells').lower(), match.group('nf'), match.group('scale')
-                    exps, indxs, coeffs = parse_gaussian_function(bslines[i + 1: i + int(nf) + 1])
-                    for shell, cc in zip(shells, coeffs.T):
-                        if shell in functions.keys():
-                            sexp, idxs, idxo = merge_exponents(functions[shell]['e'], exps)
-                            functions[shell]['e'] = sexp * float(scale)**2
-                            for cf in functions[shell]['cf']:
-                                cf['idx'] = idxs[cf['idx']]
-                            newcf = np.array(list(zip(idxo[indxs], cc)),
-                                             dtype=CFDTYPE)
-                            functions[shell]['cf'].append(newcf)
-                        else:
-                            functions[shell] = dict()
-                            functions[shell]['cf'] = list()
-                            functions[shell]['e'] = exps
-                            functions[shell]['cf'].append(np.array(list(zip(indxs, cc)), dtype=CFDTYPE))
-                out[atom] = functions
+            contractions = dict()
+            for shells, nf, scale, table in parse_blocks(basis.split('\n'),
+                                                          GAUSSIAN_SHELL):
+                exps = table[:, 0] * float(scale)**2
+                indxs = np.arange(nf, dtype=np.int32)
+                for shell, cc in zip(shells.lower(), table[:, 1:].T):
+                    contractions.setdefault(shell, []).append((exps, indxs,
+                                                               cc))
+            out[atom] = {shell: merge_contractions(cfs)
+                         for shell, cfs in contractions.items()}
     return out
 
 
@@ -237,18 +264,12 @@ def parse_gaussian_function(lines):
     three lists containg: exponents, indices, coefficients.
 
     Remeber that python doesn't recognise the `1.0d-3` format where `d` or
-    `D` is used to the regex subsitution has to take care of that.
+    `D` is used so the exponents are translated in a single pass.
     '''
 
-    real = re.compile(r'[dD]')
-
+    table = parse_table(lines)
     indxs = np.arange(len(lines), dtype=np.int32)
-    exps = np.array([float(real.sub('E', line.split()[0])) for line in lines],
-                    dtype=np.float64)
-    coeffs = np.array([[float(real.sub('E', x))
-                        for x in line.split()[1:]] for line in lines],
-                      dtype=np.float64)
-    return (exps, indxs, coeffs)
+    return (table[:, 0].copy(), indxs, table[:, 1:])
 
 
 def parse_gamessus_basis(string):
@@ -265,38 +286,25 @@ def parse_gamessus_basis(string):
     else:
         raise ValueError("basis not found, should be inside '$DATA' and '$END' group")
 
-    pat = re.compile(r'^\s*(?P<shells>[SPDFGHILspdfghil]+)\s*(?P<nf>[1-9]+)')
     res = dict()
 
     for item in basisstr.split('\n\n'):
         if len(item) > 0:
             atom, basis = item.split('\n', 1)
             if atom != "":
-                functions = dict()
-                elem = element(atom.capitalize())
-                bslines = basis.split("\n")
-                for i, line in enumerate(bslines):
-                    match = pat.search(line)
-                    if match:
-                        shells, nf = match.group("shells").lower(), match.group("nf")
-                        exps, indxs, coeffs = parse_gamessus_function(bslines[i + 1: i + int(nf) + 1])
-                        if shells in ['L', 'l']:
-                            shells = ['s', 'p']
-                        for shell, cc in zip(shells, coeffs.T):
-                            if shell in functions.keys():
-                                sexp, idxs, idxo = merge_exponents(functions[shell]['e'], exps)
-                                functions[shell]['e'] = sexp
-                                for cf in functions[shell]['cf']:
-                                    cf['idx'] = idxs[cf['idx']]
-                                newcf = np.array(list(zip(idxo[indxs-1], cc)),
-                                                 dtype=CFDTYPE)
-                                functions[shell]['cf'].append(newcf)
-                            else:
-                                functions[shell] = dict()
-                                functions[shell]['cf'] = list()
-                                functions[shell]['e'] = exps
-                                functions[shell]['cf'].append(np.array(list(zip(indxs - 1, cc)), dtype=CFDTYPE))
-                res[elem.symbol] = functions
+                contractions = dict()
+                for shells, nf, _, table in parse_blocks(basis.split("\n"),
+                                                         GAMESSUS_SHELL):
+                    exps = np.ascontiguousarray(table[:, 1])
+                    indxs = table[:, 0].astype(np.int32) - 1
+                    if shells in ['L', 'l']:
+                        shells = 'sp'
+                    for shell, cc in zip(shells.lower(), table[:, 2:].T):
+                        contractions.setdefault(shell, []).append((exps, indxs,
+                                                                   cc))
+                res[element_symbol(atom)] = {
+                    shell: merge_contractions(cfs)
+                    for shell, cfs in contractions.items()}
     return res
 
 
@@ -306,17 +314,207 @@ def parse_gamessus_function(lines):
     three lists containg: exponents, indices, coefficients.
 
     Remeber that python doesn't recognise the `1.0d-3` format where `d` or
-    `D` is used to the regex subsitution has to take care of that.
+    `D` is used so the exponents are translated in a single pass.
     '''
 
-    real = re.compile(r'[dD]')
+    table = parse_table(lines)
+    indxs = table[:, 0].astype(np.int32)
+    return (table[:, 1].copy(), indxs, table[:, 2:])
+
+
+def parse_reals(string, sep=None):
+    '''
+    Convert all the numbers in a string into an array of floats in a single
+    pass, the Fortran ``D`` exponents are accepted.
+
+    Args:
+      string : str
+        String with the numbers
+      sep : str
+        Separator between the numbers, by default any whitespace
+
+    Returns:
+      values : numpy.array
+    '''
 
-    indxs = np.array([int(line.split()[0]) for line in lines], dtype=np.int32)
-    exps = np.array([float(real.sub('E', line.split()[1])) for line in lines],
+    return np.array(string.translate(FORTRAN_EXPONENT).split(sep),
                     dtype=np.float64)
-    coeffs = np.array([[float(real.sub('E', x)) for x in line.split()[2:]]
-                        for line in lines], dtype=np.float64)
-    return (exps, indxs, coeffs)
+
+
+def parse_table(lines):
+    '''
+    Convert the lines with the same number of numerical fields into a 2D
+    array of floats.
+
+    Args:
+      lines : list of str
+
+    Returns:
+      table : 2D numpy.array
+        Array with a row per line
+    '''
+
+    values = parse_reals("\n".join(lines))
+    if len(lines) == 0 or values.size % len(lines) != 0:
+        raise ValueError('inconsistent number of fields in:\n{}'.format(
+            "\n".join(lines)))
+    return values.reshape(len(lines), -1)
+
+
+def parse_blocks(lines, pattern):
+    '''
+    Parse the blocks of functions in the Gaussian or GAMESS(US) formats.
+
+    The header of each block is matched by ``pattern`` which should define
+    the ``shells`` and ``nf`` (number of primitives) groups and optionally
+    ``scale``. The numbers from all the blocks are converted in a single pass.
+
+    Args:
+      lines : list of str
+        Lines with the basis set of a single element
+      pattern : compiled regular expression
+        Pattern matching the block header
+
+    Returns:
+      blocks : list of tuples
+        ``(shells, nf, scale, table)`` for each block, where ``table`` is a
+        2D array with a row for each primitive
+    '''
+
+    headers = []
+    numeric = []
+    i = 0
+    while i < len(lines):
+        match = pattern.search(lines[i])
+        if match:
+            nf = int(match.group('nf'))
+            block = lines[i + 1: i + nf + 1]
+            ncols = len(block[0].split()) if block else 0
+            headers.append((match.group('shells'), len(block), ncols,
+                            match.groupdict().get('scale')))
+            numeric.extend(block)
+            i += len(block)
+        i += 1
+
+    values = parse_reals("\n".join(numeric))
+    if values.size != sum(nf * ncols for _, nf, ncols, _ in headers):
+        # fall back to parsing the blocks separately to report the failing one
+        start = 0
+        for _, nf, _, _ in headers:
+            parse_table(numeric[start:start + nf])
+            start += nf
+
+    blocks = []
+    start = 0
+    for shells, nf, ncols, scale in headers:
+        table = values[start:start + nf * ncols].reshape(nf, ncols)
+        blocks.append((shells, nf, scale, table))
+        start += nf * ncols
+    return blocks
+
+
+def merge_contractions(contractions):
+    '''
+    Merge the contracted functions defined on different sets of exponents
+    into a single shell.
+
+    The exponents of the shell are the union of all the exponents sorted in
+    the descending order, the same as repeatedly applying
+    :py:func:`merge_exponents`. A single set of exponents is kept as is.
+
+    Args:
+      contractions : list of tuples
+        ``(exps, indxs, cc)`` with the exponents, the indices of the
+        primitives in ``exps`` and the coefficients of each function
+
+    Returns:
+      fs : dict
+        Shell as a dict ``{'e' : np.array(), 'cf': [np.array(), ...]}``
+    '''
+
+    if len(contractions) == 1:
+        exps, indxs, cc = contractions[0]
+        return {'e': exps, 'cf': [contracted_function(indxs, cc)]}
+
+    allexps = np.concatenate([exps for exps, _, _ in contractions])
+    union = np.unique(allexps)
+    # position of every exponent in the descending union
+    position = union.size - 1 - np.searchsorted(union, allexps)
+
+    cfs = []
+    start = 0
+    for exps, indxs, cc in contractions:
+        cfs.append(contracted_function(position[start + indxs], cc))
+        start += exps.size
+    return {'e': union[::-1].copy(), 'cf': cfs}
+
+
+def ragged_contractions(firsts, sizes, starts, values):
+    '''
+    Build many contracted functions with consecutive exponent indices at
+    once.
+
+    Args:
+      firsts : list of int
+        Index of the first exponent of each contracted function
+      sizes : list of int
+        Number of primitives in each contracted function
+      starts : list of int
+        Offset of the coefficients of each function in ``values``
+      values : numpy.array
+        Array with the contraction coefficients
+
+    Returns:
+      cfs : list of numpy.array
+        Contracted functions with ``CFDTYPE``, views of a single array
+    '''
+
+    sizes = np.asarray(sizes, dtype=int)
+    bounds = np.cumsum(sizes)
+    # position of each primitive within its contracted function
+    within = np.arange(bounds[-1] if sizes.size else 0) - \
+        np.repeat(bounds - sizes, sizes)
+
+    cfs = np.empty(within.size, dtype=CFDTYPE)
+    cfs['idx'] = np.repeat(firsts, sizes) + within
+    cfs['cc'] = values[np.repeat(starts, sizes) + within]
+    return np.split(cfs, bounds[:-1]) if sizes.size else []
+
+
+def contracted_function(idx, cc):
+    '''
+    Return a contracted function as an array with the ``CFDTYPE`` dtype.
+
+    Args:
+      idx : array_like
+        Indices of the exponents
+      cc : array_like
+        Contraction coefficients
+    '''
+
+    cf = np.empty(len(cc), dtype=CFDTYPE)
+    cf['idx'] = idx
+    cf['cc'] = cc
+    return cf
+
+
+@lru_cache(maxsize=None)
+def element_symbols():
+    'Return a dict mapping lower case element names and symbols to symbols'
+
+    table = fetch_table('elements')
+    symbols = dict(zip(table['name'].str.lower(), table['symbol']))
+    symbols.update(zip(table['symbol'].str.lower(), table['symbol']))
+    return symbols
+
+
+def element_symbol(name):
+    'Return the symbol of the element given by name or symbol'
+
+    symbol = element_symbols().get(name.lower())
+    if symbol is None:
+        symbol = element(name.capitalize()).symbol
+    return symbol
 
 
 def merge_exponents(a, b):
@@ -359,3 +557,24 @@ class NumpyEncoder(json.JSONEncoder):
             return dict(data=obj.tolist(), dtype=dtype)
         # Let the base class default method raise the TypeError
         return json.JSONEncoder.default(self, obj)
+
+
+def json_numpy_obj_hook(dct):
+    '''
+    Decodes a previously encoded numpy ndarray with proper shape
+    and dtype.
+
+    Args:
+        dct: (dict) json encoded ndarray
+
+    Returns:
+        (ndarray) if input was an encoded ndarray
+    '''
+
+    if isinstance(dct, dict) and 'dtype' in dct:
+        if dct['dtype'] == 'CFDTYPE':
+            return np.array([tuple(r) for r in dct['data']],
+                            dtype=CFDTYPE)
+        else:
+            return np.array(dct['data'], dtype=dct['dtype'])
+    return dct
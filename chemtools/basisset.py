@@ -30,12 +30,12 @@ import pickle
 import re
 from collections import OrderedDict
 from copy import copy, deepcopy
+from functools import lru_cache
 from itertools import chain
 import numpy as np
-from scipy.linalg import sqrtm, inv
 from scipy.special import factorial, factorial2, binom
 from chemtools.basisparse import (parse_basis, merge_exponents, CFDTYPE, get_l,
-                                  NumpyEncoder)
+                                  NumpyEncoder, json_numpy_obj_hook)
 
 
 class BasisSet(object):
@@ -204,7 +204,7 @@ class BasisSet(object):
         return bs
 
     @classmethod
-    def from_file(cls, fname=None, fmt=None, name=None):
+    def from_file(cls, fname=None, fmt=None, name=None, element=None):
         '''Read and parse a basis set from file and return a BasisSet object
 
         Args:
@@ -215,20 +215,40 @@ class BasisSet(object):
             Format of the basis set in the file (*molpro*, *gamessus*)
 
           name : str
-            Name of the basis set
+            Name of the basis set, together with ``element`` it selects the
+            basis set from a file with many basis sets, e.g. ``cc-pVQZ``
+            from an EMSL dump
+
+          element : str
+            Symbol of the element, if given only the basis set of this
+            element is parsed, the file is indexed once and the index is
+            reused by the subsequent calls, see
+            :py:func:`chemtools.basislibrary.get_library`
 
         Returns:
           out : BasisSet or dict
             Basisset object parsed from file or dictionary of BasisSet objects
         '''
 
+        if element is not None:
+            from chemtools.basislibrary import get_library
+
+            library = get_library(fname, fmt, basiscls=cls)
+            names = library.names(element)
+            if name is None or name in names or len(names) != 1:
+                return library.get(element, name)
+            # a file without basis set names, ``name`` only labels the basis
+            bs = library.get(element)
+            bs.name = name
+            return bs
+
         if name is None:
-            name = os.path.splitext(fname)[0]
+            name = os.path.splitext(os.path.basename(fname))[0]
 
         with open(fname, 'r') as fobj:
             basstr = fobj.read()
 
-        return BasisSet.from_str(basstr, fmt=fmt, name=name)
+        return cls.from_str(basstr, fmt=fmt, name=name)
 
     @classmethod
     def from_str(cls, string, fmt=None, name=None):
@@ -276,26 +296,6 @@ class BasisSet(object):
                 A JSON serialized string with the basis set
         '''
 
-        def json_numpy_obj_hook(dct):
-            '''
-            Decodes a previously encoded numpy ndarray with proper shape
-            and dtype.
-
-            Args:
-                dct: (dict) json encoded ndarray
-
-            Returns:
-                (ndarray) if input was an encoded ndarray
-            '''
-
-            if isinstance(dct, dict) and 'dtype' in dct:
-                if dct['dtype'] == 'CFDTYPE':
-                    return np.array([tuple(r) for r in dct['data']],
-                                    dtype=CFDTYPE)
-                else:
-                    return np.array(dct['data'], dtype=dct['dtype'])
-            return dct
-
         loaded = json.loads(jsonstring, object_hook=json_numpy_obj_hook,
                             **kwargs)
 
@@ -336,15 +336,12 @@ class BasisSet(object):
         out = np.zeros((zetas.size, len(self.functions.keys())))
 
         for i, (shell, fs) in enumerate(self.functions.items()):
-            cc = self.contraction_matrix(shell)
-            # calculate the overlap matrix
-            S = self.shell_overlap(shell)
-            # calculate the inverse square root of S
-            X = inv(sqrtm(S))
+            # contraction coefficients of the orthonormalized functions
+            CX = orthonormal_contractions(get_l(shell), fs['e'],
+                                          self.contraction_matrix(shell))
             SO = primitive_overlap(get_l(shell), fs['e'], zetas)
-            J = np.dot(np.dot(cc, X).T, SO)
-            Y = np.sum(np.square(J), axis=0)
-            out[:, i] = Y
+            J = np.dot(CX.T, SO)
+            out[:, i] = np.sum(np.square(J), axis=0)
         return out
 
     def contraction_matrix(self, shell):
@@ -644,26 +641,19 @@ class BasisSet(object):
             ne.append(len(shellfs["e"]))
             cf.append(len(shellfs["cf"]))
 
-        res = "\n{e}:{s}\n{c}\n\n".format(e=self.element, s=self.name,
-                                          c=comment)
-        res += "{0:3d}\n".format(len(self.functions.keys()))
-        res += "".join(["{0:5d}".format(x) for x in am]) + "\n"
-        res += "".join(["{0:5d}".format(x) for x in cf]) + "\n"
-        res += "".join(["{0:5d}".format(x) for x in ne]) + "\n"
-        res += "\n"
+        res = ["\n{e}:{s}\n{c}\n\n".format(e=self.element, s=self.name,
+                                           c=comment),
+               "{0:3d}\n".format(len(self.functions.keys()))]
+        for counts in (am, cf, ne):
+            res.append(row_template(("5d",) * len(counts)).format(*counts))
+        res.append("\n")
 
         for shell, fs in self.functions.items():
-            for lst in splitlist(fs['e'], 5):
-                res += "".join(["{0:>{efmt}}".format(e, efmt=efmt)
-                                for e in lst]) + "\n"
-            res += "\n"
-            # create an array with all the contraction coefficients for a given shell
-            cc = self.contraction_matrix(shell)
-            for row in cc:
-                for splitrow in splitlist(row, 5):
-                    res += "{c}".format(c="".join(["{0:{cfmt}}".format(c, cfmt=cfmt) for c in splitrow])) + "\n"
-            res += "\n"
-        return res
+            res.append(format_wrapped(fs['e'], '>' + efmt, 5))
+            res.append("\n")
+            res.append(format_wrapped(self.contraction_matrix(shell), cfmt, 5))
+            res.append("\n")
+        return "".join(res)
 
     def to_dalton(self, fmt='prec'):
         '''
@@ -681,10 +671,6 @@ class BasisSet(object):
             basis set string in Dalton format
         '''
 
-        formats = {'prec': '20.10f', 'default': '10.4f'}
-
-        ffmt = formats.get(fmt, fmt)
-
         if fmt == 'prec':
             ffmt = '20.10f'
             nitems = 3
@@ -699,21 +685,19 @@ class BasisSet(object):
             nitems = (80 - cwidth) // cwidth
             fmtlabel = "{0:d}F{1}.{2}".format(nitems, ffmt.split('.')[0], re.sub('[A-Za-z]+', '', ffmt.split('.')[1]))
 
-        res = "! {s}\n".format(s=self.name)
+        indent = ' ' * int(ffmt.split('.')[0])
+        res = ["! {s}\n".format(s=self.name)]
         for shell, fs in self.functions.items():
-            res += "! {s} functions\n".format(s=shell)
-            res += "{f:1s}{p:>4d}{c:>4d}\n".format(f=fmtlabel, p=len(fs['e']),
-                                                   c=len(fs['cf']))
-            # create an array with all the contraction coefficients for a given shell
+            res.append("! {s} functions\n".format(s=shell))
+            res.append("{f:1s}{p:>4d}{c:>4d}\n".format(f=fmtlabel,
+                                                       p=len(fs['e']),
+                                                       c=len(fs['cf'])))
+            # exponents in the first column followed by the coefficients
             cc = self.contraction_matrix(shell)
-            for expt, row in zip(fs['e'], cc):
-                it = splitlist(row, nitems)
-                res += "{e:>{efmt}}{c}".format(e=expt, efmt=ffmt, c="".join(["{0:{cfmt}}".format(c, cfmt=ffmt) for c in next(it)])) + "\n"
-
-                for row in it:
-                    res += ' ' * int(ffmt.split('.')[0]) + \
-                        "".join(["{0:{cfmt}}".format(c, cfmt=ffmt) for c in row]) + "\n"
-        return res
+            fmts = ('>' + ffmt,) + (ffmt,) * cc.shape[1]
+            res.append(format_wrapped(np.column_stack((fs['e'], cc)), fmts,
+                                      nitems, first=nitems + 1, cont=indent))
+        return "".join(res)
 
     def to_gamessus(self, efmt="20.10f", cfmt="15.8f"):
         '''
@@ -732,18 +716,16 @@ class BasisSet(object):
             basis set string in Gamess(US) format
         '''
 
-        res = ''
+        res = []
         for shell, fs in self.functions.items():
-            for contraction in fs["cf"]:
-                res += "{s:<1s}{n:>3d}\n".format(s=shell.upper(),
-                                                 n=len(contraction))
-                for i, (idx, coeff) in enumerate(contraction, start=1):
-                    res += "{i:3d}{e:>{efmt}}{c:>{cfmt}}".format(i=i,
-                                                                 e=fs['e'][idx],
-                                                                 efmt=efmt,
-                                                                 c=coeff,
-                                                                 cfmt=cfmt) + "\n"
-        return res + "\n"
+            sizes, idx, cc = stack_contractions(fs)
+            headers = ["{s:<1s}{n:>3d}\n".format(s=shell.upper(), n=n)
+                       for n in sizes]
+            starts = np.cumsum(sizes, dtype=int) - sizes
+            counts = np.arange(1, idx.size + 1) - np.repeat(starts, sizes)
+            res.append(format_blocks(headers, sizes, (counts, fs['e'][idx], cc),
+                                     ('3d', '>' + efmt, '>' + cfmt)))
+        return "".join(res) + "\n"
 
     def to_gaussian(self, efmt="20.10f", cfmt="15.8f"):
         '''
@@ -762,17 +744,15 @@ class BasisSet(object):
             basis set string in Gaussian format
         '''
 
-        res = "****\n{e:<7s}0\n".format(e=self.element)
+        res = ["****\n{e:<7s}0\n".format(e=self.element)]
         for shell, fs in self.functions.items():
-            for contraction in fs["cf"]:
-                res += "{s:<1s}{n:>4d}{i:>7.2f}\n".format(s=shell.upper(),
-                                                          n=len(contraction),
-                                                          i=1.0)
-                for idx, coeff in contraction:
-                    res += "{e:>{efmt}}{c:>{cfmt}}".format(e=fs['e'][idx],
-                                                           efmt=efmt, c=coeff,
-                                                           cfmt=cfmt) + "\n"
-        return res + "****\n"
+            sizes, idx, cc = stack_contractions(fs)
+            headers = ["{s:<1s}{n:>4d}{i:>7.2f}\n".format(s=shell.upper(), n=n,
+                                                         i=1.0)
+                       for n in sizes]
+            res.append(format_blocks(headers, sizes, (fs['e'][idx], cc),
+                                     ('>' + efmt, '>' + cfmt)))
+        return "".join(res) + "****\n"
 
     def to_json(self, fname=None, **kwargs):
         '''
@@ -806,44 +786,30 @@ class BasisSet(object):
                for sh, fs in self.functions.items()]
         idx = np.argmax(ncf)
         nccols = ncf[idx]
+        eol = ' \\\\ \n'
 
-        out = '\\begin{{tabular}}{{{}}}\n'.format('r' * (nccols + 2))
-        out += 'No. & \multicolumn{1}{c}{Exponent} & ' +\
-               '\multicolumn{{{0:d}}}{{c}}{{Coefficients }} \\\ \n'.format(nccols)
+        out = ['\\begin{{tabular}}{{{}}}\n'.format('r' * (nccols + 2)),
+               'No. & \\multicolumn{1}{c}{Exponent} & ' +
+               '\\multicolumn{{{0:d}}}{{c}}{{Coefficients }}'.format(nccols) +
+               eol]
 
         for shell, fs in self.functions.items():
-            out += '\hline \n'
-            out += '\multicolumn{{{0:d}}}{{c}}{{ {1:s} shell }} \\\ \hline \n'.format(nccols + 2, shell)
+            out.append('\\hline \n')
+            out.append('\\multicolumn{{{0:d}}}{{c}}{{ {1:s} shell }}'.format(
+                nccols + 2, shell) + ' \\\\ \\hline \n')
 
             cc = self.contraction_matrix(shell)
-            count = 0
-            # select columns with more than 1 non zero coefficients
-            nonzerocolmask = np.array([np.count_nonzero(col) > 1
-                                       for col in cc.T])
-            nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                       for row in cc[:, nonzerocolmask]])
-            if np.any(nonzerocolmask):
-                for expt, cfc in zip(fs['e'][nonzerorowmask],
-                                     cc[np.ix_(nonzerorowmask,
-                                               nonzerocolmask)]):
-                    count += 1
-                    coeffrow = " & ".join(["{0:{cfmt}}".format(c, cfmt=cfmt)
-                                           for c in cfc])
-                    out += "{i:5d} & {e:>{efmt}} & {c}".format(i=count, e=expt,
-                                                               efmt=efmt,
-                                                               c=coeffrow) + " \\\ \n"
-
-            if np.any(np.logical_not(nonzerocolmask)):
-                for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
-                    count += 1
-                    nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                               for row in cc[:, colidx]])
-                    e = fs['e'][nonzerorowmask][0]
-                    c = cc[nonzerorowmask, :][0][colidx]
-                    out += "{i:5d} & {e:>{efmt}} & \\\ \n".format(i=count, e=e,
-                                                                  efmt=efmt)
-        out += '\end{tabular}'
-        return out
+            (exps, block), (single, _) = partition_contractions(fs['e'], cc)
+            counts = np.arange(1, exps.size + single.size + 1)
+            out.append(format_rows(
+                [counts[:exps.size], exps] + list(block.T),
+                ('5d', '>' + efmt) + (cfmt,) * block.shape[1],
+                sep=' & ', end=eol))
+            out.append(format_rows((counts[exps.size:], single),
+                                   ('5d', '>' + efmt), sep=' & ',
+                                   end=' &' + eol))
+        out.append('\\end{tabular}')
+        return ''.join(out)
 
     def to_molpro(self, withpars=False, efmt="20.10f", cfmt="15.8f"):
         '''
@@ -864,31 +830,32 @@ class BasisSet(object):
                 basis set string
         '''
 
-        # reorder indices of cf if necessary without modiyfing the instance
-        funs = deepcopy(self.functions)
-        for shell, fs in funs.items():
+        res = []
+        for shell, fs in self.functions.items():
+            # reorder indices of cf if necessary without modiyfing the instance
             if not has_consecutive_indices(fs):
-                funs[shell] = reorder_shell_to_consecutive(fs)
-
-        res = ""
-        for shell, fs in funs.items():
-            exps = ", ".join(["{0:>{efmt}}".format(e, efmt=efmt).lstrip()
-                              for e in fs['e']]) + '\n'
-            res += "{s:>s}, {e:>s}, ".format(s=shell, e=self.element) + exps
-
-            for icol, cf in enumerate(fs['cf']):
-                if cf.size == 1:
-                    coeffs = ", ".join(["{0:>{cfmt}}".format(cc,
-                        cfmt=cfmt).lstrip() for cc in cf['cc']])
-                    res += "c, {0:d}.{0:d}, ".format(cf['idx'][0] + 1) + \
-                        coeffs + '\n'
-                else:
-                    # indices should be consecutive
-                    coeffs = ", ".join(["{0:>{cfmt}}".format(cc,
-                        cfmt=cfmt).lstrip() for cc in cf['cc']])
-                    res += "c, {0:d}.{1:d}, ".format(cf['idx'].min() + 1,
-                                                     cf['idx'].max() + 1) +\
-                        coeffs + '\n'
+                fs = reorder_shell_to_consecutive(fs)
+
+            sizes, idx, cc = stack_contractions(fs)
+            headers = []
+            if idx.size > 0:
+                # first and last exponent of each contracted function
+                starts = np.cumsum(sizes) - sizes
+                bounds = zip(np.minimum.reduceat(idx, starts).tolist(),
+                             np.maximum.reduceat(idx, starts).tolist())
+                headers = ["c, {0:d}.{1:d}, ".format(first + 1, last + 1)
+                           for first, last in bounds]
+
+            line = row_template(('>' + efmt,) * fs['e'].size, sep=', ',
+                                lead="{s:>s}, {e:>s}, ".format(s=shell,
+                                                               e=self.element))
+            res.append(line.format(*fs['e'].tolist()))
+            template = "".join(escape_format(header) +
+                               row_template(('>' + cfmt,) * size, sep=', ')
+                               for header, size in zip(headers, sizes))
+            res.append(template.format(*cc.tolist()))
+        # numbers are written without the leading blanks
+        res = re.sub(', +', ', ', "".join(res))
         if withpars:
             res = 'basis={\n' + res + '}'
         return res
@@ -910,32 +877,21 @@ class BasisSet(object):
             basis set string in NwChem format
         '''
 
-        res = 'BASIS "ao basis" PRINT\n'
+        res = ['BASIS "ao basis" PRINT\n']
         for shell, fs in self.functions.items():
-            # create an array of contraction coefficients for a given shell
+            header = "{e} {s}\n".format(e=self.element, s=shell)
             cc = self.contraction_matrix(shell)
-
-            # select columns with more than 1 non zero coefficients
-            nonzerocolmask = np.array([np.count_nonzero(col) > 1
-                                       for col in cc.T])
-            nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                       for row in cc[:, nonzerocolmask]])
-            if np.any(nonzerocolmask):
-                res += "{e} {s}\n".format(e=self.element, s=shell)
-                for expt, cfc in zip(fs['e'][nonzerorowmask],
-                                     cc[np.ix_(nonzerorowmask, nonzerocolmask)]):
-                    res += "{e:>{efmt}}{c}".format(e=expt, efmt=efmt, c="".join(["{0:{cfmt}}".format(c, cfmt=cfmt) for c in cfc])) + "\n"
-
-            if np.any(np.logical_not(nonzerocolmask)):
-                for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
-                    res += "{e} {s}\n".format(e=self.element, s=shell)
-                    nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                               for row in cc[:, colidx]])
-                    e = fs['e'][nonzerorowmask][0]
-                    c = cc[nonzerorowmask, :][0][colidx]
-                    res += "{e:>{efmt}}{c:>{cfmt}}".format(e=e, efmt=efmt, c=c,
-                                                           cfmt=cfmt) + "\n"
-        return res + "END\n"
+            (exps, block), (single, coeffs) = partition_contractions(fs['e'],
+                                                                     cc)
+            if block.size > 0:
+                res.append(format_blocks(
+                    (header,), (exps.size,), [exps] + list(block.T),
+                    ('>' + efmt,) + (cfmt,) * block.shape[1]))
+
+            res.append(format_blocks((header,) * single.size,
+                                     (1,) * single.size, (single, coeffs),
+                                     ('>' + efmt, '>' + cfmt)))
+        return "".join(res) + "END\n"
 
     def to_pickle(self, fname=None):
         '''Save the basis set in pickle format under the filename `fname`
@@ -968,43 +924,26 @@ class BasisSet(object):
             basis set string
         '''
 
-        res = ''
+        res = []
         for shell, fs in self.functions.items():
-            # create an array with all the contraction coefficients
-            # for a given shell
-            res += "\n" + "{s} shell".format(s=shell).center(40, '=') + "\n"
+            res.append("\n" + "{s} shell".format(s=shell).center(40, '=') +
+                       "\n")
             cc = self.contraction_matrix(shell)
-            count = 0
-            # select columns with more than 1 non zero coefficients
-            nonzerocolmask = np.array([np.count_nonzero(col) > 1
-                                       for col in cc.T])
-            nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                       for row in cc[:, nonzerocolmask]])
-            if np.any(nonzerocolmask):
-                res += 'Contracted:\n'
-                for expt, cfc in zip(fs['e'][nonzerorowmask],
-                                     cc[np.ix_(nonzerorowmask,
-                                               nonzerocolmask)]):
-                    count += 1
-                    coeffrow = "".join(["{0:{cfmt}}".format(c, cfmt=cfmt)
-                                        for c in cfc])
-                    res += "{i:5d}{e:>{efmt}}{c}".format(i=count, e=expt,
-                                                         efmt=efmt,
-                                                         c=coeffrow) + "\n"
-
-            if np.any(np.logical_not(nonzerocolmask)):
-                res += 'Uncontracted:\n'
-                for colidx in np.where(np.logical_not(nonzerocolmask))[0]:
-                    count += 1
-                    nonzerorowmask = np.array([np.count_nonzero(row) > 0
-                                               for row in cc[:, colidx]])
-                    e = fs['e'][nonzerorowmask][0]
-                    c = cc[nonzerorowmask, :][0][colidx]
-                    res += "{i:5d}{e:>{efmt}}{c:>{cfmt}}".format(i=count, e=e,
-                                                                 efmt=efmt,
-                                                                 c=c,
-                                                                 cfmt=cfmt) + "\n"
-        return res
+            (exps, block), (single, coeffs) = partition_contractions(fs['e'],
+                                                                     cc)
+            counts = np.arange(1, exps.size + single.size + 1)
+            if block.size > 0:
+                res.append(format_blocks(
+                    ('Contracted:\n',), (exps.size,),
+                    [counts[:exps.size], exps] + list(block.T),
+                    ('5d', '>' + efmt) + (cfmt,) * block.shape[1]))
+
+            if single.size > 0:
+                res.append(format_blocks(
+                    ('Uncontracted:\n',), (single.size,),
+                    (counts[exps.size:], single, coeffs),
+                    ('5d', '>' + efmt, '>' + cfmt)))
+        return "".join(res)
 
     def __repr__(self):
         keys = ['name', 'element', 'family', 'kind']
@@ -1038,14 +977,16 @@ def has_consecutive_indices(shell):
             ``{'e' : np.array(), 'cf': [np.array(), np.array(), ...]}``
     '''
 
-    for i, cf in enumerate(shell['cf']):
-        if len(cf) > 1:
-            if not np.all(np.sort(cf['idx'])[1:] -
-                          np.sort(cf['idx'])[:-1] == 1):
-                return False
-    else:
+    sizes, idx, _ = stack_contractions(shell)
+    if len(idx) < 2:
         return True
 
+    # sort the indices within each contracted function
+    cfnum = np.repeat(np.arange(len(sizes)), sizes)
+    order = np.lexsort((idx, cfnum))
+    same = np.diff(cfnum[order]) == 0
+    return bool(np.all(np.diff(idx[order])[same] == 1))
+
 
 def reorder_shell_to_consecutive(shell):
     '''
@@ -1083,7 +1024,7 @@ def reorder_shell_to_consecutive(shell):
 
     # check if all the contracted functions have consecutive indices
     if not has_consecutive_indices(funs):
-        raise ValueError('cannot reorder functions, check #cf: {}'.format(i))
+        raise ValueError('cannot reorder functions, check #cf: {}'.format(cfidx))
 
     return funs
 
@@ -1120,6 +1061,130 @@ def merge(first, other):
     return BasisSet(name=first.name, element=first.element, functions=newf)
 
 
+# cache of the orthonormalized contraction matrices of the shells keyed on
+# (l, exponents, contraction coefficients)
+INVSQRT_CACHE = OrderedDict()
+INVSQRT_CACHE_SIZE = 1024
+
+
+def inverse_sqrt(S):
+    '''
+    Calculate the inverse square root of a symmetric positive definite
+    matrix from its eigendecomposition
+
+    Args:
+      S (N, N) : numpy.array
+        Symmetric positive definite matrix
+
+    Returns:
+      out (N, N) : numpy.array
+        :math:`S^{-1/2}`
+    '''
+
+    w, V = np.linalg.eigh(S)
+    return np.dot(V / np.sqrt(w), V.T)
+
+
+def orthonormal_contractions(l, exps, cc):
+    '''
+    Return the contraction coefficients of the symmetrically orthonormalized
+    contracted functions of a shell, :math:`C S^{-1/2}` where :math:`S` is the
+    overlap matrix of the contracted functions.
+
+    The results are cached, so the subsequent calls for the same shell only
+    look up the matrix.
+
+    Args:
+      l : int
+        Angular momentum quantum number of the shell
+      exps (M,) : numpy.array
+        Exponents
+      cc (M, N) : numpy.array
+        Contraction coefficients
+
+    Returns:
+      out (M, N) : numpy.array
+        Orthonormalized contraction coefficients
+    '''
+
+    exps = np.ascontiguousarray(exps, dtype=np.float64)
+    cc = np.ascontiguousarray(cc, dtype=np.float64)
+    key = (l, exps.tobytes(), cc.shape, cc.tobytes())
+
+    if key in INVSQRT_CACHE:
+        INVSQRT_CACHE.move_to_end(key)
+        return INVSQRT_CACHE[key]
+
+    S = np.dot(cc.T, np.dot(primitive_overlap(l, exps, exps), cc))
+    out = np.dot(cc, inverse_sqrt(S))
+    out.flags.writeable = False
+
+    INVSQRT_CACHE[key] = out
+    while len(INVSQRT_CACHE) > INVSQRT_CACHE_SIZE:
+        INVSQRT_CACHE.popitem(last=False)
+    return out
+
+
+def completeness_profiles(bases, zetas, shells=None):
+    '''
+    Calculate the completeness profiles of many basis sets at once
+
+    For every shell the orthonormalized contraction coefficients of all the
+    basis sets (see :py:func:`orthonormal_contractions`) are padded with
+    zeros to a common size and the profiles are obtained from a single
+    stacked matrix product.
+
+    Args:
+      bases : list
+        List of :py:class:`BasisSet` objects
+      zetas (K,) : numpy.array
+        Scanning exponents
+      shells : list
+        Shells for which the profiles are calculated, by default all the
+        shells present in any of the ``bases`` in the order of increasing
+        angular momentum
+
+    Returns:
+      out (len(bases), len(shells), K) : numpy.array
+        Completeness profiles, zero for the shells absent from a basis set
+    '''
+
+    zetas = np.asarray(zetas, dtype=np.float64)
+    if shells is None:
+        shells = sorted(set(chain.from_iterable(bs.functions.keys()
+                                                for bs in bases)), key=get_l)
+
+    out = np.zeros((len(bases), len(shells), zetas.size), dtype=np.float64)
+
+    for ishell, shell in enumerate(shells):
+        l = get_l(shell)
+        members = [(ibs, bs.functions[shell]['e'],
+                    orthonormal_contractions(l, bs.functions[shell]['e'],
+                                             bs.contraction_matrix(shell)))
+                   for ibs, bs in enumerate(bases) if shell in bs.functions]
+        if not members:
+            continue
+
+        nexp = max(CX.shape[0] for _, _, CX in members)
+        ncon = max(CX.shape[1] for _, _, CX in members)
+
+        # the padded exponents have zero coefficients so they do not
+        # contribute to the profiles
+        exps = np.ones((len(members), nexp), dtype=np.float64)
+        CX = np.zeros((len(members), nexp, ncon), dtype=np.float64)
+        for i, (_, es, cx) in enumerate(members):
+            exps[i, :es.size] = es
+            CX[i, :cx.shape[0], :cx.shape[1]] = cx
+
+        ez = exps[:, :, np.newaxis] * zetas
+        SO = np.power(2.0 * np.sqrt(ez) / (exps[:, :, np.newaxis] + zetas),
+                      l + 1.5)
+        J = np.matmul(CX.transpose(0, 2, 1), SO)
+        out[[ibs for ibs, _, _ in members], ishell] = np.sum(np.square(J), axis=1)
+
+    return out
+
+
 def primitive_overlap(l, a, b):
     '''
     Calculate the overlap integrals for a given shell `l` and two sets of
@@ -1357,6 +1422,205 @@ def legendre(numexp, coeffs):
     return np.exp(zetas[::-1])
 
 
+def escape_format(text):
+    '''
+    Escape the braces in ``text`` so that it can be used as a literal part
+    of a ``str.format`` template
+    '''
+
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+@lru_cache(maxsize=1024)
+def row_template(fmts, sep='', lead='', end='\n'):
+    '''
+    Return a ``str.format`` template for a single line of numbers
+
+    Args:
+        fmts : tuple of str
+            Format specifications, one for each number in the line
+        sep : str
+            Separator placed between the numbers
+        lead : str
+            Literal text at the beginning of the line
+        end : str
+            Literal text at the end of the line
+
+    Returns:
+        template : str
+    '''
+
+    fields = escape_format(sep).join('{:' + fmt + '}' for fmt in fmts)
+    return escape_format(lead) + fields + escape_format(end)
+
+
+@lru_cache(maxsize=1024)
+def wrapped_template(fmts, width, first=None, lead='', cont=''):
+    '''
+    Return a ``str.format`` template for a row of numbers wrapped over
+    several lines, equivalent to formatting the chunks of ``splitlist``
+
+    Args:
+        fmts : tuple of str
+            Format specifications, one for each number in the row
+        width : int
+            Maximal number of items in the continuation lines
+        first : int
+            Maximal number of items in the first line, defaults to ``width``
+        lead : str
+            Literal text at the beginning of the first line
+        cont : str
+            Literal text at the beginning of the continuation lines
+
+    Returns:
+        template : str
+    '''
+
+    if first is None:
+        first = width
+
+    lines = [row_template(fmts[:first], lead=lead)]
+    for start in range(first, len(fmts), width):
+        lines.append(row_template(fmts[start:start + width], lead=cont))
+    return ''.join(lines)
+
+
+def format_blocks(headers, sizes, columns, fmts, sep='', lead='', end='\n'):
+    '''
+    Format consecutive blocks of rows of numbers, each block preceded by a
+    literal header line, with a single ``str.format`` call
+
+    Args:
+        headers : sequence of str
+            Literal text preceding each block
+        sizes : sequence of int
+            Number of rows in each block
+        columns : sequence of 1D arrays
+            Columns of numbers, all with ``sum(sizes)`` elements
+        fmts : sequence of str
+            Format specifications, one per column
+        sep, lead, end : str
+            Literal text between the numbers, at the beginning and at the end
+            of each row, see :py:func:`row_template`
+
+    Returns:
+        res : str
+    '''
+
+    row = row_template(tuple(fmts), sep, lead, end)
+    template = ''.join(escape_format(header) + row * size
+                       for header, size in zip(headers, sizes))
+    values = [np.asarray(col).tolist() for col in columns]
+    return template.format(*chain.from_iterable(zip(*values)))
+
+
+def format_rows(columns, fmts, sep='', lead='', end='\n'):
+    '''
+    Format columns of numbers side by side, one line per row, with a single
+    ``str.format`` call
+
+    Args:
+        columns : sequence of 1D arrays
+            Columns of numbers of equal length
+        fmts : sequence of str
+            Format specifications, one per column
+        sep, lead, end : str
+            Literal text between the numbers, at the beginning and at the end
+            of each row, see :py:func:`row_template`
+
+    Returns:
+        res : str
+    '''
+
+    if len(columns) == 0:
+        return ''
+    return format_blocks(('',), (len(columns[0]),), columns, fmts, sep=sep,
+                         lead=lead, end=end)
+
+
+def format_wrapped(rows, fmts, width, first=None, cont=''):
+    '''
+    Format a 2D array with each row wrapped over several lines, see
+    :py:func:`wrapped_template`
+
+    Args:
+        rows : 2D array
+            Numbers to format
+        fmts : str or sequence of str
+            Format specification, common to all numbers or one per column
+        width : int
+            Maximal number of items in the continuation lines
+        first : int
+            Maximal number of items in the first line of each row
+        cont : str
+            Literal text at the beginning of the continuation lines
+
+    Returns:
+        res : str
+    '''
+
+    rows = np.atleast_2d(rows)
+    if isinstance(fmts, str):
+        fmts = (fmts,) * rows.shape[1]
+    template = wrapped_template(tuple(fmts), width, first=first, cont=cont)
+    return (template * rows.shape[0]).format(*rows.ravel().tolist())
+
+
+def stack_contractions(shell):
+    '''
+    Concatenate the contracted functions of a shell
+
+    Args:
+        shell : dict
+            Basis functions for a given shell as a dict with structure
+            ``{'e' : np.array(), 'cf': [np.array(), np.array(), ...]}``
+
+    Returns:
+        sizes : list of int
+            Number of primitives in each contracted function
+        idx : numpy.array
+            Exponent indices of all the contracted functions
+        cc : numpy.array
+            Contraction coefficients of all the contracted functions
+    '''
+
+    sizes = [len(cf) for cf in shell['cf']]
+    if sum(sizes) == 0:
+        return sizes, np.zeros(0, dtype=int), np.zeros(0)
+    idx = np.concatenate([cf['idx'] for cf in shell['cf']])
+    cc = np.concatenate([cf['cc'] for cf in shell['cf']])
+    return sizes, idx, cc
+
+
+def partition_contractions(exps, cc):
+    '''
+    Split the functions of a shell into the general contractions and the
+    functions with a single non zero coefficient
+
+    Args:
+        exps : numpy.array
+            Exponents of the shell
+        cc : 2D numpy.array
+            Contraction matrix of the shell
+
+    Returns:
+        contracted : tuple
+            Exponents and the block of the contraction matrix of the
+            functions with more than one nonzero coefficient
+        single : tuple
+            Exponents and coefficients of the remaining functions
+    '''
+
+    nonzero = cc != 0.0
+    colmask = np.count_nonzero(nonzero, axis=0) > 1
+    rowmask = np.any(nonzero[:, colmask], axis=1)
+    cols = np.where(~colmask)[0]
+    first = np.argmax(nonzero[:, cols], axis=0)
+
+    return ((exps[rowmask], cc[np.ix_(rowmask, colmask)]),
+            (exps[first], cc[first, cols]))
+
+
 def splitlist(l, n):
     '''
     Split a list into sublists of size `n`
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+
+#The MIT License (MIT)
+#
+#Copyright (c) 2014 Lukasz Mentel
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+'''
+Binary storage of many basis sets in a single file.
+
+The basis sets are stored column-wise, the exponents, indices and
+contraction coefficients of all the shells of all the basis sets are
+concatenated into a few flat arrays, see :py:class:`chemtools.compactbasis.Shell`
+for the layout of a single shell. The file consists of
+
+- the ``BINARY_MAGIC`` signature,
+- the length of the header as a little endian ``uint64``,
+- the JSON header with the names, elements, families, kinds and info of the
+  basis sets and the dtypes, shapes and offsets of the arrays,
+- the raw arrays aligned to ``BINARY_ALIGN`` bytes.
+
+The arrays are read without parsing and by default memory-mapped so only the
+basis sets that are accessed are read from the disk.
+'''
+
+from __future__ import division, print_function
+
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+from chemtools.basisparse import CFDTYPE, NumpyEncoder, json_numpy_obj_hook
+from chemtools.basisset import BasisSet
+from chemtools.compactbasis import CompactBasisSet, Shell, uncontracted_arrays
+
+BINARY_MAGIC = b'\x89CTBS\r\n\x1a'
+BINARY_VERSION = 1
+BINARY_ALIGN = 64
+
+# metadata of the basis sets stored in the header
+COLUMNS = ('name', 'element', 'family', 'kind', 'info')
+
+
+def to_list(bases):
+    '''
+    Return the basis sets as a list, ``bases`` can be a single basis set, a
+    dict with basis sets as values or an iterable of basis sets
+    '''
+
+    if isinstance(bases, BasisSet):
+        return [bases]
+    elif isinstance(bases, dict):
+        return list(bases.values())
+    return list(bases)
+
+
+def pack_bases(bases):
+    '''
+    Concatenate the shells of the basis sets into flat arrays
+
+    Args:
+        bases : list of BasisSet
+
+    Returns:
+        arrays : OrderedDict
+            Arrays with the offsets of the shells of every basis set
+            ``basis_ptr``, labels of the shells ``shells``, offsets of the
+            exponents ``exp_ptr`` and contracted functions ``cf_ptr`` of
+            every shell, offsets of the coefficients of every contracted
+            function ``coef_ptr``, flags of the uncontracted shells
+            ``uncontracted`` and the ``exponents``, ``indices`` and
+            ``coeffs``
+    '''
+
+    labels = []
+    shells = []
+    nshells = []
+    for bs in bases:
+        functions = bs.functions if bs.functions is not None else {}
+        nshells.append(len(functions))
+        for label, fs in functions.items():
+            labels.append(label)
+            shells.append(Shell.from_dict(fs))
+
+    def offsets(sizes):
+        ptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=ptr[1:])
+        return ptr
+
+    def concatenate(arrays, dtype):
+        if arrays:
+            return np.concatenate(arrays).astype(dtype, copy=False)
+        return np.zeros(0, dtype=dtype)
+
+    cf_ptr = offsets([shell.ncf for shell in shells])
+    coef_ptr = offsets(concatenate([np.diff(shell.indptr) for shell in shells],
+                                   np.int64))
+    return OrderedDict([
+        ('basis_ptr', offsets(nshells)),
+        ('shells', np.array(labels, dtype=str) if labels else
+         np.zeros(0, dtype='U1')),
+        ('exp_ptr', offsets([shell.e.size for shell in shells])),
+        ('cf_ptr', cf_ptr),
+        ('coef_ptr', coef_ptr),
+        ('uncontracted', np.array([shell.indptr is uncontracted_arrays(shell.e.size)[0]
+                                   for shell in shells], dtype=bool)),
+        ('exponents', concatenate([shell.e for shell in shells], np.float64)),
+        ('indices', concatenate([shell.indices for shell in shells], np.int32)),
+        ('coeffs', concatenate([shell.coeffs for shell in shells], np.float64)),
+    ])
+
+
+def write_binary(bases, fname):
+    '''
+    Write the basis sets to a binary file
+
+    Args:
+        bases : BasisSet, dict or list of BasisSet
+            Basis sets to save, a dict like the one returned by
+            :py:meth:`BasisSet.from_file` is also accepted
+        fname : str
+            Name of the file
+
+    Raises:
+        ValueError if there are two basis sets with the same name for the
+        same element
+    '''
+
+    bases = to_list(bases)
+    keys = [(bs.element, bs.name) for bs in bases]
+    if len(set(keys)) != len(keys):
+        dups = sorted(set(k for k in keys if keys.count(k) > 1), key=str)
+        raise ValueError('duplicate basis sets: {}'.format(
+            ', '.join('{} {}'.format(el, name) for el, name in dups)))
+
+    arrays = pack_bases(bases)
+
+    # offsets relative to the start of the data section
+    layout = OrderedDict()
+    offset = 0
+    for key, array in arrays.items():
+        layout[key] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // BINARY_ALIGN) * BINARY_ALIGN
+
+    header = {'version': BINARY_VERSION,
+              'arrays': layout,
+              'columns': {col: [getattr(bs, col, None) for bs in bases]
+                          for col in COLUMNS}}
+    header = json.dumps(header, cls=NumpyEncoder).encode('utf-8')
+    start = len(BINARY_MAGIC) + 8 + len(header)
+    header += b' ' * (-start % BINARY_ALIGN)
+
+    with open(fname, 'wb') as fobj:
+        fobj.write(BINARY_MAGIC)
+        fobj.write(struct.pack('<Q', len(header)))
+        fobj.write(header)
+        for key, array in arrays.items():
+            data = np.ascontiguousarray(array).tobytes()
+            fobj.write(data)
+            fobj.write(b'\0' * (-len(data) % BINARY_ALIGN))
+
+
+class BasisStore(object):
+    '''
+    Basis sets stored in a binary file written by :py:func:`write_binary`
+
+    Args:
+        fname : str
+            Name of the file
+        mmap : bool
+            Memory-map the file instead of reading it at once
+        basiscls : class
+            Class of the returned basis sets, ``BasisSet`` or
+            ``CompactBasisSet``, the latter shares the read-only contraction
+            coefficients with the store without copying them
+
+    >>> write_binary(BasisSet.from_file('emsl_dump.gbs', fmt='gaussian'), 'dump.bsb')
+    >>> store = BasisStore('dump.bsb')
+    >>> store.get('Ne')
+    '''
+
+    def __init__(self, fname, mmap=True, basiscls=BasisSet):
+
+        if not os.path.exists(fname):
+            raise ValueError("File: {} does not exist".format(fname))
+
+        self.fname = fname
+        self.basiscls = basiscls
+        self.header, self.arrays = read_binary(fname, use_mmap=mmap)
+        self.columns = self.header['columns']
+        self._keys = OrderedDict(
+            ((el, name), i) for i, (el, name) in
+            enumerate(zip(self.columns['element'], self.columns['name'])))
+
+    def keys(self):
+        'Return the list of ``(element, basis name)`` tuples in the store'
+        return list(self._keys.keys())
+
+    def elements(self):
+        'Return the list of elements in the store'
+        return list(OrderedDict.fromkeys(el for el, _ in self.keys()))
+
+    def names(self, element=None):
+        '''
+        Return the list of basis set names in the store, optionally only
+        the ones available for ``element``
+        '''
+
+        return list(OrderedDict.fromkeys(
+            name for el, name in self.keys()
+            if element is None or el == element))
+
+    def __contains__(self, key):
+        try:
+            self.getkey(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.load(key)
+        return self.get(*self.getkey(key))
+
+    def getkey(self, key):
+        '''
+        Return the ``(element, basis name)`` tuple for ``key`` given as
+        element symbol or a tuple, the name can be omitted if the element has
+        only one basis set in the store
+
+        Raises:
+            KeyError if the basis set is not present in the store
+        '''
+
+        if isinstance(key, tuple):
+            element, name = key
+        else:
+            element, name = key, None
+
+        if name is None:
+            names = self.names(element)
+            if len(names) != 1:
+                raise KeyError('{} basis sets for "{}" in the store, specify '
+                               'the name: {}'.format(len(names), element,
+                                                     ', '.join(map(str, names))))
+            name = names[0]
+
+        if (element, name) not in self._keys:
+            raise KeyError('basis set "{}" for "{}" not found in {}'.format(
+                name, element, self.fname))
+        return element, name
+
+    def get(self, element, name=None):
+        '''
+        Return the basis set for the ``element``
+
+        Args:
+            element : str
+                Symbol of the element
+            name : str
+                Name of the basis set, can be omitted if there is only one
+                basis set for the element
+        '''
+
+        return self.load(self._keys[self.getkey((element, name))])
+
+    def load(self, i):
+        'Return the ``i``-th basis set from the store'
+
+        arrays = self.arrays
+        first, last = arrays['basis_ptr'][i:i + 2]
+        labels = arrays['shells'][first:last].tolist()
+        exp_ptr = arrays['exp_ptr'][first:last + 1].tolist()
+        cf_ptr = arrays['cf_ptr'][first:last + 1]
+        coef_ptr = arrays['coef_ptr'][cf_ptr[0]:cf_ptr[-1] + 1]
+        start, end = coef_ptr[0], coef_ptr[-1]
+        indices = arrays['indices'][start:end]
+        coeffs = arrays['coeffs'][start:end]
+        # offsets relative to the first shell of the basis set
+        cf_ptr = (cf_ptr - cf_ptr[0]).tolist()
+        coef_ptr = coef_ptr - start
+
+        functions = OrderedDict()
+        if issubclass(self.basiscls, CompactBasisSet):
+            uncontracted = arrays['uncontracted'][first:last].tolist()
+            for j, label in enumerate(labels):
+                exps = arrays['exponents'][exp_ptr[j]:exp_ptr[j + 1]]
+                if uncontracted[j]:
+                    functions[label] = Shell(exps)
+                else:
+                    ptr = coef_ptr[cf_ptr[j]:cf_ptr[j + 1] + 1]
+                    functions[label] = Shell(exps, ptr - ptr[0],
+                                             indices[ptr[0]:ptr[-1]],
+                                             coeffs[ptr[0]:ptr[-1]])
+        else:
+            buff = np.empty(end - start, dtype=CFDTYPE)
+            buff['idx'] = indices
+            buff['cc'] = coeffs
+            coef_ptr = coef_ptr.tolist()
+            for j, label in enumerate(labels):
+                functions[label] = {
+                    'e': arrays['exponents'][exp_ptr[j]:exp_ptr[j + 1]].copy(),
+                    'cf': [buff[coef_ptr[k]:coef_ptr[k + 1]]
+                           for k in range(cf_ptr[j], cf_ptr[j + 1])]}
+
+        kwargs = {col: self.columns[col][i] for col in COLUMNS}
+        return self.basiscls(functions=functions, **kwargs)
+
+    def to_list(self):
+        'Return all the basis sets as a list'
+        return [self.load(i) for i in range(len(self))]
+
+    def __repr__(self):
+        return '<BasisStore(fname={}, entries={})>'.format(self.fname,
+                                                           len(self))
+
+
+def read_binary(fname, use_mmap=True):
+    '''
+    Read the header and the arrays of a binary basis set file
+
+    Args:
+        fname : str
+            Name of the file
+        use_mmap : bool
+            Memory-map the file instead of reading it at once
+
+    Returns:
+        (header, arrays) : tuple
+            The decoded JSON header and a dict of read-only arrays
+    '''
+
+    with open(fname, 'rb') as fobj:
+        if fobj.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError('{} is not a binary basis set file'.format(fname))
+        hlen, = struct.unpack('<Q', fobj.read(8))
+        header = json.loads(fobj.read(hlen).decode('utf-8'),
+                            object_hook=json_numpy_obj_hook)
+        if header['version'] > BINARY_VERSION:
+            raise ValueError('unsupported version {} of {}'.format(
+                header['version'], fname))
+        start = len(BINARY_MAGIC) + 8 + hlen
+        if use_mmap and os.fstat(fobj.fileno()).st_size > start:
+            data = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            fobj.seek(0)
+            data = fobj.read()
+
+    arrays = {}
+    for key, (dtype, shape, offset) in header['arrays'].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[key] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[key] = np.frombuffer(data, dtype=dtype, count=count,
+                                        offset=start + offset).reshape(shape)
+    return header, arrays
@@ -29,8 +29,13 @@ All the methods should be implemented for the basisopt module to work with the
 new code.
 '''
 
+import asyncio
+import concurrent.futures
 import os
 import re
+import shutil
+import signal
+import tempfile
 
 from string import Template
 
@@ -44,7 +49,7 @@ class Calculator():
     __metaclass__ = ABCMeta
 
     def __init__(self, exevar=None, executable=None, runopts=None,
-                 scratch=None):
+                 scratch=None, maxjobs=None):
 
         self.exevar = exevar
 
@@ -67,6 +72,14 @@ class Calculator():
 
         self.runopts = runopts
         self.scratch = scratch
+        self.maxjobs = maxjobs
+
+    def __getstate__(self):
+
+        # the asyncio semaphore is bound to an event loop and cannot be pickled
+        state = self.__dict__.copy()
+        state['_semaphore'] = None
+        return state
 
     @property
     def executable(self):
@@ -103,6 +116,22 @@ class Calculator():
         else:
             raise ValueError("Scratch directory doesn't exist: {}".format(path))
 
+    @property
+    def maxjobs(self):
+        'Return the maximal number of concurrently running jobs'
+        return self._maxjobs
+
+    @maxjobs.setter
+    def maxjobs(self, value):
+
+        if value is None:
+            self._maxjobs = os.cpu_count() or 1
+        elif isinstance(value, int) and value > 0:
+            self._maxjobs = value
+        else:
+            raise ValueError('maxjobs should be a positive int, got: {}'.format(value))
+        self._semaphore = None
+
     @abstractmethod
     def parse(self, fname, objective, regexp=None):
         '''
@@ -118,13 +147,159 @@ class Calculator():
 
         pass
 
-    @abstractmethod
-    def run_multiple(self, *args):
+    def run_multiple(self, inputs, timeout=None, keep_scratch=False):
+        '''
+        Run multiple jobs concurrently, at most ``maxjobs`` at a time
+
+        Args:
+            inputs : list
+                Input files
+            timeout : float
+                Time limit in seconds for each of the jobs
+            keep_scratch : bool
+                If ``True`` the job scratch directories are not removed
+
+        Returns:
+            outputs : list
+                Output files in the same order as ``inputs``
+
+        When called from a running event loop (e.g. in Jupyter) the jobs are
+        gathered in a new event loop in a separate thread, in coroutines
+        ``await`` :py:meth:`gather` instead.
+        '''
+
+        jobs = self.gather(inputs, timeout=timeout, keep_scratch=keep_scratch)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(jobs)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, jobs).result()
+
+    def get_job(self, inpfile):
+        '''
+        Return the command running the input file ``inpfile``, the name of the
+        output file and the name of the file to which the stdout and stderr
+        should be redirected (``None`` if they are not captured).
+
+        Has to be implemented to use :py:meth:`submit` and :py:meth:`gather`.
+        '''
+
+        raise NotImplementedError('{} does not support submitting jobs'.format(
+            self.__class__.__name__))
+
+    def get_scratch_env(self, scratch):
+        '''
+        Return a dict of environment variables directing the program to use
+        the job scratch directory ``scratch``
+        '''
+
+        return {'TMPDIR': scratch}
+
+    def retrieve_files(self, inpfile, jobscratch):
         '''
-        Run multiple jobs
+        Copy the files that should be kept after the job submitted with the
+        input ``inpfile`` finished from its scratch directory ``jobscratch``,
+        by default nothing is retrieved
         '''
+
         pass
 
+    def get_semaphore(self):
+        '''
+        Return the semaphore limiting the number of running jobs to
+        ``maxjobs``, a new one is created for every event loop
+        '''
+
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.maxjobs))
+        return self._semaphore[1]
+
+    async def submit(self, inpfile, timeout=None, keep_scratch=False):
+        '''
+        Run a single job asynchronously
+
+        The job is started in a new process group with its own scratch
+        directory created under ``scratch``. At most ``maxjobs`` jobs submitted
+        from the same event loop run at the same time, the remaining ones wait
+        for a free slot.
+
+        Args:
+            inpfile : str
+                Name of the input file
+            timeout : float
+                Time limit in seconds, when exceeded the whole process group
+                of the job is killed and ``asyncio.TimeoutError`` is raised
+            keep_scratch : bool
+                If ``True`` the job scratch directory is not removed
+
+        Returns:
+            outfile : str
+                Name of the output file
+        '''
+
+        command, outfile, logfile = self.get_job(inpfile)
+
+        async with self.get_semaphore():
+
+            if not os.path.exists(self.scratch):
+                os.makedirs(self.scratch)
+            base = os.path.splitext(os.path.basename(outfile))[0]
+            jobscratch = tempfile.mkdtemp(prefix=base + '_', dir=self.scratch)
+
+            env = os.environ.copy()
+            env.update(self.get_scratch_env(jobscratch))
+
+            fobj = open(logfile, 'w') if logfile is not None else None
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *command, stdout=fobj, stderr=fobj, env=env,
+                    start_new_session=True)
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+                    raise
+            finally:
+                if fobj is not None:
+                    fobj.close()
+                self.retrieve_files(inpfile, jobscratch)
+                if not keep_scratch:
+                    shutil.rmtree(jobscratch, ignore_errors=True)
+
+        return outfile
+
+    async def gather(self, inputs, timeout=None, keep_scratch=False,
+                     return_exceptions=False):
+        '''
+        Submit multiple jobs and wait for all of them to finish
+
+        Args:
+            inputs : list
+                Input files
+            timeout : float
+                Time limit in seconds for each of the jobs
+            keep_scratch : bool
+                If ``True`` the job scratch directories are not removed
+            return_exceptions : bool
+                If ``True`` the exceptions raised by the jobs, e.g. timeouts,
+                are returned in place of the output file names
+
+        Returns:
+            outputs : list
+                Output files in the same order as ``inputs``
+        '''
+
+        jobs = [self.submit(inp, timeout=timeout, keep_scratch=keep_scratch)
+                for inp in inputs]
+        return await asyncio.gather(*jobs, return_exceptions=return_exceptions)
+
     def accomplished(self, fname):
         '''
         Return True if the job completed without errors
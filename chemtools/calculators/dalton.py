@@ -24,7 +24,7 @@
 
 import os
 from collections import Counter
-from subprocess import Popen, call
+from subprocess import call
 
 from .calculator import Calculator, InputTemplate, parse_objective
 
@@ -90,27 +90,28 @@ class Dalton(Calculator):
 
         return dalbase + '_' + molbase + '.out'
 
-    def run_multiple(self, fnames):
-        '''
-        Spawn two single jobs as paralell processes
+    def get_job(self, fname):
         '''
+        Return the command, output file and stdout file for the job, the
+        stdout is captured to ``<dal>_<mol>.log`` next to the output
 
-        procs = []
-        outputs = []
-        for fname in fnames:
+        Args:
+            fname : dict
+                A dictionary with keys ``mol`` and ``dal`` and their
+                respective file name strings as values
+        '''
 
-            dalbase = os.path.splitext(fname['dal'])[0]
-            molbase = os.path.splitext(fname['mol'])[0]
-            outputs.append(dalbase + '_' + molbase + '.out')
+        dalbase = os.path.splitext(fname['dal'])[0]
+        molbase = os.path.splitext(fname['mol'])[0]
 
-            command = [self.executable] + self.runopts + [dalbase, molbase]
-            process = Popen(command)
-            procs.append(process)
+        command = [self.executable] + self.runopts + [dalbase, molbase]
+        return (command, dalbase + '_' + molbase + '.out',
+                dalbase + '_' + molbase + '.log')
 
-        for proc in procs:
-            proc.wait()
+    def get_scratch_env(self, scratch):
+        'Return the environment variables setting the Dalton scratch'
 
-        return outputs
+        return {'DALTON_TMPDIR': scratch}
 
     def write_input(self, fname, template, basis, mol, core):
         '''
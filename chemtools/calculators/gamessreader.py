@@ -26,21 +26,17 @@
     GamessReader    : reading gamess binary files.
 '''
 
+import itertools
 import os
 import sys
 import numpy as np
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 
 from .gamessus import GamessLogParser
+from ..packedmatrix import tri2full
 
-# add an option to choose which reader should be used for dictionary file
-# and sequential files, the options are:
-# - wrapped fortran code that need to be compiled and installed or
-# - native reader written in python using DictionaryFile and SequentialFile
-# classes
-
-# fortran modules nedded for GamessReader Class
-# from gamessusfortranext import twoe
+# GamessFortranReader used to rely on the compiled ``twoe`` extension from
+# gamessusfortranext, it now uses the native vectorized SequentialFile reader
 
 
 class GamessFortranReader(object):
@@ -80,24 +76,32 @@ class GamessFortranReader(object):
         n = self.get_onee_size(aos)
         return n * (n + 1) // 2
 
+    def read_twoe(self, filename, mos=False, skip_first=False, **kwargs):
+        '''
+        Read the packed two-electron supermatrix from the sequential file
+        ``filename`` with :py:meth:`SequentialFile.readseq`, ``kwargs``
+        (``buff_size`` and ``int_size``) are passed to
+        :py:meth:`SequentialFile.readseq`
+        '''
+
+        seq = SequentialFile(filename, logfile=self.logfile)
+        try:
+            return seq.readseq(mos=mos, skip_first=skip_first, **kwargs)
+        finally:
+            seq.file.close()
+
     def read_rdm2(self, filename=None, nmo=None):
 
         '''Read the 2rdm from the gamess-us file'''
 
-        # initialize numpy array to zeros
-        rdm2 = np.zeros(self.get_twoe_size(), dtype=float)
-
-        # use gamess module to read the integrals from the file -filename-
         if filename:
             if os.path.exists(filename):
                 print("Reading {}".format(filename))
-                twoe.integrals.readinao(rdm2, filename)
-                return rdm2
+                return self.read_twoe(filename, mos=True)
             else:
                 sys.exit("File '{0:s}' doesn't exist, exiting...".format(filename))
         elif os.path.exists(self.rdm2file):
-            twoe.integrals.readinao(rdm2, self.rdm2file)
-            return rdm2
+            return self.read_twoe(self.rdm2file, mos=True)
         else:
             sys.exit("File '{0:s}' doesn't exist, exiting...".format(self.rdm2file))
 
@@ -105,18 +109,13 @@ class GamessFortranReader(object):
 
         '''Read the two electron integrals from the gamess-us file'''
 
-        # initialize numpy array to zeros
-        ints = np.zeros(self.get_twoe_size(aos=True), dtype=float)
-        # use gamess module to read the integrals from the file -filename-
         if filename:
             if os.path.exists(filename):
-                twoe.integrals.readinao(ints, filename)
-                return ints
+                return self.read_twoe(filename)
             else:
                 sys.exit("File '{0:s}' doesn't exist, exiting...".format(filename))
         elif os.path.exists(self.twoeaofile):
-            twoe.integrals.readinao(ints, self.twoeaofile)
-            return ints
+            return self.read_twoe(self.twoeaofile)
         else:
             raise OSError("File '{0:s}' doesn't exist, exiting...".format(self.twoeaofile))
 
@@ -124,18 +123,13 @@ class GamessFortranReader(object):
 
         '''Read the two electron integrals from the gamess-us file'''
 
-        # initialize numpy array to zeros
-        ints = np.zeros(self.get_twoe_size(), dtype=float)
-        # use gamess module to read the integrals from the file -filename-
         if filename:
             if os.path.exists(filename):
-                twoe.integrals.readinmo(ints, filename)
-                return ints
+                return self.read_twoe(filename, mos=True, skip_first=True)
             else:
                 sys.exit("File '{0:s}' doesn't exist, exiting...".format(filename))
         elif os.path.exists(self.twoemofile):
-            twoe.integrals.readinmo(ints, self.twoemofile)
-            return ints
+            return self.read_twoe(self.twoemofile, mos=True, skip_first=True)
         else:
             sys.exit("File '{0:s}' doesn't exist, exiting...".format(self.twoemofile))
 
@@ -143,13 +137,181 @@ class GamessFortranReader(object):
 def ijkl(i, j, k, l):
     '''
     Based on the four orbital indices i, j, k, l return the address
-    in the 1d vector.
+    in the 1d vector, works also for arrays of indices.
+    '''
+
+    ij = np.maximum(i, j) * (np.maximum(i, j) + 1) // 2 + np.minimum(i, j)
+    kl = np.maximum(k, l) * (np.maximum(k, l) + 1) // 2 + np.minimum(k, l)
+
+    return np.maximum(ij, kl) * (np.maximum(ij, kl) + 1) // 2 +\
+        np.minimum(ij, kl)
+
+
+class SparseTwoElectron(object):
     '''
+    Compact storage of two-electron integrals or 2-RDM elements with the
+    eightfold permutational symmetry.
+
+    Only the nonzero elements are kept as a sorted array of their positions
+    in the packed 1D supermatrix (the layout returned by
+    :py:meth:`SequentialFile.readseq`) and an array of values.
+
+    Args:
+        nbf : int
+            Number of orbitals
+        indices : numpy.array
+            Positions of the elements in the packed supermatrix
+        values : numpy.array
+            Values of the elements
+    '''
+
+    def __init__(self, nbf, indices, values):
+
+        indices = np.asarray(indices, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if indices.shape != values.shape:
+            raise ValueError('shapes of indices and values differ: {} != {}'.format(
+                indices.shape, values.shape))
+
+        if indices.size > 1 and np.any(indices[1:] <= indices[:-1]):
+            # sort keeping the last of the duplicated positions
+            order = np.argsort(indices, kind='stable')
+            indices = indices[order]
+            values = values[order]
+            last = np.append(indices[1:] != indices[:-1], True)
+            indices = indices[last]
+            values = values[last]
+
+        self.nbf = nbf
+        self.indices = indices
+        self.values = values
+
+    @property
+    def size(self):
+        'Size of the dense packed supermatrix'
+        npair = self.nbf * (self.nbf + 1) // 2
+        return npair * (npair + 1) // 2
+
+    @property
+    def nnz(self):
+        'Number of stored elements'
+        return self.values.size
+
+    @classmethod
+    def from_dense(cls, dense, nbf, thresh=0.0):
+        '''
+        Create the object from the dense packed supermatrix ``dense`` keeping
+        the elements whose absolute value is larger than ``thresh``
+        '''
+
+        indices = np.flatnonzero(np.abs(dense) > thresh)
+        return cls(nbf, indices, dense[indices])
+
+    @classmethod
+    def from_seqfile(cls, seqfile, thresh=0.0, **kwargs):
+        '''
+        Read the two-electron quantities from the GAMESS(US) sequential
+        file record by record, without the dense supermatrix
+
+        Args:
+            seqfile : :py:class:`SequentialFile`
+                Sequential file to read
+            thresh : float
+                Elements with absolute value below or equal ``thresh`` are
+                discarded
+            kwargs :
+                Passed to :py:meth:`SequentialFile.iterseq`
+        '''
+
+        mos = kwargs.get('mos', False)
+        nbf = seqfile.nmo if mos else seqfile.nao
+
+        indices = []
+        values = []
+        for idx, val in seqfile.iterseq(**kwargs):
+            keep = np.abs(val) > thresh
+            indices.append(idx[keep])
+            values.append(val[keep])
 
-    ij = max(i, j) * (max(i, j) + 1) / 2 + min(i, j)
-    kl = max(k, l) * (max(k, l) + 1) / 2 + min(k, l)
+        if indices:
+            indices = np.concatenate(indices)
+            values = np.concatenate(values)
+        else:
+            indices = np.zeros(0, dtype=np.int64)
+            values = np.zeros(0, dtype=np.float64)
+
+        return cls(nbf, indices, values)
 
-    return max(ij, kl) * (max(ij, kl) + 1) / 2 + min(ij, kl)
+    @classmethod
+    def load(cls, fname):
+        '''
+        Load the object from the ``.npz`` file written by :py:meth:`save`
+        '''
+
+        with np.load(fname) as data:
+            return cls(int(data['nbf']), data['indices'], data['values'])
+
+    def save(self, fname, compressed=False):
+        '''
+        Save the object to the ``.npz`` file ``fname``
+        '''
+
+        savez = np.savez_compressed if compressed else np.savez
+        savez(fname, nbf=self.nbf, indices=self.indices, values=self.values)
+
+    def to_dense(self):
+        '''
+        Return the dense packed 1D supermatrix
+        '''
+
+        out = np.zeros(self.size, dtype=np.float64)
+        out[self.indices] = self.values
+        return out
+
+    def lookup(self, positions):
+        '''
+        Return the values at the packed supermatrix ``positions``
+        '''
+
+        positions = np.asarray(positions, dtype=np.int64)
+        if self.indices.size == 0:
+            return np.zeros(positions.shape, dtype=np.float64)
+        loc = np.searchsorted(self.indices, positions)
+        loc = np.minimum(loc, self.indices.size - 1)
+        found = self.indices[loc] == positions
+        return np.where(found, self.values[loc], 0.0)
+
+    def get(self, i, j, k, l):
+        '''
+        Return the element(s) for the (0-based) orbital indices i, j, k, l,
+        arrays of indices are also accepted
+        '''
+
+        return self.lookup(ijkl(i, j, k, l))
+
+    def block(self, iorbs=None, jorbs=None, korbs=None, lorbs=None):
+        '''
+        Expand a sub-block of the supermatrix into a 4 index array
+
+        Args:
+            iorbs, jorbs, korbs, lorbs : sequences of ints
+                (0-based) orbital indices spanning the block along each of
+                the dimensions, all orbitals are taken by default
+
+        Returns:
+            out : numpy.array
+                Array of shape ``(len(iorbs), len(jorbs), len(korbs),
+                len(lorbs))``
+        '''
+
+        orbs = [np.arange(self.nbf) if o is None else np.asarray(o)
+                for o in (iorbs, jorbs, korbs, lorbs)]
+        i, j, k, l = np.ix_(*orbs)
+        return self.get(i, j, k, l)
+
+    def __repr__(self):
+        return "<SparseTwoElectron(nbf={0:d}, nnz={1:d}, size={2:d})>".format(
+            self.nbf, self.nnz, self.size)
 
 
 def factor(i, j, k, l):
@@ -223,7 +385,7 @@ class BinaryFile(object):
         or 'c' order.
         """
         self.mode = mode + "b"
-        self.file = open(filename, mode=self.mode, buffering=1)
+        self.file = open(filename, mode=self.mode)
         """The file handler."""
         if order not in ['fortran', 'c']:
             raise ValueError("order should be either 'fortran' or 'c'.")
@@ -315,6 +477,16 @@ class BinaryFile(object):
         "Returns current file position, an integer (may be a long integer)."
         return self.file.tell()
 
+    def close(self):
+        "Close the file."
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
 
 class SequentialFile(BinaryFile):
 
@@ -337,12 +509,58 @@ class SequentialFile(BinaryFile):
     def ijkl(self, i, j, k, l):
         '''
         Based on the four orbital indices i,j,k,l return the address
-        in the 1d vector.
+        in the 1d vector, works also for arrays of indices.
         '''
 
-        ij = max(i, j) * (max(i, j) - 1) // 2 + min(i, j)
-        kl = max(k, l) * (max(k, l) - 1) // 2 + min(k, l)
-        return max(ij, kl) * (max(ij, kl) - 1) // 2 + min(ij, kl) - 1
+        ij = np.maximum(i, j) * (np.maximum(i, j) - 1) // 2 + np.minimum(i, j)
+        kl = np.maximum(k, l) * (np.maximum(k, l) - 1) // 2 + np.minimum(k, l)
+        return np.maximum(ij, kl) * (np.maximum(ij, kl) - 1) // 2 +\
+            np.minimum(ij, kl) - 1
+
+    def decode_labels(self, index_buffer, length, int_size):
+        '''
+        Decode the packed labels of the first ``length`` values in the record
+        and return the arrays with the orbital indices i, j, k, l
+
+        Args:
+            index_buffer : numpy.array
+                Buffer with the packed labels
+            length : int
+                Number of values in the record
+            int_size : int
+                Size of the integer in bytes, 4 or 8
+
+        Returns:
+            i, j, k, l : tuple of numpy.arrays
+        '''
+
+        if int_size == 4:
+            words = np.ascontiguousarray(index_buffer).view(np.uint32)
+            if self.large_labels:
+                first = words[0:2 * length:2].astype(np.int64)
+                second = words[1:2 * length:2].astype(np.int64)
+                return (first >> 16, first & 65535,
+                        second >> 16, second & 65535)
+            else:
+                labels = words[:length].astype(np.int64)
+        elif int_size == 8:
+            words = np.ascontiguousarray(index_buffer).view(np.uint64)
+            if self.large_labels:
+                labels = words[:length].astype(np.int64)
+                return (labels >> 48, labels >> 32 & 65535,
+                        labels >> 16 & 65535, labels & 65535)
+            else:
+                # two labels per word, the first one in the upper half
+                words = words[:(length + 1) // 2]
+                labels = np.empty(2 * words.size, dtype=np.int64)
+                labels[0::2] = words >> np.uint64(32)
+                labels[1::2] = words & np.uint64(0xFFFFFFFF)
+                labels = labels[:length]
+        else:
+            raise ValueError('wrong "int_size": {}'.format(int_size))
+
+        return (labels >> 24 & 255, labels >> 16 & 255,
+                labels >> 8 & 255, labels & 255)
 
     def get_index_buffsize(self, buff_size, int_size):
         ''' Return the index buffer size for reading 2-electron integrals'''
@@ -389,77 +607,129 @@ class SequentialFile(BinaryFile):
             numpy 1D array holding the values
         '''
 
-        indexBuffSize = self.get_index_buffsize(buff_size, int_size)
-
-        self.seek(0)
         if mos:
-            nmo = self.nmo - self.core
             nt = self.nmo * (self.nmo + 1) // 2
-            if skip_first:
-                #n1 = nmo*(nmo+1)/2
-                #self.seek(8+8*n1)
-                self.seek(self.tell() + 4)
-                Hoe = self.read('f8', shape=(nt, ))
-                # advance four trailing bytes
-                self.seek(self.tell() + 4)
-
         else:
             nt = self.nao * (self.nao + 1) // 2
 
         ints = np.zeros(nt * (nt + 1) // 2, dtype=float, order='F')
 
+        for indices, values in self.iterseq(buff_size=buff_size,
+                                            int_size=int_size, mos=mos,
+                                            skip_first=skip_first):
+            ints[indices] = values
+        return ints
+
+    def get_record_layout(self, buff_size=15000, int_size=8, mos=False,
+                          skip_first=False):
+        '''
+        Return the offset of the first record with the integrals, the length
+        of the records and the size of the index buffer, all records in the
+        file have the same length
+        '''
+
+        nidx = self.get_index_buffsize(buff_size, int_size)
+        reclen = 4 + int_size * (1 + nidx) + 8 * buff_size + 4
+
+        offset = 0
+        if mos and skip_first:
+            nt = self.nmo * (self.nmo + 1) // 2
+            offset = 4 + 8 * nt + 4
+
+        return offset, reclen, nidx
+
+    def get_record_lengths(self, buff_size=15000, int_size=8, mos=False,
+                           skip_first=False):
+        '''
+        Return the array with the number of values stored in each of the
+        records, the last record is marked with a negative length
+        '''
+
+        offset, reclen, nidx = self.get_record_layout(buff_size, int_size,
+                                                      mos, skip_first)
+        data = np.memmap(self.file.name, dtype=np.uint8, mode='r')
+        nmax = max(0, (data.size - offset) // reclen)
+        # strided view of the length fields of all the records
+        lengths = np.ndarray(shape=(nmax, ), dtype='i' + str(int_size),
+                             buffer=data, offset=offset + 4,
+                             strides=(reclen, ))
+
+        last = np.flatnonzero(lengths <= 0)
+        if last.size == 0:
+            raise EOFError("Asking for more data than available in file.")
+        if np.any(lengths[:last[0] + 1] > buff_size):
+            raise ValueError('the read record length is greater that the buffer size {0:10d}'.format(buff_size))
+        return np.array(lengths[:last[0] + 1])
+
+    def iterseq(self, buff_size=15000, int_size=8, mos=False,
+                skip_first=False, labels=False, records=None):
+        '''
+        Iterate over the records of the FORTRAN sequential unformatted file
+        with two-electron quantities (see :py:meth:`readseq`) without
+        holding the whole supermatrix in memory.
+
+        The file is memory mapped and for every record a tuple
+        ``(indices, values)`` is yielded, where ``values`` is a read-only
+        view of the values stored in the record (no copy is made) and
+        ``indices`` are the positions of the values in the 1D supermatrix
+        returned by :py:meth:`readseq`. This allows to contract the
+        integrals with a density, accumulate Coulomb and exchange matrices or
+        write them to disk chunk by chunk.
+
+        Args:
+            buff_size : int
+                size of the buffer holding values to be read, ``NINTMX``
+            int_size : int
+                size of the integers used for the labels in bytes
+            mos : bool
+                ``True`` for the quantities over MO's
+            skip_first : bool
+                skips the first record (one electron MO integrals)
+            labels : bool
+                If ``True`` ``indices`` are returned as an array of shape
+                ``(n, 4)`` with the (1-based) orbital indices i, j, k, l
+                instead of the supermatrix positions
+            records : iterable of ints
+                Numbers of the records to read, by default all the records
+                up to the last one are read
+
+        Yields:
+            (indices, values) : tuple of numpy arrays
+        '''
+
         int_type = np.dtype('i' + str(int_size))
-        index_buffer = np.zeros(indexBuffSize, dtype=int_type, order='F')
-        value_buffer = np.zeros(buff_size, dtype=float, order='F')
+        first, reclen, nidx = self.get_record_layout(buff_size, int_size,
+                                                     mos, skip_first)
+
+        data = np.memmap(self.file.name, dtype=np.uint8, mode='r')
 
-        length = 1
-        while length > 0:
-            self.seek(self.tell() + 4)
-            length = int(self.read(int_type))
+        if records is None:
+            records = itertools.count()
+
+        for irec in records:
+            offset = first + irec * reclen
+            if offset + reclen > data.size:
+                raise EOFError("Asking for more data than available in file.")
+
+            length = int(np.frombuffer(data, dtype=int_type, count=1,
+                                       offset=offset + 4)[0])
             if length > buff_size:
                 raise ValueError('the read record length: {0:10d} is greater that the buffer size {1:10d}'.format(int(length), buff_size))
 
-            index_buffer = self.read(int_type, shape=(indexBuffSize, ))
-            value_buffer = self.read('f8', shape=(buff_size, ))
-
-            for m in range(1, abs(length) + 1):
-                if int_size == 4:
-                    if self.large_labels:
-                        label1 = int(index_buffer[2 * m - 1])
-                        label2 = int(index_buffer[2 * m])
-                        i = label1 >> 16
-                        j = label1 & 65535
-                        k = label2 >> 16
-                        l = label2 & 65535
-                    else:
-                        label = int(index_buffer[m - 1])
-                        i = label >> 24
-                        j = label >> 16 & 255
-                        k = label >>  8 & 255
-                        l = label       & 255
-                elif int_size == 8:
-                    if self.large_labels:
-                        label = int(index_buffer[m - 1])
-                        i = label >> 48
-                        j = label >> 32 & 65535
-                        k = label >> 16 & 65535
-                        l = label       & 65535
-                    else:
-                        if m % 2 == 0:
-                            label = int(index_buffer[m // 2 - 1])
-                            i = label >> 24 & 255
-                            j = label >> 16 & 255
-                            k = label >>  8 & 255
-                            l = label       & 255
-                        else:
-                            label = int(index_buffer[m // 2])
-                            i = label >> 56 & 255
-                            j = label >> 48 & 255
-                            k = label >> 40 & 255
-                            l = label >> 32 & 255
-                ints[self.ijkl(i, j, k, l)] = value_buffer[m - 1]
-            self.seek(self.tell() + 4)
-        return ints
+            nval = abs(length)
+            index_buffer = np.frombuffer(data, dtype=int_type, count=nidx,
+                                         offset=offset + 4 + int_size)
+            values = np.frombuffer(data, dtype=np.float64, count=nval,
+                                   offset=offset + 4 + int_size * (1 + nidx))
+
+            i, j, k, l = self.decode_labels(index_buffer, nval, int_size)
+            if labels:
+                yield np.column_stack((i, j, k, l)), values
+            else:
+                yield self.ijkl(i, j, k, l), values
+
+            if length <= 0:
+                break
 
     def read_ci_coeffs(self):
         '''
@@ -538,6 +808,18 @@ class GamessReader(object):
         ints = np.zeros(self.get_twoe_size(), dtype=float)
 
 
+# cache of the dictionary file records keyed on (path, mtime, size, inode,
+# nrec, dtype)
+RECORD_CACHE = OrderedDict()
+RECORD_CACHE_SIZE = 64
+
+
+def clear_record_cache():
+    'Remove all the dictionary file records from the cache'
+
+    RECORD_CACHE.clear()
+
+
 rec = namedtuple('record', ['name', 'dtype'])
 records = {
     1: rec("atomic coordinates", "f8"),
@@ -636,51 +918,67 @@ class DictionaryFile(BinaryFile):
 
         self.irecln = irecln
         self.int_size = int_size
+
+        stat = os.stat(filename)
+        self.path = os.path.abspath(filename)
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.inode = stat.st_ino
+        self.data = np.memmap(filename, dtype=np.uint8, mode='r')
+
         # read the first record with the information about the
         # structure of the dictionary file
-        self.irecst = self.read(np.dtype('i' + str(self.int_size)))
-        self.ioda = self.read(np.dtype('i' + str(self.int_size)), shape=(950,))
-        self.ifilen = self.read(np.dtype('i' + str(self.int_size)), shape=(950,))
-        self.iss = self.read(np.dtype('i' + str(self.int_size)))
-        self.ipk = self.read(np.dtype('i' + str(self.int_size)))
+        int_type = np.dtype('i' + str(self.int_size))
+        header = np.frombuffer(self.data, dtype=int_type, count=1903)
+        self.irecst = header[0]
+        self.ioda = header[1:951]
+        self.ifilen = header[951:1901]
+        self.iss = header[1901]
+        self.ipk = header[1902]
 
     def read_record(self, nrec, dtype=None):
         '''
         Read a logical record 'rec' from the dictionary file and return a numpy
         array of type defined in the 'records' list, and size defined through
         'self.ifilen' array.
+
+        The returned array is a read-only view of the memory mapped file and
+        it is cached, so the subsequent reads of the same record from the
+        unchanged file are served from memory.
         '''
 
+        if self.data is None:
+            raise ValueError("I/O operation on closed file")
+
         if self.ioda[nrec-1] < 0:
             raise IOError("Record {0} was not previously written, IODA[{0}]={1}".format(nrec, self.ioda[nrec-1]))
 
-        self.seek(8 * self.irecln * (int(self.ioda[nrec - 1]) - 1))
-        if dtype is not None:
-            return self.read(dtype, shape=(self.ifilen[nrec - 1],))
-        else:
-            return self.read(records[nrec].dtype, shape=(self.ifilen[nrec - 1],))
+        if dtype is None:
+            dtype = records[nrec].dtype
+        dtype = np.dtype(dtype)
 
+        key = (self.path, self.mtime, self.size, self.inode, nrec, dtype.str)
+        if key in RECORD_CACHE:
+            RECORD_CACHE.move_to_end(key)
+            return RECORD_CACHE[key]
 
-def tri2full(vector, sym=True):
-    '''
-    Convert a triagonal matrix whose elements are stored in the `vector` into a
-    rectangular matrix of the shape given by `shape` tuple.
-    '''
+        offset = 8 * self.irecln * (int(self.ioda[nrec - 1]) - 1)
+        record = np.frombuffer(self.data, dtype=dtype,
+                               count=int(self.ifilen[nrec - 1]), offset=offset)
 
-    # get the shape of the symmetric matrix from solving n^2 + n - 2s = 0 equation
-    # where n is the number of rows/columns and s is the size of 1D vector
+        RECORD_CACHE[key] = record
+        while len(RECORD_CACHE) > RECORD_CACHE_SIZE:
+            RECORD_CACHE.popitem(last=False)
+        return record
 
-    n = int((np.sqrt(8.0 * vector.size + 1) - 1.0) / 2.0)
-    matrix = np.zeros((n, n), dtype=float, order='F')
-
-    ij = -1
-    for i in range(n):
-        for j in range(i + 1):
-            ij += 1
-            if sym:
-                matrix[i, j] = matrix[j, i] = vector[ij]
-            else:
-                matrix[i, j] = vector[ij]
-                matrix[j, i] = -vector[ij]
+    def close(self):
+        '''
+        Close the file and release the memory map, the cached records of the
+        file are removed from the cache since they are views of the map
+        '''
 
-    return matrix
+        fileid = (self.path, self.mtime, self.size, self.inode)
+        for key in [k for k in RECORD_CACHE if k[:4] == fileid]:
+            del RECORD_CACHE[key]
+        self.data = None
+        super(DictionaryFile, self).close()
@@ -33,11 +33,15 @@ Module for handling Gamess-US related jobs:
 from __future__ import print_function
 
 import argparse
+import hashlib
 import itertools
 import math
 import os
 import re
+import shutil
+import stat
 import sys
+from collections import OrderedDict
 from copy import copy
 from subprocess import call
 import numpy as np
@@ -46,6 +50,11 @@ from .calculator import Calculator, InputTemplate
 from ..parsetools import slicebetween, sliceafter, parsepairs, getlines
 
 
+# assignments of the scratch directories in the csh rungms script
+RUNGMS_SCRATCH = re.compile(r'^([ \t]*)set[ \t]+(SCR|USERSCR)[ \t]*=[ \t]*(.*)$',
+                            flags=re.M)
+
+
 class GamessUS(Calculator):
 
     '''Container object for Gamess-us jobs.'''
@@ -107,7 +116,7 @@ class GamessUS(Calculator):
         Remove the gamess dat file if it exists in the scratch directory.
         '''
 
-        datfile = os.path.splitext(inpfile)[0] + ".dat"
+        datfile = os.path.splitext(os.path.basename(inpfile))[0] + ".dat"
         if os.path.exists(os.path.join(self.scratch, datfile)):
             os.remove(os.path.join(self.scratch, datfile))
 
@@ -128,8 +137,99 @@ class GamessUS(Calculator):
 
         return logfile
 
-    def run_multiple(self, inputs):
-        pass
+    def get_job(self, inpfile):
+        '''
+        Return the command, output file and stdout file for the ``inpfile``,
+        the command runs the script from :py:meth:`get_scratch_rungms`
+        '''
+
+        logfile = os.path.splitext(inpfile)[0] + ".log"
+        command = self.get_command(inpfile)
+        command[0] = self.get_scratch_rungms()
+        return command, logfile, logfile
+
+    def get_scratch_rungms(self):
+        '''
+        Return a ``rungms`` script that takes the scratch directories from the
+        ``SCR`` and ``USERSCR`` environment variables set by
+        :py:meth:`get_scratch_env`
+
+        The stock csh ``rungms`` sets both variables unconditionally, in that
+        case a copy of the script with every ``set SCR=...`` and
+        ``set USERSCR=...`` line replaced by ``if (! $?SCR) set SCR=...`` is
+        written to ``scratch`` and returned. Scripts without such lines are
+        returned unchanged and have to read the variables from the
+        environment themselves, otherwise the jobs share the scratch of the
+        ``rungms`` and jobs with the same input name can collide.
+        '''
+
+        with open(self.rungms, 'r') as fobj:
+            script = fobj.read()
+
+        patched, nsub = RUNGMS_SCRATCH.subn(r'\1if (! $?\2) set \2=\3', script)
+        if nsub == 0:
+            return self.rungms
+
+        digest = hashlib.sha1(patched.encode('utf-8')).hexdigest()[:12]
+        fname = os.path.join(self.scratch, '.rungms-' + digest)
+        if not os.path.exists(fname):
+            if not os.path.exists(self.scratch):
+                os.makedirs(self.scratch)
+            tmpname = fname + '.{}.tmp'.format(os.getpid())
+            with open(tmpname, 'w') as fobj:
+                fobj.write(patched)
+            os.chmod(tmpname, stat.S_IMODE(os.stat(self.rungms).st_mode) |
+                     stat.S_IRWXU)
+            os.replace(tmpname, fname)
+        return fname
+
+    def get_scratch_env(self, scratch):
+        '''
+        Return the environment variables setting both the GAMESS scratch
+        (``SCR``) and user scratch (``USERSCR``) to the job scratch directory,
+        see :py:meth:`get_scratch_rungms` for how they reach ``rungms``
+        '''
+
+        return {'SCR': scratch, 'USERSCR': scratch}
+
+    def retrieve_files(self, inpfile, jobscratch):
+        '''
+        Move the PUNCH (``.dat``) file from the job scratch to ``scratch``
+        where it would be found after a sequential :py:meth:`run`, if
+        ``rungms`` ignored the job scratch the file is left where ``rungms``
+        wrote it, i.e. in ``scratch`` when that is the ``USERSCR`` of the
+        ``rungms``
+        '''
+
+        datfile = os.path.splitext(os.path.basename(inpfile))[0] + ".dat"
+        if os.path.exists(os.path.join(jobscratch, datfile)):
+            shutil.move(os.path.join(jobscratch, datfile),
+                        os.path.join(self.scratch, datfile))
+
+    def run_multiple(self, inputs, timeout=None, keep_scratch=False):
+        '''
+        Run multiple gamess jobs concurrently, at most ``maxjobs`` at a time,
+        each one with a separate scratch directory
+
+        Args:
+            inputs : list
+                Input files
+            timeout : float
+                Time limit in seconds for each of the jobs
+            keep_scratch : bool
+                If ``True`` the job scratch directories with the ``.F*`` files
+                are not removed
+
+        Returns:
+            outputs : list
+                Log files in the same order as ``inputs``
+        '''
+
+        for inpfile in inputs:
+            self.remove_dat(inpfile)
+
+        return super(GamessUS, self).run_multiple(inputs, timeout=timeout,
+                                                  keep_scratch=keep_scratch)
 
     def accomplished(self, outfile):
         '''
@@ -454,13 +554,91 @@ class GamessInput(object):
                 print(key, '\n', value)
 
 
+# scalar fields of the log file: name -> (literal key, regex, converter), the
+# value is taken from the first match, converter is applied to the first
+# captured group or to the match itself if there are no groups
+LOG_FIELDS = OrderedDict([
+    ('accomplished', ('TERMINATED NORMALLY', r'TERMINATED NORMALLY',
+                      lambda x: True)),
+    ('version', ('GAMESS VERSION =', r'.*\s+GAMESS VERSION =\s*(.*?)\s*\*',
+                 str)),
+    ('charge', ('CHARGE OF MOLECULE',
+                r'CHARGE OF MOLECULE\s+=\s*(?P<charge>\d+)', int)),
+    ('electrons', ('NUMBER OF ELECTRONS',
+                   r'NUMBER OF ELECTRONS\s+=\s*(?P<nele>\d+)', int)),
+    ('atoms', ('TOTAL NUMBER OF ATOMS',
+               r'TOTAL NUMBER OF ATOMS\s+=\s*(?P<nat>\d+)', int)),
+    ('aos', ('NUMBER OF CARTESIAN GAUSSIAN BASIS FUNCTIONS',
+             r'NUMBER OF CARTESIAN GAUSSIAN BASIS FUNCTIONS =\s*(?P<nao>\d+)',
+             int)),
+    ('core mos', ('NUMBER OF CORE MOLECULAR ORBITALS',
+                  r'NUMBER OF CORE MOLECULAR ORBITALS\s*=\s*(?P<ncore>\d+)',
+                  int)),
+    ('ispher', ('ISPHER=', r'ISPHER=\s*(?P<ispher>\-?\d{1}).*', int)),
+    ('variation space', ('VARIATION SPACE IS',
+                         r'.*VARIATION SPACE IS\s*(?P<nmo>\d+).*', int)),
+    ('linear deps', ('NUMBER OF LINEARLY DEPENDENT MOS DROPPED',
+                     r'NUMBER OF LINEARLY DEPENDENT MOS DROPPED=\s*(?P<lindep>\d+)',
+                     int)),
+    ('scftyp', ('SCFTYP=', r'.*SCFTYP=(?P<scftyp>[A-Z]+)', str)),
+    ('cctyp', ('CCTYP =', r'.*CCTYP =(?P<cctyp>[A-Z\(\)\-]+)', str)),
+    ('cityp', ('CITYP =', r'.*CITYP =(?P<cityp>[A-Z]+)', str)),
+    ('mplevl', ('MPLEVL=', r'.*MPLEVL=\s*(?P<mplevl>\d+)', int)),
+    ('hf total energy', ('HF ENERGY IS',
+                         r'FINAL R[O]*HF ENERGY IS\s+(?P<energy>\-?\d+\.\d+)',
+                         float)),
+    ('cc total energy', ('COUPLED-CLUSTER ENERGY E',
+                         r'COUPLED-CLUSTER ENERGY E(.*?)\s*=\s*(?P<energy>\-?\d+\.\d+)',
+                         lambda x: float(x[-1]))),
+])
+
+# substrings of the lines whose positions are stored in the log file index,
+# they cover all the section locators used by the GamessLogParser methods
+LOG_MARKERS = [
+    ' ...... END OF ',
+    'DETERMINANT CONTRIBUTION TO CSF',
+    'CSF      COEF    OCCUPANCY (IGNORING CORE)',
+    'INITIAL GUESS ORBITALS',
+    'EIGENVECTORS',
+    'NATURAL ORBITALS IN ATOMIC ORBITAL',
+    'LOCALIZED ORBITALS',
+    ' LOCALIZATION ...',
+    'LZ VALUE ANALYSIS FOR',
+    'PROPERTY VALUES FOR THE',
+    ' CI PROPERTIES',
+]
+
+
+def linebounds(data, pos):
+    '''
+    Return the start and end (including the newline) positions of the line
+    containing the position ``pos`` in the bytes ``data``
+    '''
+
+    start = data.rfind(b'\n', 0, pos) + 1
+    stop = data.find(b'\n', pos)
+    return start, len(data) if stop == -1 else stop + 1
+
+
 class GamessLogParser(object):
     '''
     Methods for parsing gamess-us log file.
+
+    Args:
+        log : str
+            Name of the log file
+        indexed : bool
+            If ``True`` the log file is scanned once and the scalar fields
+            and positions of the sections are stored in an index used by all
+            the getters, the index is rebuilt when the modification time or
+            size of the file changes. If ``False`` every getter searches the
+            whole file.
     '''
 
-    def __init__(self, log):
+    def __init__(self, log, indexed=True):
         self.logfile = log
+        self.indexed = indexed
+        self._index = None
 
     @property
     def logfile(self):
@@ -472,6 +650,7 @@ class GamessLogParser(object):
         'Check if the logfile exists first.'
         if os.path.exists(value):
             self._logfile = value
+            self._index = None
         else:
             raise ValueError("File: {} does not exist".format(value))
 
@@ -497,40 +676,188 @@ class GamessLogParser(object):
             content = log.read()
         return cpatt.search(content)
 
+    @property
+    def index(self):
+        '''
+        Return the index of the log file, (re)building it if the file changed
+        since the last scan.
+        '''
+
+        stat = os.stat(self.logfile)
+        if self._index is None or \
+                self._index['stat'] != (stat.st_mtime_ns, stat.st_size):
+            self._index = self.build_index()
+            self._index['stat'] = (stat.st_mtime_ns, stat.st_size)
+        return self._index
+
+    def build_index(self, blocksize=2**24):
+        '''
+        Scan the log file once and return the index.
+
+        Returns:
+            index : dict
+                Dictionary with ``fields`` holding the values of the fields
+                defined in ``LOG_FIELDS`` and ``lines`` holding a list of
+                ``(lineno, offset, line)`` tuples for all the lines
+                containing one of the ``LOG_MARKERS``, where ``offset`` is the
+                position of the line in bytes.
+        '''
+
+        fieldres = {name: re.compile(regex)
+                    for name, (key, regex, conv) in LOG_FIELDS.items()}
+        markers = [m.encode() for m in LOG_MARKERS]
+
+        fields = {}
+        lines = []
+        lineno = 0
+        with open(self.logfile, 'rb') as log:
+            base = 0
+            rest = b''
+            while True:
+                chunk = log.read(blocksize)
+                block = rest + chunk
+                if chunk:
+                    end = block.rfind(b'\n') + 1
+                    block, rest = block[:end], block[end:]
+
+                # first matching line of every field not found yet
+                for name, (key, _, conv) in LOG_FIELDS.items():
+                    if name in fields:
+                        continue
+                    bkey = key.encode()
+                    pos = block.find(bkey)
+                    while pos != -1:
+                        start, stop = linebounds(block, pos)
+                        line = block[start:stop].decode('utf-8', 'replace')
+                        fmatch = fieldres[name].search(line)
+                        if fmatch:
+                            groups = fmatch.groups()
+                            if not groups:
+                                fields[name] = conv(fmatch.group(0))
+                            elif len(groups) == 1:
+                                fields[name] = conv(groups[0])
+                            else:
+                                fields[name] = conv(groups)
+                            break
+                        pos = block.find(bkey, stop)
+
+                # starts of all the lines containing the markers
+                starts = set()
+                for marker in markers:
+                    pos = block.find(marker)
+                    while pos != -1:
+                        start, stop = linebounds(block, pos)
+                        starts.add(start)
+                        pos = block.find(marker, stop)
+
+                # line numbers are obtained by counting the newlines between
+                # consecutive marker lines
+                pos = 0
+                for start in sorted(starts):
+                    lineno += block.count(b'\n', pos, start)
+                    pos = start
+                    stop = linebounds(block, start)[1]
+                    lines.append((lineno, base + start,
+                                  block[start:stop].decode('utf-8', 'replace')))
+                lineno += block.count(b'\n', pos)
+
+                base += len(block)
+                if not chunk:
+                    break
+
+        return {'fields': fields, 'lines': lines}
+
+    def get_field(self, name):
+        '''
+        Return the value of the field ``name`` defined in ``LOG_FIELDS`` or
+        ``None`` if it's not present in the log file.
+        '''
+
+        if self.indexed:
+            return self.index['fields'].get(name)
+
+        key, regex, conv = LOG_FIELDS[name]
+        match = self.parse(regex)
+        if match:
+            groups = match.groups()
+            if not groups:
+                return conv(match.group(0))
+            elif len(groups) == 1:
+                return conv(groups[0])
+            return conv(groups)
+
+    def getlines(self, tolocate):
+        '''
+        Return the lines from the log file based on ``tolocate``, equivalent
+        to :py:func:`chemtools.parsetools.getlines` but using the index if all
+        the queries are covered by the ``LOG_MARKERS``.
+
+        Args:
+          tolocate : list of tuples
+            List of tuples with strings to find (queries) as first elements
+            and integer offset values as second
+        '''
+
+        covered = all(any(marker in query for marker in LOG_MARKERS)
+                      for query, _ in tolocate)
+        if not self.indexed or not covered:
+            return getlines(self.logfile, tolocate)
+
+        located = []
+        for query, offset in tolocate:
+            found = [(lno, off) for lno, off, line in self.index['lines']
+                     if query in line]
+            if len(found) == 0:
+                raise ValueError('len(tolocate) != len(located): {0} != {1}'.format(
+                    len(tolocate), len(located)))
+            elif len(found) > 1:
+                raise ValueError('multiple lines found for "{0}": {1}'.format(
+                    query, ', '.join([str(x[0] + offset) for x in found])))
+            located.append((found[0][0], found[0][1], offset))
+
+        startlno = min(lno + off for lno, _, off in located)
+        endlno = max(lno + off for lno, _, off in located)
+        anchorlno, anchoroff, _ = min(located)
+        if startlno < anchorlno:
+            return getlines(self.logfile, tolocate)
+
+        return self.readlines(anchoroff, startlno - anchorlno,
+                              endlno - startlno)
+
+    def readlines(self, offset, skip, num):
+        '''
+        Return ``num`` lines of the log file after skipping ``skip`` lines
+        from position ``offset`` in bytes.
+        '''
+
+        with open(self.logfile, 'rb') as log:
+            log.seek(offset)
+            for _ in range(skip):
+                log.readline()
+            return [log.readline().decode('utf-8', 'replace')
+                    for _ in range(num)]
+
     def accomplished(self):
         '''Check if a job teminated normally.'''
 
-        regex = r'TERMINATED NORMALLY'
-        match = self.parse(regex)
-        return match is not None
+        return self.get_field('accomplished') is not None
 
     def get_version(self):
         '''
         Get the version of the GAMESS(US) package.
         '''
 
-        regex = r'.*\s+GAMESS VERSION =\s*(.*?)\s*\*'
-        match = self.parse(regex)
-        if match:
-            return match.group(1)
-        else:
-            return None
+        return self.get_field('version')
 
     def get_charge(self):
         '''Get total charge.'''
 
-        regex = r'CHARGE OF MOLECULE\s+=\s*(?P<charge>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("charge"))
+        return self.get_field('charge')
 
     def get_electrons(self):
         '''Get number of electrons.'''
 
-        regex = r'NUMBER OF ELECTRONS\s+=\s*(?P<nele>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("nele"))
+        return self.get_field('electrons')
 
     def get_homo(self):
         '''
@@ -545,10 +872,7 @@ class GamessLogParser(object):
     def get_number_of_atoms(self):
         '''Get total number of atoms from gamess log file.'''
 
-        regex = r'TOTAL NUMBER OF ATOMS\s+=\s*(?P<nat>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("nat"))
+        return self.get_field('atoms')
 
     def get_number_of_aos(self):
         '''
@@ -556,109 +880,70 @@ class GamessLogParser(object):
         Gamess log file
         '''
 
-        regex = r'NUMBER OF CARTESIAN GAUSSIAN BASIS FUNCTIONS =\s*(?P<nao>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("nao"))
+        return self.get_field('aos')
 
     def get_number_of_core_mos(self):
         '''
         Get the number of core molecular orbitals from the Gamess log file
         '''
 
-        regex = r'NUMBER OF CORE MOLECULAR ORBITALS\s*=\s*(?P<ncore>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("ncore"))
+        return self.get_field('core mos')
 
     def get_number_of_mos(self):
         '''
         Get the number of molecular orbitals from Gammess log file.
         '''
 
-        ispher_patt = r'ISPHER=\s*(?P<ispher>\-?\d{1}).*'
-        var_space_patt = r'.*VARIATION SPACE IS\s*(?P<nmo>\d+).*'
-        c_ispher = re.compile(ispher_patt)
-        c_var_space = re.compile(var_space_patt)
-
-        with open(self.logfile, 'r') as log:
-            lines = log.read()
-
-        match = c_ispher.search(lines)
-        if match:
-            ispher = int(match.group("ispher"))
+        ispher = self.get_field('ispher')
 
         if ispher == -1:
             return self.get_number_of_aos()
         elif ispher == 1:
-            match = c_var_space.search(lines)
-            if match:
-                n_mo = int(match.group("nmo"))
-                return n_mo
+            return self.get_field('variation space')
         else:
-            sys.exit("wrong ispher found: {0:d}".format(ispher))
+            sys.exit("wrong ispher found: {0}".format(ispher))
 
     def get_linear_deps(self):
         '''
         Get number of linearly dependent combinations dropped.
         '''
 
-        regex = r'NUMBER OF LINEARLY DEPENDENT MOS DROPPED=\s*(?P<lindep>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group('lindep'))
+        return self.get_field('linear deps')
 
     def get_scf_type(self):
         '''
         Get the information on SCFTYP used in the gamess job.
         '''
 
-        regex = r'.*SCFTYP=(?P<scftyp>[A-Z]+)'
-        match = self.parse(regex)
-        if match:
-            return match.group("scftyp")
+        return self.get_field('scftyp')
 
     def get_cc_type(self):
         '''
         Get the information on CCTYP used in the gamess job.
         '''
 
-        regex = r'.*CCTYP =(?P<cctyp>[A-Z\(\)\-]+)'
-        match = self.parse(regex)
-        if match:
-            return match.group("cctyp")
-        else:
-            return None
+        return self.get_field('cctyp')
 
     def get_ci_type(self):
         '''
         Get the information on CITYP used in the gamess job.
         '''
 
-        regex = r'.*CITYP =(?P<cityp>[A-Z]+)'
-        match = self.parse(regex)
-        if match:
-            return match.group("cityp")
+        return self.get_field('cityp')
 
     def get_mplevel(self):
         '''
         Get the information on MPLEVL used in the gamess job.
         '''
 
-        regex = r'.*MPLEVL=\s*(?P<mplevl>\d+)'
-        match = self.parse(regex)
-        if match:
-            return int(match.group("mplevl"))
+        return self.get_field('mplevl')
 
     def get_hf_total_energy(self):
         '''
         Return the total HF energy.
         '''
 
-        regex = r'FINAL R[O]*HF ENERGY IS\s+(?P<energy>\-?\d+\.\d+)'
-        match = self.parse(regex)
-        if match:
-            return float(match.group("energy"))
+        return self.get_field('hf total energy')
 
     def get_cc_total_energy(self):
         '''
@@ -666,10 +951,7 @@ class GamessLogParser(object):
         energy.
         '''
 
-        regex = r'COUPLED-CLUSTER ENERGY E(.*?)\s*=\s*(?P<energy>\-?\d+\.\d+)'
-        match = self.parse(regex)
-        if match:
-            return float(match.group("energy"))
+        return self.get_field('cc total energy')
 
     def get_energy_components(self, method):
         '''
@@ -688,6 +970,13 @@ class GamessLogParser(object):
         else:
             sys.exit("Wrong method in <get_energy_components>: {0:s}".format(method))
 
+        if self.indexed:
+            found = [(lno, off) for lno, off, line in self.index['lines']
+                     if header in line]
+            if found:
+                return parsepairs(self.readlines(found[0][1], 1, 22))
+            return parsepairs([])
+
         with open(self.logfile, 'r') as log:
             data = log.readlines()
 
@@ -704,7 +993,7 @@ class GamessLogParser(object):
         lz_patt = re.compile(mos + weights)
 
         locstr = self.get_loc_strings('lz values')
-        lines = getlines(self.logfile, locstr)
+        lines = self.getlines(locstr)
 
         res = list()
         for line in lines:
@@ -729,7 +1018,7 @@ class GamessLogParser(object):
         if orbs == 'local orbs':
             istart = 1
         locstr = self.get_loc_strings(orbs)
-        lines = getlines(self.logfile, locstr)
+        lines = self.getlines(locstr)
         lines = lines[istart:istart + self.get_number_of_aos()]
 
         res = list()
@@ -796,7 +1085,7 @@ class GamessLogParser(object):
         '''
 
         locstr = self.get_loc_strings(orbs)
-        lines = getlines(self.logfile, locstr)
+        lines = self.getlines(locstr)
         lines = [l for l in lines if len(l) > minlength]
 
         nao = self.get_number_of_aos()
@@ -819,7 +1108,7 @@ class GamessLogParser(object):
         '''
 
         locstr = self.get_loc_strings('ci coeffs')
-        lines = getlines(self.logfile, locstr)
+        lines = self.getlines(locstr)
 
         patt = re.compile(r'\s*(\d+)\s*(-?\d*\.\d+)')
         index = []
@@ -838,7 +1127,7 @@ class GamessLogParser(object):
         '''
 
         locstr = self.get_loc_strings('csfs')
-        lines = getlines(self.logfile, locstr)
+        lines = self.getlines(locstr)
 
         ne = self.get_electrons() - 2 * self.get_number_of_core_mos()
 
@@ -938,11 +1227,29 @@ def det_to_spin_coupling(det, norb):
     return sc
 
 
+# headers preceding the $VEC sections with orbitals of different methods
+DAT_HEADERS = OrderedDict([
+    ('scf', ('ORBITALS ---', 'SCF')),
+    ('ci', ('NO-S', 'CI')),
+    ('mcscfmos', ('OPTIMIZED MCSCF MO-S', 'MCSCF')),
+    ('mcscfnos', ('NATURAL ORBITALS OF MCSCF', 'MCSCF')),
+    ('local', ('LOCALIZED ORBITALS', 'LOCALIZED')),
+])
+
+DAT_METHODS = {
+    'scf': 'scf', 'hf': 'scf', 'rhf': 'scf', 'rohf': 'scf', 'uhf': 'scf',
+    'gvb': 'scf', 'ci': 'ci', 'aldet': 'ci', 'fsoci': 'ci', 'guga': 'ci',
+    'genci': 'ci', 'ormas': 'ci', 'mcscfmos': 'mcscfmos',
+    'mcscfnos': 'mcscfnos', 'local': 'local',
+}
+
+
 class GamessDatParser(object):
     'Parser for the GAMESS(US) dat (.F10) file'
 
     def __init__(self, datfile):
         self.datfile = datfile
+        self._index = None
 
     @property
     def datfile(self):
@@ -953,24 +1260,93 @@ class GamessDatParser(object):
     def datfile(self, value):
         if os.path.exists(value):
             self._datfile = value
+            self._index = None
         else:
             raise ValueError("File: {} does not exist".format(value))
 
-    def get_occupations(self):
+    @property
+    def index(self):
         '''
-        Parse the occupation numbers from the ascii PUNCH file (.dat).
+        Return the index of the dat file, (re)building it if the file changed
+        since the last scan.
         '''
 
-        with open(self.datfile, 'r') as dat:
+        stat = os.stat(self.datfile)
+        if self._index is None or \
+                self._index['stat'] != (stat.st_mtime_ns, stat.st_size):
+            self._index = self.build_index()
+            self._index['stat'] = (stat.st_mtime_ns, stat.st_size)
+        return self._index
+
+    def build_index(self):
+        '''
+        Read the dat file once and return the index of all the $VEC and $OCC
+        sections.
+
+        Returns:
+            index : dict
+                Dictionary with ``headers`` holding the byte offsets of the
+                first occurrence of each of the ``DAT_HEADERS`` (``-1`` if
+                absent) and ``sections`` holding a list of dicts with the
+                ``name`` of the section (``VEC``, ``OCC`` or ``OCCNO``), the
+                ``title`` line preceding it and the ``start``, ``end`` byte
+                offsets of its contents
+        '''
+
+        with open(self.datfile, 'rb') as dat:
             data = dat.read()
 
-        no_patt = re.compile(r'\$OCC(NO)?(?P<occ>.*?)\$END', flags=re.DOTALL)
-        match = no_patt.search(data)
-        nooc = list()
-        if match:
-            for line in match.group("occ").split('\n'):
-                nooc.extend([float(x) for x in line.split()])
-            return np.asarray(nooc)
+        headers = {key: data.find(header.encode())
+                   for key, (header, _) in DAT_HEADERS.items()}
+
+        sections = []
+        previous = 0
+        for match in re.finditer(rb'\$(VEC|OCCNO|OCC)', data):
+            end = data.find(b'$END', match.end())
+            if end == -1:
+                continue
+
+            # gamess precedes the sections with a title line starting with
+            # "---" or "- - -"
+            title = None
+            for line in reversed(data[previous:match.start()].splitlines()):
+                if line.startswith(b'-'):
+                    title = line.decode('utf-8', 'replace').strip()
+                    break
+
+            sections.append({'name': match.group(1).decode(), 'title': title,
+                             'start': match.end(), 'end': end})
+            previous = end
+
+        return {'headers': headers, 'sections': sections}
+
+    def get_sections(self, name=None):
+        '''
+        Return the list of indexed sections, optionally only the ones called
+        ``name`` (``VEC``, ``OCC`` or ``OCCNO``)
+        '''
+
+        return [sec for sec in self.index['sections']
+                if name is None or sec['name'] == name.upper()]
+
+    def read_section(self, section):
+        '''
+        Return the contents of the indexed ``section`` as a string
+        '''
+
+        with open(self.datfile, 'rb') as dat:
+            dat.seek(section['start'])
+            return dat.read(section['end'] - section['start']).decode()
+
+    def get_occupations(self):
+        '''
+        Parse the occupation numbers from the ascii PUNCH file (.dat).
+        '''
+
+        occs = [sec for sec in self.index['sections']
+                if sec['name'] in ('OCC', 'OCCNO')]
+        if occs:
+            return np.asarray(self.read_section(occs[0]).split(), dtype=float)
         else:
             raise ValueError('No section with occupation numbers found.')
 
@@ -1003,37 +1379,21 @@ class GamessDatParser(object):
               expansion coefficients
         '''
 
-        with open(self.datfile, 'r') as dat:
-            data = dat.read()
+        key = DAT_METHODS.get(method.lower())
+        if key is None:
+            raise ValueError("Don't know what to do with: '{0:s}'".format(method))
 
-        if method.lower() in ['scf', 'hf', 'rhf', 'rohf', 'uhf', 'gvb']:
-            try:
-                orbi = data.index('ORBITALS ---')
-            except:
-                raise ValueError('SCF orbitals header not found, check dat file')
-        elif method.lower() in ['ci', 'aldet', 'fsoci', 'guga', 'genci', 'ormas']:
-            try:
-                orbi = data.index('NO-S')
-            except:
-                raise ValueError('CI orbitals header not found, check dat file')
-        elif method.lower() == 'mcscfmos':
-            try:
-                orbi = data.index('OPTIMIZED MCSCF MO-S')
-            except:
-                raise ValueError('MCSCF orbitals header not found, check dat file')
-        elif method.lower() == 'mcscfnos':
-            try:
-                orbi = data.index('NATURAL ORBITALS OF MCSCF')
-            except:
-                raise ValueError('MCSCF orbitals header not found, check dat file')
-        elif method.lower() == 'local':
-            try:
-                orbi = data.index('LOCALIZED ORBITALS')
-            except:
-                raise ValueError('LOCALIZED orbitals header not found, check dat file')
+        orbi = self.index['headers'][key]
+        if orbi == -1:
+            raise ValueError('{} orbitals header not found, check dat file'.format(
+                DAT_HEADERS[key][1]))
+
+        vecs = [sec for sec in self.index['sections']
+                if sec['name'] == 'VEC' and sec['start'] > orbi]
+        if vecs:
+            vecstr = self.read_section(vecs[0]).strip(" \n\t\r")
         else:
-            raise ValueError("Don't know what to do with: '{0:s}'".format(method))
-        vecstr = slicebetween(data[orbi:], '$VEC', '$END').strip(" \n\t\r")
+            vecstr = ''
         if vecstr == "":
             raise ValueError("No $VEC section found for method: '{0:s}'".format(method))
         else:
@@ -1087,17 +1447,20 @@ class GamessDatParser(object):
             expansion coefficients
         '''
 
-        naos, nmos, nlines = get_naos_nmos(vecstr)
-        orblines = vecstr.split('\n')
-        orbs = np.zeros((naos, nmos), dtype=float)
-        counter = -1
-        for i in range(0, nmos):
-            for j in range(0, nlines):
-                counter += 1
-                nitems = int(len(orblines[counter][5:])) // clength
-                orbs[5 * j: 5 * (j + 1), i] = \
-                    [float(orblines[counter][5 + 15 * n: 5 + 15 * (n + 1)])
-                     for n in range(nitems)]
+        naos, nmos, nlines = get_naos_nmos(vecstr, clength=clength)
+
+        # pad every line to the full width of 5 coefficients and view the
+        # block as a fixed width array of coefficient fields, the first 5
+        # characters of each line holding the MO and line labels are dropped
+        width = 5 + 5 * clength
+        orblines = vecstr.rstrip('\n').split('\n')[:nmos * nlines]
+        block = ''.join(line.rstrip('\r')[:width].ljust(width)
+                        for line in orblines).encode('ascii')
+        fields = np.frombuffer(block, dtype='S{:d}'.format(width))
+        fields = fields.view('S1').reshape(-1, width)[:, 5:]
+        fields = np.ascontiguousarray(fields).view('S{:d}'.format(clength))
+        fields = fields.reshape(nmos, 5 * nlines)[:, :naos]
+        orbs = fields.astype(float).T
         return orbs
 
 
@@ -1122,18 +1485,18 @@ def get_naos_nmos(vecstr, clength=15):
             number of lines per molecular orbital
     '''
 
-    veclines = vecstr.split('\n')
+    veclines = vecstr.rstrip('\r\n').split('\n')
     noveclines = len(veclines)
     lineit = iter(veclines)
     nlines = 0
 
-    while next(lineit)[:2].strip() == '1':
+    while next(lineit, '')[:2].strip() == '1':
         nlines += 1
 
     if nlines == 0:
         raise ValueError("'nlines' cannot be zero, check vecstr in 'get_naos_nmos'")
 
-    naos = 5 * (nlines - 1) + len(vecstr.split('\n')[nlines - 1][5:]) // clength
+    naos = 5 * (nlines - 1) + len(veclines[nlines - 1].rstrip('\r')[5:]) // clength
     nmos = noveclines // nlines
     return naos, nmos, nlines
 
@@ -1162,19 +1525,19 @@ def to_gamess_vec(coeffs, cfmt='15.8e'):
     nao, nmo = coeffs.shape
 
     if nao % 5 == 0:
-        nlines = nao / 5
+        nlines = nao // 5
     else:
-        nlines = 1 + nao / 5
+        nlines = 1 + nao // 5
 
     vec = ''
     for i in range(nmo):
         if i + 1 >= 100:
-            ilab = i + 1 % 100
+            ilab = (i + 1) % 100
         else:
             ilab = i + 1
         for l in range(nlines):
             if l + 1 > 1000:
-                llab = l + 1 % 1000
+                llab = (l + 1) % 1000
             else:
                 llab = l + 1
             if l < nlines - 1:
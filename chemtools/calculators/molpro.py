@@ -24,7 +24,7 @@
 
 from __future__ import print_function
 
-from subprocess import Popen, call
+from subprocess import call
 import os
 
 from .calculator import Calculator, InputTemplate, parse_objective
@@ -85,24 +85,19 @@ class Molpro(Calculator):
 
         return outfile
 
-    def run_multiple(self, inputs):
+    def get_job(self, inpfile):
         '''
-        Run a single molpro job interactively - without submitting to the queue.
+        Return the command, output file and stdout file for the ``inpfile``,
+        the stdout and stderr are redirected to ``<input name>.out``
         '''
 
-        procs = []
-        outputs = [os.path.splitext(inp)[0] + ".out" for inp in inputs]
-        for inpfile, outfile in zip(inputs, outputs):
-            opts = []
-            opts.extend([self.executable, inpfile] + self.runopts)
-            out = open(outfile, 'w')
-            process = Popen(opts, stdout=out, stderr=out)
-            out.close()
-            procs.append(process)
-
-        for p in procs: p.wait()
+        if "-o" in self.runopts:
+            outfile = self.runopts[self.runopts.index("-o") + 1]
+        else:
+            outfile = os.path.splitext(inpfile)[0] + ".out"
 
-        return outputs
+        logfile = os.path.splitext(inpfile)[0] + ".out"
+        return [self.executable, inpfile] + self.runopts, outfile, logfile
 
     def accomplished(self, fname):
         '''
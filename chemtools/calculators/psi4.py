@@ -23,7 +23,7 @@
 #SOFTWARE.
 
 from __future__ import print_function
-from subprocess import Popen, call
+from subprocess import call
 import os
 
 from .calculator import Calculator, InputTemplate, parse_objective
@@ -53,25 +53,19 @@ class Psi4(Calculator):
 
         return outfile
 
-    def run_multiple(self, inputs):
+    def get_job(self, inpfile):
         '''
-        Run a single Psi4 job interactively - without submitting to the queue.
+        Return the command, output file and stdout file for the ``inpfile``,
+        the stdout and stderr are redirected to ``<input name>.out``
         '''
 
-        procs = []
-        outputs = [os.path.splitext(inp)[0] + ".out" for inp in inputs]
-        for inpfile, outfile in zip(inputs, outputs):
-            opts = []
-            opts.extend([self.executable, inpfile] + self.runopts)
-            out = open(outfile, 'w')
-            process = Popen(opts, stdout=out, stderr=out)
-            out.close()
-            procs.append(process)
+        outfile = os.path.splitext(inpfile)[0] + ".out"
+        return [self.executable, inpfile] + self.runopts, outfile, outfile
 
-        for proc in procs:
-            proc.wait()
+    def get_scratch_env(self, scratch):
+        'Return the environment variables setting the Psi4 scratch'
 
-        return outputs
+        return {'PSI_SCRATCH': scratch}
 
     def write_input(self, fname, template, mol=None, basis=None, core=None):
         '''
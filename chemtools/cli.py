@@ -3,10 +3,17 @@
 from __future__ import print_function
 
 from argparse import ArgumentParser
+from collections import OrderedDict
+import concurrent.futures
+import glob
 import os
+import stat
 import sys
+import tempfile
+import time
 
 from chemtools.basisset import BasisSet
+from chemtools.basisstore import BasisStore, to_list, write_binary
 
 
 def bsprint():
@@ -34,55 +41,282 @@ def bsprint():
         print(method())
 
 
+# extensions of the files written in the batch mode
+EXTENSIONS = {'binary': 'bsb', 'cfour': 'cfour', 'dalton': 'dalton',
+              'gamessus': 'gamessus', 'gaussian': 'gbs', 'json': 'json',
+              'molpro': 'molpro', 'nwchem': 'nwchem', 'pickle': 'pkl'}
+
+
+def load_bases(fname, fmt, name):
+    '''
+    Read the basis sets from the file ``fname`` in format ``fmt`` and return
+    them as a list
+    '''
+
+    if fmt == "pickle":
+        bsets = BasisSet.from_pickle(fname)
+    elif fmt == "json":
+        bsets = BasisSet.from_json(fname)
+    elif fmt == "binary":
+        bsets = BasisStore(fname).to_list()
+    else:
+        bsets = BasisSet.from_file(fname=fname, fmt=fmt, name=name)
+
+    if not isinstance(bsets, (BasisSet, dict, list)):
+        raise ValueError('Something went wrong')
+    return to_list(bsets)
+
+
+def expand_inputs(patterns):
+    '''
+    Return the list of files matching ``patterns``, every pattern can be a
+    file name, a glob or a directory in which case all the regular files in
+    it that are not hidden are taken
+    '''
+
+    fnames = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, f) for f in os.listdir(pattern)
+                       if not f.startswith('.')]
+            matches = [f for f in matches if os.path.isfile(f)]
+        elif glob.has_magic(pattern):
+            matches = [f for f in glob.glob(pattern) if os.path.isfile(f)]
+        else:
+            matches = [pattern]
+        fnames.extend(sorted(matches))
+    return list(OrderedDict.fromkeys(fnames))
+
+
+def atomic_write(fname, write):
+    '''
+    Write the file ``fname`` atomically, ``write`` is called with the name of
+    a temporary file in the same directory that then replaces ``fname``, the
+    file gets the mode of the replaced file or the default mode for new
+    files given by the umask
+    '''
+
+    dirname, basename = os.path.split(os.path.abspath(fname))
+    if os.path.exists(fname):
+        mode = stat.S_IMODE(os.stat(fname).st_mode)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmpname = tempfile.mkstemp(prefix='.' + basename + '.', suffix='.tmp',
+                                   dir=dirname)
+    os.close(fd)
+    try:
+        write(tmpname)
+        os.chmod(tmpname, mode)
+        os.replace(tmpname, fname)
+    except BaseException:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+
+
+def write_text(string):
+    'Return a function writing ``string`` to a file'
+
+    def write(fname):
+        with open(fname, 'w') as fobj:
+            fobj.write(string)
+    return write
+
+
+def convert_file(fname, inputformat, outputformats, outdir):
+    '''
+    Convert the basis sets from a single file to all the ``outputformats``,
+    text and pickle outputs are written per element as
+    ``<stem>_<element>.<ext>`` with the basis set name appended for elements
+    occurring more than once and the binary output as a single
+    ``<stem>.bsb`` file
+
+    Returns:
+        (nbases, outputs) : tuple
+            Number of basis sets read and list of the written files
+    '''
+
+    stem = os.path.splitext(os.path.basename(fname))[0]
+    bsets = load_bases(fname, inputformat, stem)
+
+    elements = [bset.element for bset in bsets]
+    labels = [stem + '_' + bset.element if elements.count(bset.element) == 1
+              else '{}_{}_{}'.format(stem, bset.element, bset.name)
+              for bset in bsets]
+
+    outputs = []
+    for fmt in outputformats:
+        if fmt == "binary":
+            out = os.path.join(outdir, stem + '.' + EXTENSIONS[fmt])
+            atomic_write(out, lambda tmp: write_binary(bsets, tmp))
+            outputs.append(out)
+            continue
+        for label, bset in zip(labels, bsets):
+            out = os.path.join(outdir, label + '.' + EXTENSIONS[fmt])
+            if fmt == "pickle":
+                atomic_write(out, bset.to_pickle)
+            else:
+                atomic_write(out, write_text(getattr(bset, "to_" + fmt)() + '\n'))
+            outputs.append(out)
+    return len(bsets), outputs
+
+
+def convert_batch(fnames, inputformat, outputformats, outdir, workers=None,
+                  stream=None):
+    '''
+    Convert many files with a pool of ``workers`` processes, see
+    :py:func:`convert_file`, the progress and the summary are printed to
+    ``stream``, by default ``sys.stderr``
+
+    Returns:
+        failed : list
+            Tuples with the names of the files that could not be converted
+            and the error messages
+
+    Raises:
+        ValueError if the outputs of two files would have the same names
+    '''
+
+    stems = OrderedDict()
+    for fname in fnames:
+        stem = os.path.splitext(os.path.basename(fname))[0]
+        stems.setdefault(stem, []).append(fname)
+    clashes = [fns for fns in stems.values() if len(fns) > 1]
+    if clashes:
+        raise ValueError('files with the same name would overwrite each '
+                         'other\'s outputs: {}'.format(
+                             '; '.join(', '.join(fns) for fns in clashes)))
+
+    if stream is None:
+        stream = sys.stderr
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+
+    if workers is None:
+        workers = os.cpu_count()
+    workers = max(1, min(workers, len(fnames)))
+
+    def report(fname, result, error):
+        if error is None:
+            print('[{0:d}/{1:d}] {2:s}: {3:d} basis sets -> {4:d} files'.format(
+                len(results), len(fnames), fname, result[0], len(result[1])),
+                file=stream)
+        else:
+            print('[{0:d}/{1:d}] {2:s}: failed: {3!s}'.format(
+                len(results), len(fnames), fname, error), file=stream)
+
+    start = time.time()
+    args = (inputformat, outputformats, outdir)
+    results = []
+    if workers == 1:
+        for fname in fnames:
+            try:
+                results.append((fname, convert_file(fname, *args), None))
+            except Exception as exc:
+                results.append((fname, None, exc))
+            report(*results[-1])
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(convert_file, fname, *args): fname
+                       for fname in fnames}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results.append((futures[future], future.result(), None))
+                except Exception as exc:
+                    results.append((futures[future], None, exc))
+                report(*results[-1])
+    elapsed = time.time() - start
+
+    failed = [(fname, str(error)) for fname, _, error in results
+              if error is not None]
+    nbases = sum(result[0] for _, result, error in results if error is None)
+    noutputs = sum(len(result[1]) for _, result, error in results
+                   if error is None)
+    print('converted {0:d} of {1:d} files ({2:d} basis sets) to {3:d} files '
+          'in {4:.2f} s, {5:.1f} files/s with {6:d} processes'.format(
+              len(fnames) - len(failed), len(fnames), nbases, noutputs,
+              elapsed, len(fnames) / max(elapsed, 1.0e-9), workers),
+          file=stream)
+    return failed
+
+
 def bsconvert():
     '''
     CLI script to convert between different basis set formats
+
+    With many input files, directories or globs, many output formats or the
+    ``--outdir`` option the files are converted in parallel to separate files
+    per element and format, see :py:func:`convert_batch`
     '''
 
     parser = ArgumentParser(description='Convert basis set between formats of different programs')
-    parser.add_argument("filename",
-                        help="file name with a basis set, default='pickle'")
+    parser.add_argument("filenames", nargs='+', metavar="filename",
+                        help="file names, globs or directories with basis "
+                             "sets, default format='pickle'")
     parser.add_argument("-from",
                         "--inputformat",
-                        choices=["gamessus", "gaussian", "json", "molpro",
-                                 "pickle"],
+                        choices=["binary", "gamessus", "gaussian", "json",
+                                 "molpro", "pickle"],
                         help="Basis set input format",
                         default="pickle")
     parser.add_argument("-to",
                         "--outputformat",
-                        choices=["cfour", "dalton", "gamessus", "gaussian",
-                                 "json", "molpro", "nwchem", "pickle"],
-                        help="Basis set output format",
-                        default="molpro")
+                        action='append',
+                        choices=["binary", "cfour", "dalton", "gamessus",
+                                 "gaussian", "json", "molpro", "nwchem",
+                                 "pickle"],
+                        help="Basis set output format, can be repeated to "
+                             "convert to many formats, default='molpro'")
     parser.add_argument('-o', '--output', help='name of the output file')
+    parser.add_argument('-d', '--outdir',
+                        help='output directory of the batch conversion')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of processes of the batch conversion, '
+                             'default: number of CPUs')
     args = parser.parse_args()
+    if args.outputformat is None:
+        args.outputformat = ["molpro"]
+    args.outputformat = list(OrderedDict.fromkeys(args.outputformat))
 
-    name = os.path.splitext(args.filename)[0]
+    fnames = expand_inputs(args.filenames)
+    batch = len(fnames) != 1 or len(args.outputformat) > 1 or \
+        args.outdir is not None or os.path.isdir(args.filenames[0])
 
-    if args.inputformat == "pickle":
-        bsets = BasisSet.from_pickle(args.filename)
-    elif args.inputformat == "json":
-        bsets = BasisSet.from_json(args.filename)
-    else:
-        bsets = BasisSet.from_file(fname=args.filename, fmt=args.inputformat,
-                                   name=name)
-
-    if args.outputformat == "pickle":
-        if isinstance(bsets, dict):
-            for elem, bset in bsets.items():
-                bset.to_pickle(name + '_' + elem + '.pkl')
-        elif isinstance(bsets, BasisSet):
-            bsets.to_pickle(name + '_' + bsets.element + '.pkl')
+    if batch:
+        if args.output:
+            parser.error('--output cannot be used with many files or formats, '
+                         'use --outdir')
+        if not fnames:
+            parser.error('no files matching: {}'.format(
+                ', '.join(args.filenames)))
+        outdir = args.outdir if args.outdir is not None else os.getcwd()
+        try:
+            failed = convert_batch(fnames, args.inputformat,
+                                   args.outputformat, outdir,
+                                   workers=args.jobs)
+        except ValueError as exc:
+            parser.error(str(exc))
+        return 1 if failed else 0
+
+    filename = fnames[0]
+    outputformat = args.outputformat[0]
+    # outputs are written next to the input, the basis sets are named after
+    # the file stem as in the batch mode
+    name = os.path.splitext(filename)[0]
+
+    bsets = load_bases(filename, args.inputformat, os.path.basename(name))
+
+    if outputformat == "pickle":
+        for bset in bsets:
+            bset.to_pickle(name + '_' + bset.element + '.pkl')
+    elif outputformat == "binary":
+        write_binary(bsets, args.output if args.output else name + '.bsb')
     else:
-        writer_name = "to_" + args.outputformat
-        writer_objs = []
-        if isinstance(bsets, dict):
-            for elem, bset in bsets.items():
-                writer_objs.append(getattr(bset, writer_name))
-        elif isinstance(bsets, BasisSet):
-            writer_objs.append(getattr(bsets, writer_name))
-        else:
-            raise ValueError('Something went wrong')
+        writer_name = "to_" + outputformat
+        writer_objs = [getattr(bset, writer_name) for bset in bsets]
 
         if args.output:
             fobj = open(args.output, 'w')
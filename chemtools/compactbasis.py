@@ -0,0 +1,523 @@
+# -*- coding: utf-8 -*-
+
+#The MIT License (MIT)
+#
+#Copyright (c) 2014 Lukasz Mentel
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+'''
+Array backed basis set representation.
+
+:py:class:`CompactBasisSet` has the same interface as
+:py:class:`chemtools.basisset.BasisSet` but every shell is stored as a
+:py:class:`Shell` holding the exponents and all the contraction coefficients
+in a few flat arrays instead of a list of small structured arrays per
+contracted function.
+'''
+
+from __future__ import division, print_function
+
+import json
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from chemtools.basisparse import CFDTYPE, NumpyEncoder, get_l, merge_exponents
+from chemtools.basisset import BasisSet, primitive_overlap
+
+
+@lru_cache(maxsize=None)
+def uncontracted_arrays(nexp):
+    '''
+    Return the read-only ``indptr``, ``indices`` and ``coeffs`` arrays of an
+    uncontracted shell with ``nexp`` exponents, the arrays are shared by all
+    the uncontracted shells of the same size
+    '''
+
+    arrays = (np.arange(nexp + 1, dtype=np.int32),
+              np.arange(nexp, dtype=np.int32),
+              np.ones(nexp, dtype=np.float64))
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+def shared_copy(array):
+    'Return a copy of the ``array`` unless it is read-only and can be shared'
+
+    return array if not array.flags.writeable else array.copy()
+
+
+class Shell(object):
+    '''
+    Exponents and contraction coefficients of a single shell
+
+    The contracted functions are stored in the compressed sparse row (CSR)
+    layout, the indices of the exponents and the coefficients of the
+    contracted function ``i`` are ``indices[indptr[i]:indptr[i + 1]]`` and
+    ``coeffs[indptr[i]:indptr[i + 1]]`` respectively.
+
+    The arrays of uncontracted shells are shared, see
+    :py:func:`uncontracted_arrays`, so they are read-only and should be
+    replaced rather than modified in place.
+
+    For compatibility with :py:class:`chemtools.basisset.BasisSet` the shell
+    can be indexed like the dict ``{'e': ..., 'cf': [...]}``, note that
+    ``shell['cf']`` returns a new list of ``CFDTYPE`` arrays every time so
+    modifying them does not change the shell. Assigning ``shell['e']`` keeps
+    uncontracted shells uncontracted and raises ``ValueError`` if the
+    contracted functions refer to exponents that would no longer exist.
+
+    Args:
+        e : numpy.array
+            Exponents
+        indptr : numpy.array
+            Offsets of the contracted functions in ``indices`` and ``coeffs``,
+            if ``None`` the shell is uncontracted
+        indices : numpy.array
+            Indices of the exponents
+        coeffs : numpy.array
+            Contraction coefficients
+    '''
+
+    __slots__ = ('e', 'indptr', 'indices', 'coeffs')
+
+    def __init__(self, e, indptr=None, indices=None, coeffs=None):
+
+        self.e = np.asarray(e, dtype=np.float64)
+        if indptr is None:
+            self.indptr, self.indices, self.coeffs = uncontracted_arrays(self.e.size)
+        else:
+            self.indptr = np.asarray(indptr, dtype=np.int32)
+            self.indices = np.asarray(indices, dtype=np.int32)
+            self.coeffs = np.asarray(coeffs, dtype=np.float64)
+            identity = uncontracted_arrays(self.e.size)
+            if all(np.array_equal(a, b) for a, b in
+                   zip((self.indptr, self.indices, self.coeffs), identity)):
+                self.indptr, self.indices, self.coeffs = identity
+
+    @classmethod
+    def from_dict(cls, fs):
+        '''
+        Create the shell from the ``{'e': ..., 'cf': [...]}`` dict used by
+        :py:class:`chemtools.basisset.BasisSet`, a shell without the ``cf``
+        key is uncontracted
+        '''
+
+        if isinstance(fs, Shell):
+            return fs.copy()
+
+        if 'cf' not in fs:
+            return cls(fs['e'])
+
+        sizes = [cf.size for cf in fs['cf']]
+        indptr = np.zeros(len(sizes) + 1, dtype=np.int32)
+        np.cumsum(sizes, out=indptr[1:])
+        if sizes:
+            indices = np.concatenate([cf['idx'] for cf in fs['cf']])
+            coeffs = np.concatenate([cf['cc'] for cf in fs['cf']])
+        else:
+            indices, coeffs = [], []
+        return cls(fs['e'], indptr, indices, coeffs)
+
+    def to_dict(self):
+        'Return the shell as the dict used by BasisSet'
+
+        return {'e': self.e.copy(), 'cf': self.cf}
+
+    @property
+    def cf(self):
+        'List of the contracted functions as ``CFDTYPE`` arrays'
+
+        buff = np.empty(self.indices.size, dtype=CFDTYPE)
+        buff['idx'] = self.indices
+        buff['cc'] = self.coeffs
+        return np.split(buff, self.indptr[1:-1])
+
+    @property
+    def ncf(self):
+        'Number of contracted functions'
+        return self.indptr.size - 1
+
+    @property
+    def rows(self):
+        'Index of the contracted function of every stored coefficient'
+        return np.repeat(np.arange(self.ncf), np.diff(self.indptr))
+
+    @property
+    def nbytes(self):
+        'Number of bytes of the arrays'
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def __getitem__(self, key):
+
+        if key == 'e':
+            return self.e
+        elif key == 'cf':
+            return self.cf
+        else:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+
+        if key == 'e':
+            e = np.asarray(value, dtype=np.float64)
+            if self.indptr is uncontracted_arrays(self.e.size)[0]:
+                # uncontracted shells stay uncontracted
+                self.indptr, self.indices, self.coeffs = uncontracted_arrays(e.size)
+            elif self.indices.size > 0 and self.indices.max() >= e.size:
+                raise ValueError('{} exponents given but the contracted '
+                                 'functions use {}'.format(
+                                     e.size, self.indices.max() + 1))
+            self.e = e
+        elif key == 'cf':
+            new = Shell.from_dict({'e': self.e, 'cf': value})
+            self.indptr, self.indices, self.coeffs = new.indptr, new.indices, new.coeffs
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in ('e', 'cf')
+
+    def keys(self):
+        'Keys of the equivalent dict'
+        return ['e', 'cf']
+
+    def __len__(self):
+        return 2
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Shell):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, name), getattr(other, name))
+                   for name in self.__slots__)
+
+    def __ne__(self, other):
+
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        'Return a copy of the shell'
+
+        return Shell(self.e.copy(), shared_copy(self.indptr),
+                     shared_copy(self.indices), shared_copy(self.coeffs))
+
+    def contraction_matrix(self):
+        '''
+        Return the contraction coefficients as a matrix of the shape
+        ``(nexponents, ncontracted)``
+        '''
+
+        out = np.zeros((self.e.size, self.ncf), dtype=np.float64)
+        out[self.indices, self.rows] = self.coeffs
+        return out
+
+    def concatenate(self, other, idxs=None, idxo=None, exps=None):
+        '''
+        Return a new shell with the contracted functions of ``other``
+        appended
+
+        Args:
+            other : Shell
+                Shell to append
+            idxs : numpy.array
+                New positions of the exponents of this shell, by default the
+                exponents of ``other`` are appended after the ones from this
+                shell
+            idxo : numpy.array
+                New positions of the exponents of ``other``
+            exps : numpy.array
+                Exponents of the new shell, required with ``idxs`` and
+                ``idxo``
+        '''
+
+        if idxs is None:
+            exps = np.concatenate((self.e, other.e))
+            indices = np.concatenate((self.indices, other.indices + self.e.size))
+        else:
+            indices = np.concatenate((idxs[self.indices], idxo[other.indices]))
+
+        indptr = np.concatenate((self.indptr, other.indptr[1:] + self.indptr[-1]))
+        return Shell(exps, indptr, indices,
+                     np.concatenate((self.coeffs, other.coeffs)))
+
+    def __repr__(self):
+        return 'Shell(nexp={0:d}, ncf={1:d}, nnz={2:d})'.format(
+            self.e.size, self.ncf, self.indices.size)
+
+
+class CompactBasisSet(BasisSet):
+    '''
+    Basis set with the shells stored in flat arrays, see :py:class:`Shell`
+
+    The interface is the same as for :py:class:`chemtools.basisset.BasisSet`,
+    the ``functions`` can be assigned with the usual dict of dicts that is
+    converted to :py:class:`Shell` objects.
+    '''
+
+    @property
+    def functions(self):
+        'Return the ``OrderedDict`` of shells'
+        return self._functions
+
+    @functions.setter
+    def functions(self, value):
+
+        if value is None:
+            value = OrderedDict()
+        self._functions = OrderedDict((shell, Shell.from_dict(fs))
+                                      for shell, fs in value.items())
+
+    @classmethod
+    def from_basisset(cls, basis):
+        'Create the compact representation of a BasisSet object'
+
+        return cls(name=basis.name, element=basis.element,
+                   family=basis.family, kind=basis.kind,
+                   functions=basis.functions, info=basis.info)
+
+    def to_basisset(self):
+        'Return an equivalent BasisSet object'
+
+        return BasisSet(name=self.name, element=self.element,
+                        family=self.family, kind=self.kind,
+                        functions=OrderedDict((shell, fs.to_dict())
+                                              for shell, fs in self.functions.items()),
+                        info=self.info)
+
+    def __add__(self, other):
+        '''Add functions from another BasisSet object
+
+        Args:
+          other : BasisSet
+            BasisSet object whose functions will be added to the existing ones
+
+        Returns:
+          CompactBasisSet instance with functions from `self` and `other`
+          merged
+        '''
+
+        res = CompactBasisSet(name=self.name, element=self.element,
+                              functions=self.functions)
+        res.append(other)
+        return res
+
+    def append(self, other):
+        '''Append functions from another BasisSet object
+
+        Args:
+          other : BasisSet
+            BasisSet object whose functions will be added to the existing ones
+        '''
+
+        for oshell, ofs in other.functions.items():
+            ofs = Shell.from_dict(ofs)
+            if oshell.lower() in self.functions.keys():
+                self._functions[oshell] = self.functions[oshell].concatenate(ofs)
+            else:
+                self._functions[oshell] = ofs
+
+    def merge(self, other):
+        '''
+        Merge functions from another BasisSet object, the exponents common to
+        both are not duplicated, see :py:func:`chemtools.basisset.merge`
+
+        Args:
+          other : BasisSet
+            BasisSet object whose functions will be merged
+
+        Returns:
+          out : CompactBasisSet
+        '''
+
+        res = CompactBasisSet(name=self.name, element=self.element,
+                              functions=self.functions)
+        for oshell, ofs in other.functions.items():
+            ofs = Shell.from_dict(ofs)
+            if oshell.lower() in res.functions.keys():
+                fs = res.functions[oshell]
+                exps, idxs, idxo = merge_exponents(fs.e, ofs.e)
+                res._functions[oshell] = fs.concatenate(ofs, np.asarray(idxs),
+                                                        np.asarray(idxo), exps)
+            else:
+                res._functions[oshell] = ofs
+        return res
+
+    def contraction_matrix(self, shell):
+        '''
+        Return the contraction coefficients for a given shell in a
+        matrix form with size `ne * nc`, where `ne` is the number of
+        exponents and `nc` is the number of contracted functions
+
+        Args:
+          shell : str
+            shell label, *s*, *p*, *d*, ...
+
+        Returns:
+          out : 2D numpy.array
+            2D array with contraction coefficients
+        '''
+
+        if shell in self.functions.keys():
+            return self.functions[shell].contraction_matrix()
+        else:
+            raise ValueError("shell '{}' is not present in the BasisSet".format(shell))
+
+    def contractions_per_shell(self):
+        '''
+        Calculate how many contracted functions are in each shell.
+
+        Returns:
+          out : list of ints
+        '''
+
+        return [fs.ncf for fs in self.functions.values()]
+
+    def primitives_per_contraction(self):
+        '''
+        Calculate how many primities are used in each contracted function.
+
+        Returns:
+          out : list of ints
+        '''
+
+        return [np.diff(fs.indptr).tolist() for fs in self.functions.values()]
+
+    def normalize(self):
+        '''
+        Normalize contraction coefficients for each contracted functions based
+        on the primitive overlaps so that the norm is equal to 1.
+        '''
+
+        for shell, fs in self.functions.items():
+            cc = fs.contraction_matrix()
+            po = primitive_overlap(get_l(shell), fs.e, fs.e)
+            norm2 = np.einsum('ij,ij->j', cc, np.dot(po, cc))
+            self._functions[shell] = Shell(fs.e, fs.indptr, fs.indices,
+                                           fs.coeffs / np.sqrt(norm2)[fs.rows])
+
+    def partial_wave_expand(self):
+        '''
+        From a given basis set with shells spdf... return a list of basis sets
+        that are subsets of the entered basis set with increasing angular
+        momentum functions included [s, sp, spd, spdf, ...]
+        '''
+
+        res = list()
+        shells = list(self.functions.keys())
+        for i in range(1, len(shells) + 1):
+            res.append(CompactBasisSet(name=self.name, element=self.element,
+                                       family=self.family, kind=self.kind,
+                                       functions=OrderedDict(
+                                           (k, self.functions[k])
+                                           for k in shells[:i]),
+                                       info=self.info))
+        return res
+
+    def uncontract(self, copy=False):
+        '''
+        Uncontract the basis set. This replaces the contraction coefficients in
+        the current object.
+
+        Args:
+          copy : bool
+            If `True` return an uncontracted copy of the basis set rather than
+            uncontracting in place, default is `False`.
+        '''
+
+        if copy:
+            res = CompactBasisSet(name=self.name, element=self.element,
+                                  family=self.family, kind=self.kind,
+                                  functions=self.functions, info=self.info)
+            res.uncontract()
+            return res
+        else:
+            for shell, fs in self.functions.items():
+                self._functions[shell] = Shell(fs.e)
+
+    def sort(self, reverse=False):
+        '''
+        Sort shells in the order of increasing angular momentum and for each
+        shell sort the exponents.
+
+        Args:
+          reverse : bool
+            If `False` sort the exponents in each shell in the descending order
+            (default), else sort exponents in ascending order
+        '''
+
+        self._functions = OrderedDict(sorted(self.functions.items(),
+                                             key=lambda x: get_l(x[0])))
+
+        for shell, fs in self.functions.items():
+            if reverse:
+                idx = np.argsort(fs.e)
+            else:
+                idx = np.argsort(fs.e)[::-1]
+
+            # position of every old exponent after sorting
+            newpos = np.empty_like(idx)
+            newpos[idx] = np.arange(idx.size)
+
+            indices = newpos[fs.indices]
+            # sort the coefficients of each contracted function by index
+            order = np.lexsort((indices, fs.rows))
+            self._functions[shell] = Shell(fs.e[idx], fs.indptr,
+                                           indices[order], fs.coeffs[order])
+
+    def nbytes(self):
+        '''
+        Return the number of bytes of the arrays holding the functions
+        '''
+
+        return sum(fs.nbytes for fs in self.functions.values())
+
+    def to_json(self, fname=None, **kwargs):
+        '''
+        Serizalize the basis set object to JSON format, the output is the same
+        as for the equivalent BasisSet object
+        '''
+
+        attrs = OrderedDict()
+        for key, value in self.__dict__.items():
+            if key == '_functions':
+                attrs['functions'] = OrderedDict(
+                    (shell, fs.to_dict()) for shell, fs in value.items())
+            else:
+                attrs[key] = value
+
+        if fname:
+            with open(fname, 'w') as fjson:
+                json.dump(attrs, fjson, cls=NumpyEncoder, **kwargs)
+
+        return json.dumps(attrs, cls=NumpyEncoder, **kwargs)
@@ -24,14 +24,26 @@
 
 from __future__ import print_function
 
+import concurrent.futures
+import os
+from collections import OrderedDict
+
 import numpy as np
-from scipy.special import factorial2
-from chemtools.basisset import ncartesian, get_l
-from numba import jit, int32, float64
-from scipy.linalg import sqrtm, inv
+from scipy.special import gamma
+from chemtools.basisset import ncartesian, get_l, inverse_sqrt
+
+# shell pairs with the gaussian prefactor exp(-mu*R^2) below the threshold are
+# neglected
+SCREENING_THRESHOLD = 1.0e-20
+
+# maximal number of shell pairs evaluated at once
+PAIR_CHUNKSIZE = 4096
+
+# environment variable with the default number of processes used for the
+# integrals
+WORKERS_ENV = 'CHEMTOOLS_INTEGRAL_WORKERS'
 
 
-@jit(float64(int32, float64))
 def norm(n, a):
     '''
     Calculate the normalization factor for a cartesian gaussian of the form
@@ -41,29 +53,32 @@ def norm(n, a):
        G_{n}(x, a, A_{x}) = x^{n}_{A}\exp(-ax^{2}_{A})
 
     Args:
-      n : int
+      n : int or numpy.array
         Power of the preexponential factor
-      a : float
+      a : float or numpy.array
         Exponent
 
     Returns:
-      out : float
+      out : float or numpy.array
         Value of the normalization factor
     '''
 
-    # first option
-    #return np.sqrt(np.power(2.0*a, n + 0.5, dtype=np.float64)/gamma(n + 0.5), dtype=np.float64)
-    # second option
-    return np.sqrt(np.power(4.0*a, n)*np.sqrt(2.0*a/np.pi, dtype=np.float64)/factorial2(2*n - 1), dtype=np.float64)
-    # third option
-    #return np.sqrt(np.power(8.0*a, n)*factorial(n)*np.sqrt(2.0*a/np.pi)/factorial(2*n), dtype=np.float64)
+    # (2n - 1)!! is expressed through the gamma function since factorial2
+    # returns 0 instead of 1 for n = 0 in recent scipy versions
+    n = np.asarray(n, dtype=np.float64)
+    dfact = np.power(2.0, n) * gamma(n + 0.5) / np.sqrt(np.pi)
+    return np.sqrt(np.power(4.0 * a, n) * np.sqrt(2.0 * a / np.pi) / dfact)
+
 
-@jit(float64(int32, int32, float64, float64, float64, float64))
 def obara_saika(i, j, a, b, Ax, Bx):
     '''
     Calculates the overlap integral between two  cartesian gaussian components using
     the Obara-Saika recurrence relations.
 
+    This is the scalar, recursive reference implementation, use
+    :py:func:`overlap_1d` to calculate the integrals for many pairs of
+    exponents at once.
+
     Args:
       i : int
         Power of the preexponential monomial in the first gaussian
@@ -119,6 +134,72 @@ def obara_saika(i, j, a, b, Ax, Bx):
                 j*obara_saika(i-1, j-1, a, b, Ax, Bx))/(2.0*p)
 
 
+def overlap_1d(la, lb, a, b, Ax, Bx):
+    '''
+    Calculate the tables of one dimensional overlap integrals :math:`S_{ij}`
+    for all :math:`i \\leq l_a` and :math:`j \\leq l_b` using the Obara-Saika
+    recurrence relations, vectorized over the pairs of exponents.
+
+    The integrals :math:`S_{i0}` are obtained from the vertical recurrence
+
+    .. math::
+
+       S_{i+1,0} = X_{PA} S_{i0} + \\frac{i}{2p} S_{i-1,0}
+
+    and the remaining ones from the horizontal (transfer) relation
+
+    .. math::
+
+       S_{i,j+1} = S_{i+1,j} + X_{AB} S_{ij}
+
+    Args:
+      la : int
+        Maximal power of the monomial in the first gaussian
+      lb : int
+        Maximal power of the monomial in the second gaussian
+      a : float or numpy.array
+        Exponents of the first gaussian
+      b : float or numpy.array
+        Exponents of the second gaussian
+      Ax : float or numpy.array
+        Coordinates of the first gaussian
+      Bx : float or numpy.array
+        Coordinates of the second gaussian
+
+    Returns:
+      out (la + 1, lb + 1, ...) : numpy.array
+        Overlap integrals, the trailing dimensions are the broadcasted shape
+        of ``a``, ``b``, ``Ax`` and ``Bx``
+    '''
+
+    a, b, Ax, Bx = np.broadcast_arrays(np.asarray(a, dtype=np.float64),
+                                       np.asarray(b, dtype=np.float64),
+                                       np.asarray(Ax, dtype=np.float64),
+                                       np.asarray(Bx, dtype=np.float64))
+    p = a + b
+    X_AB = Ax - Bx
+    X_PA = -b * X_AB / p
+    oo2p = 0.5 / p
+
+    lab = la + lb
+    S = np.empty((lab + 1, lb + 1) + p.shape, dtype=np.float64)
+    S[0, 0] = np.sqrt(np.pi / p) * np.exp(-a * b / p * X_AB**2)
+    if lab > 0:
+        S[1, 0] = X_PA * S[0, 0]
+    for i in range(1, lab):
+        S[i + 1, 0] = X_PA * S[i, 0] + i * oo2p * S[i - 1, 0]
+    for j in range(lb):
+        S[:lab - j, j + 1] = S[1:lab - j + 1, j] + X_AB * S[:lab - j, j]
+
+    return S[:la + 1]
+
+
+BASINFO_DTYPE = [('exp', np.float64), ('shell', 'S1'), ('l', np.int32),
+                 ('ix', np.int32), ('iy', np.int32), ('iz', np.int32),
+                 ('atom', 'S3'), ('x', np.float64), ('y', np.float64),
+                 ('z', np.float64)]
+
+
 def get_basinfo(bases, positions, order='canonical'):
     '''
     Compose a record array with all of the exponents/functions, The record has
@@ -150,22 +231,79 @@ def get_basinfo(bases, positions, order='canonical'):
         Numpy record array with all available functions
     '''
 
-    dtype = [('exp', np.float64), ('shell', 'S1'), ('l', np.int32),
-             ('ix', np.int32), ('iy', np.int32), ('iz', np.int32),
-             ('atom', 'S3'), ('x', np.float64), ('y', np.float64), ('z', np.float64)]
+    arrays = get_basinfo_arrays(bases, positions, order=order)
+    out = np.recarray((arrays['exp'].size,), dtype=BASINFO_DTYPE)
+    for name, _ in BASINFO_DTYPE:
+        out[name] = arrays[name]
+    return out
+
+
+def get_basinfo_arrays(bases, positions, order='canonical'):
+    '''
+    Struct of arrays version of :py:func:`get_basinfo`
+
+    The arrays are built with ``numpy.repeat`` and ``numpy.tile`` over the
+    exponents and cartesian components of every shell, the shells of basis
+    sets repeated on many centers are processed only once.
+
+    Args:
+      bases : list
+        A list of ``BasisSet`` objects
+      positions : list
+        List of 3-tuples with the (x, y, z) coordinates
+      order : str
+        Order of the cartesian components, see :py:func:`get_basinfo`
+
+    Returns:
+      out : collections.OrderedDict
+        Dictionary with the field names of :py:func:`get_basinfo` as keys and
+        one dimensional arrays as values
+    '''
 
-    nf = sum([bs.nprimitive(spherical=False) for bs in bases])
-    out = np.recarray((nf,), dtype=dtype)
+    pairs = list(zip(bases, positions))
+    bases = [basis for basis, _ in pairs]
+    positions = np.array([pos for _, pos in pairs], dtype=np.float64).reshape(-1, 3)
 
-    index = -1
-    for basis, atom in zip(bases, positions):
-        for shell, fs in basis.functions.items():
-            l = get_l(shell)
-            for ex in fs['e']:
-                for ixyz in xyzlist(l, order=order):
-                    index += 1
-                    out[index] = (ex, shell, l, ixyz[0], ixyz[1], ixyz[2],
-                                  basis.element, atom[0], atom[1], atom[2])
+    # per basis set arrays independent of the position
+    cache = {}
+    pieces = []
+    for basis in bases:
+        if id(basis) not in cache:
+            exps, shells, lvals, comps = [], [], [], []
+            for shell, fs in basis.functions.items():
+                l = get_l(shell)
+                xyz = xyzlist(l, order=order)
+                exps.append(np.repeat(np.asarray(fs['e'], dtype=np.float64),
+                                      xyz.shape[0]))
+                comps.append(np.tile(xyz, (len(fs['e']), 1)))
+                shells.append(np.repeat(shell, exps[-1].size))
+                lvals.append(np.repeat(l, exps[-1].size))
+            if exps:
+                cache[id(basis)] = (np.concatenate(exps),
+                                    np.concatenate(shells),
+                                    np.concatenate(lvals),
+                                    np.concatenate(comps))
+            else:
+                cache[id(basis)] = (np.zeros(0), np.zeros(0, dtype='S1'),
+                                    np.zeros(0, dtype=np.int32),
+                                    np.zeros((0, 3), dtype=np.int32))
+        pieces.append(cache[id(basis)])
+
+    nfs = [piece[0].size for piece in pieces]
+    comps = np.concatenate([piece[3] for piece in pieces])
+    coords = np.repeat(positions, nfs, axis=0)
+
+    out = OrderedDict()
+    out['exp'] = np.concatenate([piece[0] for piece in pieces])
+    out['shell'] = np.concatenate([piece[1] for piece in pieces]).astype('S1')
+    out['l'] = np.concatenate([piece[2] for piece in pieces]).astype(np.int32)
+    out['ix'] = comps[:, 0].astype(np.int32)
+    out['iy'] = comps[:, 1].astype(np.int32)
+    out['iz'] = comps[:, 2].astype(np.int32)
+    out['atom'] = np.repeat([basis.element for basis in bases], nfs).astype('S3')
+    out['x'] = coords[:, 0]
+    out['y'] = coords[:, 1]
+    out['z'] = coords[:, 2]
     return out
 
 
@@ -220,68 +358,286 @@ def xyzlist(l, order='canonical'):
         raise ValueError('Unknown <order> value: {}'.format(order))
 
 
-@jit
-def primitive_overlap(exps):
+def get_shells(basinfo):
     '''
-    Calculate the overlaps between the primitive cartesian gaussians
+    Find the primitive shells in the record array ``basinfo``
+
+    A shell is a block of consecutive records sharing the exponent and the
+    center that holds all the cartesian components of a given angular
+    momentum.
 
     Args:
-      exps (N,) : numpy.recarray
-        Numpy record array with available functions, for details see ``get_exps``
+      basinfo (N,) : numpy.recarray
+        Numpy record array with available functions, for details see ``get_basinfo``
 
     Returns:
-      S (N, N) : numpy.array
-        Overlap integral matrix between the primitives
+      shells : collections.OrderedDict
+        Dictionary with the tuples of ``(ix, iy, iz)`` powers of the
+        components of a shell as keys and arrays with indices of the first
+        records of all the shells having those components as values
     '''
 
-    # initialize the overlap matrix
-    S = np.zeros((exps.size, exps.size), dtype=np.float64)
+    lvals = basinfo['ix'] + basinfo['iy'] + basinfo['iz']
+    keys = np.column_stack((basinfo['exp'], basinfo['x'], basinfo['y'],
+                            basinfo['z'], lvals))
 
-    # this should be done is some smarter way avoiding the explicit loop indexing
-    # maybe np.nditer?
+    # split the runs of records with the same exponent, center and angular
+    # momentum into chunks of ncartesian(l) components
+    newrun = np.ones(basinfo.size, dtype=bool)
+    newrun[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+    runstarts = np.flatnonzero(newrun)
+    runsizes = np.diff(np.append(runstarts, basinfo.size))
 
-    for i in range(exps.size):
+    shells = OrderedDict()
+    for start, size in zip(runstarts, runsizes):
+        ncart = ncartesian(int(lvals[start]))
+        for first in range(start, start + size, ncart):
+            last = min(first + ncart, start + size)
+            comps = tuple(zip(basinfo['ix'][first:last].tolist(),
+                              basinfo['iy'][first:last].tolist(),
+                              basinfo['iz'][first:last].tolist()))
+            shells.setdefault(comps, []).append(first)
 
-        irow = exps[i]
-        iix, iiy, iiz, iexp, xi, yi, zi = irow['ix'], irow['iy'], irow['iz'], irow['exp'], irow['x'], irow['y'], irow['z']
+    return OrderedDict((comps, np.asarray(firsts, dtype=np.intp))
+                       for comps, firsts in shells.items())
 
-        normi = norm(iix, iexp)*norm(iiy, iexp)*norm(iiz, iexp)
 
-        for j in range(i + 1):
-            normj = norm(exps[j]['ix'], exps[j]['exp'])*\
-                    norm(exps[j]['iy'], exps[j]['exp'])*\
-                    norm(exps[j]['iz'], exps[j]['exp'])
+def get_workers(workers=None):
+    '''
+    Return the number of processes used to calculate the integrals
 
-            x = obara_saika(iix, exps[j]['ix'], iexp, exps[j]['exp'], xi, exps[j]['x'])
-            y = obara_saika(iiy, exps[j]['iy'], iexp, exps[j]['exp'], yi, exps[j]['y'])
-            z = obara_saika(iiz, exps[j]['iz'], iexp, exps[j]['exp'], zi, exps[j]['z'])
+    Args:
+      workers : int
+        Number of processes, if ``None`` the value of the
+        ``CHEMTOOLS_INTEGRAL_WORKERS`` environment variable is used and if
+        that is not set the integrals are calculated serially
 
-            S[i, j] = normi*normj*x*y*z
+    Returns:
+      workers : int
+    '''
 
-    S = S + S.T
-    np.fill_diagonal(S, S.diagonal()/2.0)
-    return S
+    if workers is None:
+        workers = os.getenv(WORKERS_ENV, '1')
+        try:
+            workers = int(workers)
+        except ValueError:
+            raise ValueError('{} should be a positive int, got: {}'.format(
+                WORKERS_ENV, workers))
 
+    if isinstance(workers, (int, np.integer)) and workers > 0:
+        return int(workers)
+    else:
+        raise ValueError('workers should be a positive int, got: {}'.format(workers))
 
-def primitive_overlap_between(bas1, bas2):
 
-    # initialize the overlap matrix
-    S = np.zeros((bas1.size, bas2.size), dtype=np.float64)
+def shell_pair_overlap(bas1, bas2=None, threshold=SCREENING_THRESHOLD,
+                       chunksize=PAIR_CHUNKSIZE, workers=None):
+    '''
+    Calculate the overlap matrix between primitive cartesian gaussians block
+    by block for pairs of shells
 
-    for i in range(bas1.size):
-        normi = norm(bas1[i]['ix'], bas1[i]['exp'])*norm(bas1[i]['iy'], bas1[i]['exp'])*norm(bas1[i]['iz'], bas1[i]['exp'])
-        for j in range(bas2.size):
-            normj = norm(bas2[j]['ix'], bas2[j]['exp'])*norm(bas2[j]['iy'], bas2[j]['exp'])*norm(bas2[j]['iz'], bas2[j]['exp'])
+    The shells are grouped by their cartesian components (see
+    :py:func:`get_shells`) and for each pair of groups the one dimensional
+    tables are calculated with :py:func:`overlap_1d` once for every shell
+    pair and shared by all the components. Shell pairs with the gaussian
+    prefactor :math:`\\exp(-\\mu R_{AB}^{2})` smaller than ``threshold`` are
+    skipped and their blocks are left zero.
 
-            x = obara_saika(bas1[i]['ix'], bas2[j]['ix'], bas1[i]['exp'], bas2[j]['exp'], bas1[i]['x'], bas2[j]['x'])
-            y = obara_saika(bas1[i]['iy'], bas2[j]['iy'], bas1[i]['exp'], bas2[j]['exp'], bas1[i]['y'], bas2[j]['y'])
-            z = obara_saika(bas1[i]['iz'], bas2[j]['iz'], bas1[i]['exp'], bas2[j]['exp'], bas1[i]['z'], bas2[j]['z'])
+    The batches of at most ``chunksize`` shell pairs can be distributed over
+    a pool of ``workers`` processes, every batch is calculated in the same
+    way as in the serial run so the result does not depend on the number of
+    workers.
 
-            S[i, j] = normi*normj*x*y*z
+    Args:
+      bas1 (M,) : numpy.recarray
+        Numpy record array with the first set of functions, for details see ``get_basinfo``
+      bas2 (N,) : numpy.recarray
+        Numpy record array with the second set of functions, if ``None`` the
+        overlap matrix of ``bas1`` is calculated, only the lower triangle of
+        shell pairs is evaluated and mirrored
+      threshold : float
+        Screening threshold for the gaussian prefactor, ``0`` disables the
+        screening
+      chunksize : int
+        Maximal number of shell pairs evaluated at once
+      workers : int
+        Number of processes, see :py:func:`get_workers`
+
+    Returns:
+      S (M, N) : numpy.array
+        Overlap integral matrix between the primitives
+    '''
+
+    symmetric = bas2 is None
+    if symmetric:
+        bas2 = bas1
+
+    S = np.zeros((bas1.size, bas2.size), dtype=np.float64)
+
+    shells1 = get_shells(bas1)
+    shells2 = shells1 if symmetric else get_shells(bas2)
+
+    batches = []
+    for comps1, firsts1 in shells1.items():
+        for comps2, firsts2 in shells2.items():
+            idx1 = np.repeat(firsts1, firsts2.size)
+            idx2 = np.tile(firsts2, firsts1.size)
+            if symmetric:
+                lower = idx1 >= idx2
+                idx1, idx2 = idx1[lower], idx2[lower]
+
+            # screening
+            a, b = bas1['exp'][idx1], bas2['exp'][idx2]
+            rsq = sum((bas1[c][idx1] - bas2[c][idx2])**2 for c in 'xyz')
+            keep = np.exp(-a * b / (a + b) * rsq) >= threshold
+            idx1, idx2 = idx1[keep], idx2[keep]
+
+            for lo in range(0, idx1.size, chunksize):
+                batches.append((np.asarray(comps1), np.asarray(comps2),
+                                idx1[lo:lo + chunksize],
+                                idx2[lo:lo + chunksize]))
+
+    workers = min(get_workers(workers), max(1, len(batches)))
+    if workers == 1:
+        blocks = (pair_block(bas1, bas2, *batch) for batch in batches)
+        for batch, block in zip(batches, blocks):
+            store_block(S, block, *batch)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker,
+                initargs=(bas1, bas2)) as pool:
+            futures = [pool.submit(pair_block_worker, *batch)
+                       for batch in batches]
+            for batch, future in zip(batches, futures):
+                store_block(S, future.result(), *batch)
+
+    if symmetric:
+        S = np.tril(S)
+        S += np.tril(S, -1).T
 
     return S
 
 
+def pair_block(bas1, bas2, comps1, comps2, idx1, idx2):
+    '''
+    Calculate the overlap integrals for a batch of shell pairs with the same
+    components
+
+    Args:
+      bas1 : numpy.recarray
+        Numpy record array with the first set of functions
+      bas2 : numpy.recarray
+        Numpy record array with the second set of functions
+      comps1 (K, 3) : numpy.array
+        Powers of the components of the shells from ``bas1``
+      comps2 (L, 3) : numpy.array
+        Powers of the components of the shells from ``bas2``
+      idx1 (P,) : numpy.array
+        Indices of the first records of the shells from ``bas1``
+      idx2 (P,) : numpy.array
+        Indices of the first records of the shells from ``bas2``
+
+    Returns:
+      block (P, K, L) : numpy.array
+        Overlap integrals for all the shell pairs
+    '''
+
+    a, b = bas1['exp'][idx1], bas2['exp'][idx2]
+
+    block = np.ones((idx1.size, comps1.shape[0], comps2.shape[0]),
+                    dtype=np.float64)
+    for k, coord in enumerate('xyz'):
+        table = overlap_1d(comps1[:, k].max(), comps2[:, k].max(), a, b,
+                           bas1[coord][idx1], bas2[coord][idx2])
+        block *= np.moveaxis(table[comps1[:, k, np.newaxis],
+                                   comps2[np.newaxis, :, k]], -1, 0)
+        block *= norm(comps1[np.newaxis, :, k, np.newaxis],
+                      a[:, np.newaxis, np.newaxis])
+        block *= norm(comps2[np.newaxis, np.newaxis, :, k],
+                      b[:, np.newaxis, np.newaxis])
+
+    return block
+
+
+def store_block(S, block, comps1, comps2, idx1, idx2):
+    '''
+    Store the ``block`` calculated with :py:func:`pair_block` in the matrix
+    ``S``
+    '''
+
+    rows = idx1[:, np.newaxis] + np.arange(comps1.shape[0])
+    cols = idx2[:, np.newaxis] + np.arange(comps2.shape[0])
+    S[rows[:, :, np.newaxis], cols[:, np.newaxis, :]] = block
+
+
+# functions of the worker processes stored by init_worker
+WORKER_BASES = None
+
+
+def init_worker(bas1, bas2):
+    '''
+    Store the functions in the worker process so that they are transferred
+    only once
+    '''
+
+    global WORKER_BASES
+    WORKER_BASES = (bas1, bas2)
+
+
+def pair_block_worker(comps1, comps2, idx1, idx2):
+    '''
+    Calculate a batch of shell pairs in the worker process, see
+    :py:func:`pair_block`
+    '''
+
+    return pair_block(WORKER_BASES[0], WORKER_BASES[1], comps1, comps2,
+                      idx1, idx2)
+
+
+def primitive_overlap(exps, threshold=SCREENING_THRESHOLD, workers=None):
+    '''
+    Calculate the overlaps between the primitive cartesian gaussians
+
+    Args:
+      exps (N,) : numpy.recarray
+        Numpy record array with available functions, for details see ``get_basinfo``
+      threshold : float
+        Screening threshold, see :py:func:`shell_pair_overlap`
+      workers : int
+        Number of processes, see :py:func:`get_workers`
+
+    Returns:
+      S (N, N) : numpy.array
+        Overlap integral matrix between the primitives
+    '''
+
+    return shell_pair_overlap(exps, threshold=threshold, workers=workers)
+
+
+def primitive_overlap_between(bas1, bas2, threshold=SCREENING_THRESHOLD,
+                              workers=None):
+    '''
+    Calculate the overlaps between two sets of primitive cartesian gaussians
+
+    Args:
+      bas1 (M,) : numpy.recarray
+        Numpy record array with the first set of functions, for details see ``get_basinfo``
+      bas2 (N,) : numpy.recarray
+        Numpy record array with the second set of functions
+      threshold : float
+        Screening threshold, see :py:func:`shell_pair_overlap`
+      workers : int
+        Number of processes, see :py:func:`get_workers`
+
+    Returns:
+      S (M, N) : numpy.array
+        Overlap integral matrix between the primitives
+    '''
+
+    return shell_pair_overlap(bas1, bas2, threshold=threshold,
+                              workers=workers)
+
+
 def contraction_matrix(bases):
     '''
     Construct and return the matrix of contraction coefficents
@@ -300,32 +656,38 @@ def contraction_matrix(bases):
     # calculate the number of contracted functions
     nc = sum([bs.nf(spherical=False) for bs in bases])
 
-    cc = np.zeros((nprim, nc), dtype=np.float64)
+    rows, cols, vals = [], [], []
     icol = 0
-
     irow = 0
     for basis in bases:
         for shell, fs in basis.functions.items():
-            l = get_l(shell)
-            ncart = ncartesian(l)
-            nprs = len(fs['e']) * ncart
+            ncart = ncartesian(get_l(shell))
+            comps = np.arange(ncart)
             for cf in fs['cf']:
-                # calculate the indices of rows for all the components
-                rowidx = np.asarray([[i * ncart + n  for i in cf['idx']] for n in range(ncart)]).T
-                # reshape the contraction coefficients to assign them to elements of the contraction matrix
-                cc[rowidx + irow, np.arange(ncart) + icol] = np.repeat(cf['cc'], ncart).reshape(cf.size, ncart)
+                # all the components of the primitives contributing to the
+                # contracted function
+                rows.append((irow + cf['idx'][:, np.newaxis] * ncart + comps).ravel())
+                cols.append(np.tile(icol + comps, cf.size))
+                vals.append(np.repeat(cf['cc'], ncart))
                 icol += ncart
-            irow += nprs
+            irow += len(fs['e']) * ncart
+
+    cc = np.zeros((nprim, nc), dtype=np.float64)
+    if rows:
+        cc[np.concatenate(rows), np.concatenate(cols)] = np.concatenate(vals)
     return cc
 
 
-def completeness_profile(basinfo, cc, zetas):
+def completeness_profile(basinfo, cc, zetas, workers=None):
     '''
     Calculate the completeness profile of each shell of the basis set
 
     Args:
       zetas : numpy.array
         Scaning exponents
+      workers : int
+        Number of processes used for the integrals, see
+        :py:func:`get_workers`
 
     Returns:
       out : numpy.array
@@ -333,11 +695,11 @@ def completeness_profile(basinfo, cc, zetas):
     '''
 
     # calculate the overlap matrix
-    Sprim = primitive_overlap(basinfo)
+    Sprim = primitive_overlap(basinfo, workers=workers)
     S = np.dot(cc.T, np.dot(Sprim, cc))
     # calculate the inverse square root of S
-    X = inv(sqrtm(S))
-    SO = primitive_overlap_between(basinfo, zetas)
+    X = inverse_sqrt(S)
+    SO = primitive_overlap_between(basinfo, zetas, workers=workers)
     J = np.dot(np.dot(cc, X).T, SO)
     out = np.sum(np.square(J), axis=0)
 
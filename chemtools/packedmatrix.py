@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+#The MIT License (MIT)
+#
+#Copyright (c) 2014 Lukasz Mentel
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+'''
+Utilities for symmetric and antisymmetric matrices stored in the packed
+(lower triangle, row-wise) format used e.g. in the GAMESS(US) dictionary file.
+
+The element ``(i, j)`` with ``i >= j`` is stored at position
+``i * (i + 1) / 2 + j`` of the packed vector, the antisymmetric matrices have
+``A[j, i] = -A[i, j]``.
+'''
+
+from __future__ import division, print_function
+
+from functools import lru_cache
+
+import numpy as np
+
+
+def tri_size(n):
+    '''
+    Return the length of the packed vector for the ``n`` x ``n`` matrix
+    '''
+
+    return n * (n + 1) // 2
+
+
+def tri_dim(size):
+    '''
+    Return the dimension ``n`` of the matrix whose packed representation has
+    ``size`` elements
+    '''
+
+    # solve n^2 + n - 2s = 0 for the number of rows/columns n
+    n = int((np.sqrt(8.0 * size + 1) - 1.0) / 2.0)
+    if tri_size(n) != size:
+        raise ValueError('{0:d} is not a size of a packed triangular matrix'.format(size))
+    return n
+
+
+@lru_cache(maxsize=32)
+def tri_flat_indices(n):
+    '''
+    Return the positions of the lower and upper triangle elements in the
+    flattened (C ordered) ``n`` x ``n`` matrix, in the order of the packed
+    vector. The arrays are cached and should not be modified.
+
+    Returns:
+        lower, upper : tuple of numpy.arrays
+    '''
+
+    rows, cols = np.tril_indices(n)
+    lower = rows * n + cols
+    upper = cols * n + rows
+    lower.flags.writeable = False
+    upper.flags.writeable = False
+    return lower, upper
+
+
+@lru_cache(maxsize=32)
+def triu_mask(n):
+    '''
+    Return the boolean mask of the upper triangle (including the diagonal)
+    of the ``n`` x ``n`` matrix. The array is cached and should not be
+    modified.
+    '''
+
+    mask = np.zeros((n, n), dtype=bool)
+    mask[np.triu_indices(n)] = True
+    mask.flags.writeable = False
+    return mask
+
+
+def _flat_view(matrix):
+    '''
+    Return a flat view of a contiguous square ``matrix`` and a flag telling
+    if it's in the Fortran order
+    '''
+
+    if matrix.flags.c_contiguous:
+        return matrix.reshape(-1), False
+    elif matrix.flags.f_contiguous:
+        return matrix.T.reshape(-1), True
+    raise ValueError('matrix has to be contiguous')
+
+
+def tri2full(vector, sym=True, out=None):
+    '''
+    Expand the packed lower triangle ``vector`` into a square matrix
+
+    Args:
+        vector : numpy.array
+            Packed lower triangle
+        sym : bool
+            ``True`` for symmetric, ``False`` for antisymmetric matrix
+        out : numpy.array
+            Contiguous square array to hold the result, by default a new
+            Fortran ordered array is allocated
+
+    Returns:
+        out : numpy.array
+            Square matrix
+    '''
+
+    vector = np.asarray(vector)
+    n = tri_dim(vector.size)
+
+    if out is None:
+        out = np.empty((n, n), dtype=np.result_type(vector, float), order='F')
+    elif out.shape != (n, n):
+        raise ValueError('wrong shape of out: {0}, expected {1}'.format(
+            out.shape, (n, n)))
+
+    flat, fortran = _flat_view(out)
+    lower, upper = tri_flat_indices(n)
+    if fortran:
+        lower, upper = upper, lower
+
+    flat[lower] = vector
+    flat[upper] = vector
+    if not sym:
+        # negate the mirrored elements in place instead of scattering a
+        # negated copy of the vector
+        square = flat.reshape(n, n)
+        mask = triu_mask(n).T if fortran else triu_mask(n)
+        np.negative(square, out=square, where=mask)
+
+    return out
+
+
+def full2tri(matrix, out=None):
+    '''
+    Pack the lower triangle of the square ``matrix`` into a vector
+
+    Args:
+        matrix : numpy.array
+            Square matrix
+        out : numpy.array
+            Array of length ``n * (n + 1) / 2`` to hold the result
+
+    Returns:
+        out : numpy.array
+            Packed lower triangle
+    '''
+
+    matrix = np.asarray(matrix)
+    n = matrix.shape[0]
+    if matrix.shape != (n, n):
+        raise ValueError('matrix has to be square, got: {}'.format(matrix.shape))
+
+    if not (matrix.flags.c_contiguous or matrix.flags.f_contiguous):
+        matrix = np.ascontiguousarray(matrix)
+    flat, fortran = _flat_view(matrix)
+    lower, upper = tri_flat_indices(n)
+    if fortran:
+        lower = upper
+
+    return np.take(flat, lower, out=out)
+
+
+def packed_dot(vector, other, sym=True, out=None, work=None):
+    '''
+    Multiply the packed (anti)symmetric matrix by a vector or a matrix
+
+    Args:
+        vector : numpy.array
+            Packed lower triangle of the matrix ``A``
+        other : numpy.array
+            Vector or matrix ``B``
+        sym : bool
+            ``True`` for symmetric, ``False`` for antisymmetric ``A``
+        out : numpy.array
+            Array to hold the product, as in ``numpy.dot``
+        work : numpy.array
+            Contiguous square array used to expand ``A``, a new one is
+            allocated if not given
+
+    Returns:
+        out : numpy.array
+            Product ``A B``
+    '''
+
+    full = tri2full(vector, sym=sym, out=work)
+    return np.dot(full, other, out=out)
+
+
+def packed_matmul(vector, other, sym=True, other_sym=True, out=None,
+                  work=None):
+    '''
+    Multiply two packed (anti)symmetric matrices
+
+    Args:
+        vector : numpy.array
+            Packed lower triangle of the matrix ``A``
+        other : numpy.array
+            Packed lower triangle of the matrix ``B``
+        sym, other_sym : bool
+            ``True`` for symmetric, ``False`` for antisymmetric matrices
+        out : numpy.array
+            C ordered square array to hold the product
+        work : tuple of numpy.arrays
+            Two contiguous square arrays used to expand the matrices
+
+    Returns:
+        out : numpy.array
+            Square matrix ``A B``
+    '''
+
+    if work is None:
+        work = (None, None)
+    left = tri2full(vector, sym=sym, out=work[0])
+    right = tri2full(other, sym=other_sym, out=work[1])
+    return np.dot(left, right, out=out)
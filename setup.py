@@ -60,6 +60,7 @@ setup(
     long_description_content_type='text/x-rst',
     name='chemtools',
     packages=['chemtools', 'chemtools/pescan', 'chemtools/calculators'],
+    python_requires='>=3.8',
     scripts=[
         'chemtools/submitgamess.py',
         'chemtools/submitmolpro.py'],
@@ -0,0 +1,50 @@
+
+import math
+import os
+
+from chemtools.calculators.calculator import Calculator
+import pytest
+
+
+class FakeCalculator(Calculator):
+    '''
+    Calculator whose "energy" is a simple function of the exponents, written
+    to the output file without running any external program.
+
+    With a ``core`` specification the number of correlated core orbitals
+    ``sum(core)`` adds ``sum(core) * exp(-sum((e - 1)^2))`` so that the core
+    energy has a minimum at the same exponents.
+    '''
+
+    def __init__(self):
+        self.nruns = 0
+
+    def write_input(self, fname=None, template=None, mol=None, basis=None,
+                    core=None):
+        exps = [e for b in basis.values() for fs in b.functions.values()
+                for e in fs['e']]
+        dist = sum((e - 1.0)**2 for e in exps)
+        ncore = sum(core) if core is not None else 0
+        with open(fname, 'w') as finp:
+            finp.write(repr(dist + ncore * math.exp(-dist)))
+
+    def run(self, inpfile):
+        self.nruns += 1
+        outfile = os.path.splitext(inpfile)[0] + '.out'
+        with open(inpfile, 'r') as finp, open(outfile, 'w') as fout:
+            fout.write('energy ' + finp.read())
+        return outfile
+
+    def run_multiple(self, inputs):
+        return [self.run(inp) for inp in inputs]
+
+    def parse(self, fname, objective, regexp=None):
+        if objective == 'accomplished':
+            return True
+        with open(fname, 'r') as fout:
+            return float(fout.read().split()[1])
+
+
+@pytest.fixture
+def fakecode():
+    return FakeCalculator()
@@ -0,0 +1,83 @@
+
+from chemtools.basisopt import BSOptimizer
+from chemtools.molecule import Molecule
+import numpy as np
+import pickle
+import pytest
+
+
+def make_bso(code, optalg, checkpoint=None):
+
+    he = Molecule(name='He', atoms=[('He', )])
+    fsopt = {'He': [('s', 'exp', 2, (0.5, 2.0))]}
+    return BSOptimizer(objective='hf total energy', code=code, mol=he,
+                       fsopt=fsopt, fname='he.inp', template='',
+                       optalg=optalg, checkpoint=checkpoint)
+
+
+@pytest.mark.parametrize('optalg', [
+    {'method': 'Nelder-Mead', 'tol': 1.0e-6, 'options': {'maxiter': 200}},
+    {'method': 'mds', 'tol': 1.0e-6, 'options': {'maxiter': 200}},
+])
+def test_resume_replays_history(tmpdir, fakecode, optalg):
+
+    tmpdir.chdir()
+    chk = str(tmpdir.join('opt.chk'))
+    bso = make_bso(fakecode, optalg, checkpoint=chk)
+    bso.run()
+    nevals = len(bso.history)
+
+    state = BSOptimizer.load_checkpoint(chk)
+    assert state['nevals'] == nevals
+    assert np.isclose(state['funbest'], bso.result.fun)
+    assert state['fsopt'] == bso.fsopt
+
+    # simulate an interrupted run by dropping the last evaluations
+    state['history'] = state['history'][:nevals // 2]
+    with open(chk, 'wb') as fchk:
+        pickle.dump(state, fchk)
+
+    fakecode.nruns = 0
+    resumed = make_bso(fakecode, {'method': 'BFGS', 'options': {}})
+    res = resumed.resume(chk)
+
+    assert np.allclose(res.x, bso.result.x)
+    assert res.nfev == bso.result.nfev
+    assert len(resumed.history) == nevals
+    if optalg['method'] == 'Nelder-Mead':
+        # batch evaluations run in worker processes and are not counted
+        assert fakecode.nruns == nevals - nevals // 2
+
+
+def test_checkpoint_appends(tmpdir, fakecode):
+
+    tmpdir.chdir()
+    chk = str(tmpdir.join('opt.chk'))
+    bso = make_bso(fakecode, {'method': 'Nelder-Mead', 'tol': 1.0e-6,
+                              'options': {'maxiter': 5}}, checkpoint=chk)
+    function = bso.checkpointed(bso.function)
+
+    function(np.array([0.1, 0.2]), bso)
+    with open(chk, 'rb') as fchk:
+        first = fchk.read()
+    function(np.array([0.3, 0.4]), bso)
+    with open(chk, 'rb') as fchk:
+        second = fchk.read()
+
+    # only the new evaluation is appended
+    assert second.startswith(first)
+    assert len(second) - len(first) < len(first)
+
+    # incomplete last record is ignored
+    with open(chk, 'wb') as fchk:
+        fchk.write(second[:-5])
+    state = BSOptimizer.load_checkpoint(chk)
+    assert state['nevals'] == 1
+    assert np.allclose(state['history'][0][0], [0.1, 0.2])
+
+    with open(chk, 'wb') as fchk:
+        fchk.write(second)
+    state = BSOptimizer.load_checkpoint(chk)
+    assert state['nevals'] == 2
+    assert np.allclose(state['x0'], [0.3, 0.4])
+    assert np.isclose(state['funbest'], min(v for _, _, v in state['history']))
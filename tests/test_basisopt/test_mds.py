@@ -0,0 +1,70 @@
+
+from chemtools.basisopt import BSOptimizer, minimize_mds
+from chemtools.molecule import Molecule
+import numpy as np
+import pytest
+from scipy.optimize import OptimizeWarning, rosen
+
+
+def batch_rosen(points):
+    return np.array([rosen(x) for x in points])
+
+
+def test_mds_rosenbrock():
+
+    res = minimize_mds(batch_rosen, np.array([-1.2, 1.0]), xatol=1.0e-8,
+                       fatol=1.0e-10, maxiter=20000, maxfev=100000)
+
+    assert res.success
+    assert np.allclose(res.x, [1.0, 1.0], atol=1.0e-3)
+    assert res.final_simplex[0].shape == (3, 2)
+
+
+def test_mds_maxiter():
+
+    res = minimize_mds(batch_rosen, np.array([-1.2, 1.0]), maxiter=5)
+
+    assert not res.success
+    assert res.status == 2
+    assert res.nit == 5
+
+
+def test_mds_unknown_options():
+
+    with pytest.warns(OptimizeWarning, match='maxiterations'):
+        minimize_mds(batch_rosen, np.array([-1.2, 1.0]), maxiter=5,
+                     maxiterations=100)
+
+
+def test_optimize_mds(tmpdir, fakecode):
+
+    tmpdir.chdir()
+    he = Molecule(name='He', atoms=[('He', )])
+    fsopt = {'He': [('s', 'exp', 2, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='',
+                      optalg={'method': 'mds', 'tol': 1.0e-6, 'workers': 4,
+                              'options': {'maxiter': 500}})
+    bso.run()
+
+    assert bso.result.fun < 1.0e-6
+    assert np.allclose(bso.get_basis()['He'].functions['s']['e'], 1.0,
+                       atol=1.0e-2)
+
+
+def test_optimize_mds_core(tmpdir, fakecode):
+
+    tmpdir.chdir()
+    he = Molecule(name='He', atoms=[('He', )])
+    fsopt = {'He': [('s', 'exp', 2, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='', runcore=True,
+                      core=[[1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0]],
+                      optalg={'method': 'mds', 'tol': 1.0e-6, 'workers': 2,
+                              'options': {'maxiter': 200}})
+    bso.run()
+
+    # the core energy -exp(-sum((e - 1)^2)) has the minimum -1 at e = 1
+    assert np.isclose(bso.result.fun, -1.0, atol=1.0e-6)
+    assert np.allclose(bso.get_basis()['He'].functions['s']['e'], 1.0,
+                       atol=1.0e-2)
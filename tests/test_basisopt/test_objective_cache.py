@@ -0,0 +1,90 @@
+
+import os
+import stat
+
+from chemtools.basisopt import (BSOptimizer, ObjectiveCache, get_basis_dict,
+                                get_cache_key, run_core_energy,
+                                run_total_energy)
+from chemtools.molecule import Molecule
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def bso(tmpdir, fakecode):
+
+    tmpdir.chdir()
+    he = Molecule(name='He', atoms=[('He', )])
+    fsopt = {'He': [('s', 'et', 4, (0.5, 2.0))]}
+    return BSOptimizer(objective='hf total energy', code=fakecode,
+                       mol=he, fsopt=fsopt, fname='he.inp', template='',
+                       cache=str(tmpdir.join('cache.db')))
+
+
+def test_cache_key_depends_on_inputs(bso):
+
+    x0 = bso.get_x0()
+    key = get_cache_key(bso, get_basis_dict(bso, x0), bso.core)
+    assert key == get_cache_key(bso, get_basis_dict(bso, x0.copy()), bso.core)
+    assert key != get_cache_key(bso, get_basis_dict(bso, x0 * 1.01), bso.core)
+    assert key != get_cache_key(bso, get_basis_dict(bso, x0), [1, 0, 0, 0])
+
+
+def test_cache_key_depends_on_calculator(bso, tmpdir):
+
+    x0 = bso.get_x0()
+    bsdict = get_basis_dict(bso, x0)
+    key = get_cache_key(bso, bsdict, bso.core)
+
+    bso.function = run_core_energy
+    assert key != get_cache_key(bso, bsdict, bso.core)
+    bso.function = run_total_energy
+
+    exe = tmpdir.join('prog')
+    exe.write('#!/bin/sh\n')
+    os.chmod(str(exe), stat.S_IRWXU)
+    bso.code._executable = str(exe)
+    bso.code.runopts = ['-n', '1']
+    withexe = get_cache_key(bso, bsdict, bso.core)
+    assert withexe != key
+
+    bso.code.runopts = ['-n', '2']
+    assert get_cache_key(bso, bsdict, bso.core) != withexe
+    bso.code.runopts = ['-n', '1']
+
+    # a new version of the program
+    exe.write('#!/bin/sh\necho\n')
+    assert get_cache_key(bso, bsdict, bso.core) != withexe
+
+
+def test_cached_evaluation(bso):
+
+    x0 = bso.get_x0()
+    first = run_total_energy(x0.copy(), bso)
+    second = run_total_energy(x0.copy(), bso)
+
+    assert first == second
+    assert bso.code.nruns == 1
+    assert (bso.cache.hits, bso.cache.misses) == (1, 1)
+
+    # the cache persists between instances
+    cache = ObjectiveCache(bso.cache.path)
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_lru_eviction(tmpdir):
+
+    cache = ObjectiveCache(str(tmpdir.join('lru.db')), maxsize=2)
+    cache.set('a', 1.0)
+    cache.set('b', 2.0)
+    assert cache.get('a') == 1.0
+    cache.set('c', 3.0)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert np.isclose(cache.get('c'), 3.0)
+    cache.close()
@@ -0,0 +1,131 @@
+import concurrent.futures
+
+from chemtools.basisopt import (BSOptimizer, evaluate_parallel,
+                                fd_objective_gradient, run_core_energy,
+                                run_total_energy)
+from chemtools.molecule import Molecule
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def he():
+    return Molecule(name='He', atoms=[('He', )])
+
+
+def exact_gradient(x0):
+    'gradient of sum((exp(x) - 1)^2) with respect to x'
+    return 2.0 * (np.exp(x0) - 1.0) * np.exp(x0)
+
+
+@pytest.mark.parametrize('scheme, tol', [('forward', 1.0e-2),
+                                         ('central', 1.0e-6)])
+def test_fd_gradient(tmpdir, fakecode, he, scheme, tol):
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'exp', 3, (0.5, 1.5, 4.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='',
+                      optalg={'method': 'BFGS', 'jacob': scheme, 'workers': 2,
+                              'options': {'eps': 1.0e-4}})
+
+    x0 = bso.get_x0()
+    fun, grad = fd_objective_gradient(x0, bso)
+
+    assert np.isclose(fun, run_total_energy(x0.copy(), bso))
+    assert np.allclose(grad, exact_gradient(x0), atol=tol)
+    assert tmpdir.join('he_jobs', '0000', 'he.out').check()
+
+
+def test_evaluate_parallel_matches_serial(tmpdir, fakecode, he):
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'et', 4, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='')
+
+    xs = [np.array([0.5, 2.0]), np.array([0.4, 2.5]), np.array([0.3, 3.0])]
+    values = evaluate_parallel(xs, bso, workers=3)
+    serial = [run_total_energy(x.copy(), bso) for x in xs]
+
+    assert np.allclose(values, serial)
+
+
+def test_evaluate_parallel_core(tmpdir, fakecode, he):
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'et', 4, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='', runcore=True,
+                      core=[[1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0]])
+
+    xs = [np.array([0.5, 2.0]), np.array([0.4, 2.5])]
+    values = evaluate_parallel(xs, bso, workers=2)
+    serial = [run_core_energy(x.copy(), bso) for x in xs]
+
+    assert np.allclose(values, serial)
+    assert all(value < 0.0 for value in values)
+    assert tmpdir.join('he_jobs', '0001', 'he_core1.out').check()
+    assert tmpdir.join('he_jobs', '0001', 'he_core0.out').check()
+
+
+def test_gradient_optimization(tmpdir, fakecode, he):
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'exp', 2, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='',
+                      optalg={'method': 'L-BFGS-B', 'jacob': 'central',
+                              'options': {'eps': 1.0e-5}})
+    bso.run()
+
+    assert bso.result.fun < 1.0e-8
+
+
+def test_wrong_jacob():
+
+    with pytest.raises(ValueError):
+        BSOptimizer(fsopt={'He': [('s', 'exp', 1, (0.5,))]},
+                    optalg={'method': 'BFGS', 'jacob': 'backward',
+                            'options': {}})
+
+
+def test_evaluate_parallel_fresh_workdir(tmpdir, fakecode, he):
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'et', 4, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='')
+
+    stale = tmpdir.mkdir('he_jobs').mkdir('0000').join('stale.out')
+    stale.write('energy 0.0')
+
+    values = evaluate_parallel([np.array([0.5, 2.0])], bso, workers=1)
+
+    assert not stale.check()
+    assert np.isclose(values[0], run_total_energy(np.array([0.5, 2.0]), bso))
+
+
+def test_single_pool(tmpdir, fakecode, he, monkeypatch):
+
+    pools = []
+
+    class CountingExecutor(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super(CountingExecutor, self).__init__(*args, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor',
+                        CountingExecutor)
+
+    tmpdir.chdir()
+    fsopt = {'He': [('s', 'exp', 2, (0.5, 2.0))]}
+    bso = BSOptimizer(objective='hf total energy', code=fakecode, mol=he,
+                      fsopt=fsopt, fname='he.inp', template='',
+                      optalg={'method': 'BFGS', 'jacob': 'forward',
+                              'workers': 2, 'options': {'eps': 1.0e-5}})
+    bso.run()
+
+    assert bso.result.nfev > 1
+    assert len(pools) == 1
+    assert bso.pool is None
@@ -0,0 +1,174 @@
+
+import os
+
+from chemtools import basislibrary
+from chemtools.basislibrary import BasisLibrary, get_library, index_library
+from chemtools.basisset import BasisSet
+from chemtools.compactbasis import CompactBasisSet
+import pytest
+
+
+NAMES = {'H': 'HYDROGEN', 'Li': 'LITHIUM', 'Ne': 'NEON'}
+
+
+def header(name):
+    return '!' + '-' * 40 + '\n! Basis Set Exchange\n!' + '-' * 40 + \
+        '\n!   Basis set: {}\n! Description: test\n\n'.format(name)
+
+
+def get_bases(name, nexp):
+    return [BasisSet.from_sequence(name=name, element=el,
+                                   funs=[('s', 'et', nexp, (0.1, 3.0)),
+                                         ('p', 'et', nexp - 2, (0.3, 3.0))])
+            for el in NAMES]
+
+
+def library_string(fmt, bases):
+
+    if fmt == 'gaussian':
+        return ''.join(bs.to_gaussian() for bs in bases)
+    elif fmt == 'molpro':
+        return 'basis={\n' + ''.join(bs.to_molpro() for bs in bases) + '}\n'
+    elif fmt == 'gamessus':
+        return '$DATA\n' + '\n'.join(NAMES[bs.element] + '\n' + bs.to_gamessus()
+                                     for bs in bases) + '$END\n'
+
+
+@pytest.fixture(params=['gaussian', 'molpro', 'gamessus'])
+def library(request, tmpdir):
+
+    fmt = request.param
+    string = ''.join(header(name) + library_string(fmt, get_bases(name, nexp))
+                     + '\n' for name, nexp in [('small', 4), ('large', 7)])
+    fname = tmpdir.join('library.' + fmt)
+    fname.write(string)
+    return str(fname), fmt
+
+
+def test_index(library):
+
+    fname, fmt = library
+    lib = BasisLibrary(fname, fmt)
+
+    assert lib.keys() == [(el, name) for name in ['small', 'large']
+                          for el in ['H', 'Li', 'Ne']]
+    assert lib.names() == ['small', 'large']
+    assert lib.elements() == ['H', 'Li', 'Ne']
+    assert ('Li', 'large') in lib
+    assert 'Li' not in lib
+    assert len(lib) == 6
+    assert lib.cache_info().misses == 0
+
+    with open(fname, 'rb') as fobj:
+        assert index_library(fobj.read(), fmt, name='x') == lib.index['blocks']
+
+
+def test_get_matches_full_parse(library):
+
+    fname, fmt = library
+    lib = BasisLibrary(fname, fmt)
+
+    for name, nexp in [('small', 4), ('large', 7)]:
+        for ref in get_bases(name, nexp):
+            full = BasisSet.from_str(library_string(fmt, [ref]), fmt=fmt,
+                                     name=name)
+            bs = lib.get(ref.element.upper(), name)
+            assert type(bs) is BasisSet
+            assert bs.to_json() == full.to_json()
+
+
+def test_lazy_lru(library):
+
+    fname, fmt = library
+    lib = BasisLibrary(fname, fmt, cachesize=2)
+
+    first = lib.get('Ne', 'large')
+    first.uncontract()
+    first.functions.clear()
+    # the cached basis set is not modified by the caller
+    assert lib.get('Ne', 'large').nf() == 7 + 3 * 5
+    assert lib.cache_info() == (1, 1, 2, 1)
+
+    lib.get('H', 'small')
+    lib.get('Li', 'small')
+    assert lib.cache_info().currsize == 2
+    lib.get('Ne', 'large')
+    assert lib.cache_info().misses == 4
+
+    with pytest.raises(KeyError):
+        lib.get('Ne')
+    with pytest.raises(KeyError):
+        lib.get('Ar', 'small')
+
+
+def test_gaussian94_layout(tmpdir):
+
+    # Basis Set Exchange gaussian94 dumps have no "****" before the first
+    # element of a basis set
+    string = ''.join(header(name) + '\n' +
+                     ''.join(bs.to_gaussian()[len('****\n'):]
+                             for bs in get_bases(name, nexp)) + '\n\n'
+                     for name, nexp in [('small', 4), ('large', 7)])
+    fname = tmpdir.join('bse.gbs')
+    fname.write(string)
+    lib = BasisLibrary(str(fname), 'gaussian')
+
+    assert lib.keys() == [(el, name) for name in ['small', 'large']
+                          for el in ['H', 'Li', 'Ne']]
+    for name, nexp in [('small', 4), ('large', 7)]:
+        for ref in get_bases(name, nexp):
+            assert lib.get(ref.element, name).to_gaussian() == \
+                ref.to_gaussian()
+
+
+def test_rebuild_and_from_file(tmpdir):
+
+    fname = tmpdir.join('single.gbs')
+    fname.write(library_string('gaussian', get_bases('et', 5)[:1]))
+    lib = BasisLibrary(str(fname), 'gaussian', basiscls=CompactBasisSet)
+
+    assert lib.keys() == [('H', 'single')]
+    assert isinstance(lib['H'], CompactBasisSet)
+
+    fname.write(library_string('gaussian', get_bases('et', 5)))
+    os.utime(str(fname), (0, 0))
+    assert lib.keys() == [('H', 'single'), ('Li', 'single'), ('Ne', 'single')]
+    assert lib.cache_info().currsize == 0
+
+    bs = BasisSet.from_file(str(fname), fmt='gaussian', element='Li')
+    assert bs.element == 'Li'
+    assert bs.to_json() == BasisSet.from_file(str(fname),
+                                              fmt='gaussian')['Li'].to_json()
+
+
+def test_shared_library(tmpdir):
+
+    basislibrary.LIBRARIES.clear()
+    fname = tmpdir.join('shared.gbs')
+    fname.write(library_string('gaussian', get_bases('et', 5)))
+
+    for el in ['H', 'Li', 'H']:
+        BasisSet.from_file(str(fname), fmt='gaussian', element=el)
+    lib = get_library(str(fname), 'gaussian')
+    assert len(basislibrary.LIBRARIES) == 1
+    assert lib.cache_info() == (1, 2, basislibrary.LIBRARY_CACHE_SIZE, 2)
+
+    fname.write(library_string('gaussian', get_bases('et', 6)))
+    os.utime(str(fname), (0, 0))
+    assert BasisSet.from_file(str(fname), fmt='gaussian',
+                              element='H').nf() == 6 + 3 * 4
+
+
+def test_from_file_named(library):
+
+    fname, fmt = library
+    for name, nexp in [('small', 4), ('large', 7)]:
+        bs = BasisSet.from_file(fname, fmt=fmt, name=name, element='Ne')
+        assert bs.name == name
+        assert bs.functions['s']['e'].size == nexp
+    with pytest.raises(KeyError):
+        BasisSet.from_file(fname, fmt=fmt, element='Ne')
+
+    # the library of the file is shared regardless of the requested name
+    assert len([key for key in basislibrary.LIBRARIES
+                if key[0] == os.path.abspath(fname)]) == 1
@@ -274,3 +274,64 @@ def test_basis_set_parser_gaussian(tmpdir):
     assert bsd['Li'].nf() == 23
     assert bsd['Be'].nf() == 23
 
+
+
+from chemtools.basisparse import (element_symbol, parse_basis, parse_reals,
+                                  parse_table)
+import numpy as np
+import pytest
+
+
+def long_contraction_basis():
+
+    return BasisSet.from_sequence(name='seq', element='Ne',
+                                  funs=[('s', 'et', 14, (0.05, 2.3)),
+                                        ('p', 'et', 11, (0.08, 2.4)),
+                                        ('d', 'et', 2, (0.5, 2.5))])
+
+
+def test_parse_reals_fortran():
+
+    values = parse_reals(' 1.5D+01, -2.0d-02,3.0E+00, 4 ', sep=',')
+    assert np.array_equal(values, [15.0, -0.02, 3.0, 4.0])
+
+
+def test_parse_table_inconsistent():
+
+    assert parse_table(['1 2.0D0', '3 4.0']).shape == (2, 2)
+    with pytest.raises(ValueError):
+        parse_table(['1 2.0', '3 4.0 5.0'])
+
+
+@pytest.mark.parametrize('fmt', ['molpro', 'gamessus', 'gaussian'])
+def test_parser_roundtrip_long_contractions(fmt):
+
+    bs = long_contraction_basis()
+    # a general contraction over 12 primitives and the uncontracted functions
+    cc = np.random.RandomState(5).uniform(size=12)
+    bs.functions['s']['cf'][0] = np.array(list(zip(range(12), cc)),
+                                          dtype=bs.functions['s']['cf'][0].dtype)
+    del bs.functions['s']['cf'][1:12]
+
+    efmt, cfmt = '24.16E', '24.16E'
+    if fmt == 'molpro':
+        string = bs.to_molpro(withpars=True, efmt=efmt, cfmt=cfmt)
+    elif fmt == 'gamessus':
+        string = '$DATA\nNEON\n' + bs.to_gamessus(efmt=efmt, cfmt=cfmt) + '$END'
+    else:
+        string = bs.to_gaussian(efmt=efmt, cfmt=cfmt)
+    string = string.replace('E+', 'D+').replace('E-', 'D-')
+
+    parsed = parse_basis(string, fmt=fmt)
+    assert list(parsed.keys()) == ['Ne']
+    for shell, fs in bs.functions.items():
+        assert np.array_equal(parsed['Ne'][shell]['e'], fs['e'])
+        assert np.array_equal(BasisSet('x', 'Ne', functions=parsed['Ne']).contraction_matrix(shell),
+                              bs.contraction_matrix(shell))
+
+
+def test_element_symbol():
+
+    assert element_symbol('HYDROGEN') == 'H'
+    assert element_symbol('li') == 'Li'
+    assert element_symbol('Neon') == 'Ne'
@@ -0,0 +1,133 @@
+
+import sys
+
+from chemtools import cli
+from chemtools.basisparse import CFDTYPE
+from chemtools.basisset import BasisSet
+from chemtools.basisstore import BasisStore, read_binary, write_binary
+from chemtools.compactbasis import CompactBasisSet
+import numpy as np
+import pytest
+
+
+MOLPRO = '''basis={
+s, LI , 1469.0000000, 220.5000000, 50.2600000, 14.2400000, 4.5810000, 1.5800000, 0.5640000, 0.0734500, 0.0280500, 0.0086400
+c, 1.8, 0.0007660, 0.0058920, 0.0296710, 0.1091800, 0.2827890, 0.4531230, 0.2747740, 0.0097510
+c, 1.8, -0.0001200, -0.0009230, -0.0046890, -0.0176820, -0.0489020, -0.0960090, -0.1363800, 0.5751020
+c, 9.9, 1
+c, 10.10, 1
+p, LI , 1.5340000, 0.2749000, 0.0736200, 0.0240300, 0.0057900
+c, 1.3, 0.0227840, 0.1391070, 0.5003750
+c, 4.4, 1
+c, 5.5, 1
+d, LI , 0.1239000, 0.0725000
+c, 1.1, 1
+c, 2.2, 1
+}'''
+
+
+@pytest.fixture
+def bases():
+
+    contracted = BasisSet.from_str(MOLPRO, fmt='molpro', name='cc')
+    contracted.family = 'dunning'
+    contracted.info = {'source': 'test'}
+    return [contracted,
+            BasisSet.from_sequence(name='et', element='Li',
+                                   funs=[('s', 'et', 12, (0.01, 2.5)),
+                                         ('p', 'et', 6, (0.05, 2.8))]),
+            BasisSet.from_sequence(name='et', element='He',
+                                   funs=[('s', 'et', 8, (0.1, 3.5)),
+                                         ('d', 'et', 3, (0.2, 2.5))]),
+            BasisSet(name='empty', element='H', functions={})]
+
+
+@pytest.fixture
+def fname(tmpdir, bases):
+
+    fname = str(tmpdir.join('bases.bsb'))
+    write_binary(bases, fname)
+    return fname
+
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_roundtrip(fname, bases, use_mmap):
+
+    store = BasisStore(fname, mmap=use_mmap)
+    assert len(store) == 4
+    assert store.keys() == [('Li', 'cc'), ('Li', 'et'), ('He', 'et'),
+                            ('H', 'empty')]
+    assert store.names('Li') == ['cc', 'et']
+    assert store.elements() == ['Li', 'He', 'H']
+
+    for ref, bs in zip(bases, store.to_list()):
+        assert type(bs) is BasisSet
+        assert bs.to_json() == ref.to_json()
+
+    assert store.get('He').to_json() == bases[2].to_json()
+    assert store[('Li', 'cc')].to_molpro() == bases[0].to_molpro()
+    assert store[1].to_json() == bases[1].to_json()
+    assert ('Li', 'et') in store and 'Li' not in store
+    with pytest.raises(KeyError):
+        store.get('Li')
+
+
+def test_numpy_info(tmpdir, bases):
+
+    bases[0].info = {'source': 'test', 'weights': np.array([0.5, 1.5]),
+                     'cf': np.array([(0, 0.25)], dtype=CFDTYPE)}
+    fname = str(tmpdir.join('info.bsb'))
+    write_binary(bases, fname)
+
+    info = BasisStore(fname).get('Li', 'cc').info
+    assert info['source'] == 'test'
+    assert isinstance(info['weights'], np.ndarray)
+    assert np.array_equal(info['weights'], [0.5, 1.5])
+    assert info['cf'].dtype == CFDTYPE
+
+
+def test_compact_shares_arrays(fname, bases):
+
+    store = BasisStore(fname, basiscls=CompactBasisSet)
+    bs = store.get('Li', 'cc')
+    assert isinstance(bs, CompactBasisSet)
+    assert bs.to_json() == bases[0].to_json()
+
+    shell = bs.functions['s']
+    assert not shell.coeffs.flags.writeable
+    assert np.shares_memory(shell.coeffs, store.arrays['coeffs'])
+    # exponents are copied and can be modified
+    shell.e *= 2.0
+    assert store.get('Li', 'cc').functions['s'].e[0] == bases[0].functions['s']['e'][0]
+
+
+def test_errors(tmpdir, fname, bases):
+
+    with pytest.raises(ValueError):
+        write_binary(bases + [bases[1]], str(tmpdir.join('dup.bsb')))
+
+    other = tmpdir.join('other.bsb')
+    other.write('basis={\n}\n')
+    with pytest.raises(ValueError):
+        read_binary(str(other))
+
+    with pytest.raises(ValueError):
+        BasisStore(str(tmpdir.join('missing.bsb')))
+
+
+def test_bsconvert(tmpdir, monkeypatch, bases):
+
+    molpro = tmpdir.join('li.molpro')
+    molpro.write(MOLPRO)
+    binary = str(tmpdir.join('li.bsb'))
+    out = str(tmpdir.join('li.gbs'))
+
+    monkeypatch.setattr(sys, 'argv', ['bsconvert', str(molpro), '-from',
+                                      'molpro', '-to', 'binary', '-o', binary])
+    cli.bsconvert()
+    monkeypatch.setattr(sys, 'argv', ['bsconvert', binary, '-from', 'binary',
+                                      '-to', 'gaussian', '-o', out])
+    cli.bsconvert()
+
+    with open(out) as fobj:
+        assert fobj.read() == bases[0].to_gaussian() + '\n'
@@ -0,0 +1,144 @@
+
+import os
+import stat
+import sys
+
+from chemtools import cli
+from chemtools.basisset import BasisSet
+from chemtools.basisstore import BasisStore
+import pytest
+
+
+def get_bases(nexp):
+    return [BasisSet.from_sequence(name='et', element=el,
+                                   funs=[('s', 'et', nexp, (0.1, 3.0)),
+                                         ('p', 'et', nexp - 2, (0.3, 3.0))])
+            for el in ['H', 'Ne']]
+
+
+@pytest.fixture
+def inputs(tmpdir):
+
+    indir = tmpdir.mkdir('inputs')
+    bases = {}
+    for nexp in [4, 5, 6]:
+        stem = 'et{}'.format(nexp)
+        bases[stem] = get_bases(nexp)
+        indir.join(stem + '.gbs').write(''.join(bs.to_gaussian()
+                                                for bs in bases[stem]))
+    return indir, bases
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['bsconvert'] + list(args))
+    return cli.bsconvert()
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_batch_directory(tmpdir, monkeypatch, capsys, inputs, jobs):
+
+    indir, bases = inputs
+    indir.join('broken.gbs').write('****\nH     0\nS   1   1.00\n  abc  1.0\n****\n')
+    outdir = str(tmpdir.join('out'))
+
+    status = run(monkeypatch, str(indir), '-from', 'gaussian', '-to',
+                 'molpro', '-to', 'nwchem', '-to', 'binary', '-d', outdir,
+                 '-j', jobs)
+
+    assert status == 1
+    stderr = capsys.readouterr().err
+    assert 'broken.gbs: failed' in stderr
+    assert 'converted 3 of 4 files (6 basis sets) to 15 files' in stderr
+
+    files = sorted(os.listdir(outdir))
+    assert len(files) == 15
+    assert not [f for f in files if f.startswith('.')]
+    for stem, bss in bases.items():
+        for bs in bss:
+            label = os.path.join(outdir, stem + '_' + bs.element)
+            with open(label + '.molpro') as fobj:
+                assert fobj.read() == bs.to_molpro() + '\n'
+            with open(label + '.nwchem') as fobj:
+                assert fobj.read() == bs.to_nwchem() + '\n'
+        store = BasisStore(os.path.join(outdir, stem + '.bsb'))
+        assert [bs.to_json() for bs in store.to_list()] == \
+            [BasisSet.from_str(bs.to_gaussian(), fmt='gaussian',
+                               name=stem).to_json() for bs in bss]
+
+
+def test_glob_and_single(tmpdir, monkeypatch, capsys, inputs):
+
+    indir, bases = inputs
+    outdir = tmpdir.join('out')
+
+    status = run(monkeypatch, str(indir.join('et[45].gbs')), '-from',
+                 'gaussian', '-to', 'pickle', '-d', str(outdir), '-j', '1')
+    assert status == 0
+    assert sorted(os.listdir(str(outdir))) == \
+        ['et4_H.pkl', 'et4_Ne.pkl', 'et5_H.pkl', 'et5_Ne.pkl']
+    loaded = BasisSet.from_pickle(str(outdir.join('et5_Ne.pkl')))
+    assert loaded.to_gaussian() == bases['et5'][1].to_gaussian()
+    capsys.readouterr()
+
+    # a single file and format is still written to stdout
+    run(monkeypatch, str(indir.join('et6.gbs')), '-from', 'gaussian',
+        '-to', 'gaussian')
+    assert capsys.readouterr().out == \
+        ''.join(bs.to_gaussian() + '\n' for bs in bases['et6'])
+
+    # options before the file name
+    run(monkeypatch, '-from', 'gaussian', '-to', 'nwchem',
+        str(indir.join('et6.gbs')))
+    assert capsys.readouterr().out == \
+        ''.join(bs.to_nwchem() + '\n' for bs in bases['et6'])
+
+    with pytest.raises(SystemExit):
+        run(monkeypatch, str(indir), '-from', 'gaussian', '-o', 'out.molpro')
+
+
+def test_same_stems(tmpdir, monkeypatch, capsys, inputs):
+
+    indir, bases = inputs
+    other = tmpdir.mkdir('other')
+    other.join('et4.gbs').write(indir.join('et4.gbs').read())
+    outdir = tmpdir.join('out')
+
+    with pytest.raises(SystemExit):
+        run(monkeypatch, str(indir), str(other), '-from', 'gaussian',
+            '-to', 'molpro', '-d', str(outdir), '-j', '1')
+    assert 'et4.gbs' in capsys.readouterr().err
+    assert not outdir.check()
+
+
+def test_output_mode(tmpdir, monkeypatch, inputs):
+
+    indir, bases = inputs
+    outdir = tmpdir.join('out')
+    umask = os.umask(0o022)
+    try:
+        run(monkeypatch, str(indir.join('et4.gbs')), '-from', 'gaussian',
+            '-to', 'molpro', '-d', str(outdir), '-j', '1')
+        out = str(outdir.join('et4_H.molpro'))
+        assert stat.S_IMODE(os.stat(out).st_mode) == 0o644
+
+        # the mode of a replaced file is kept
+        os.chmod(out, 0o640)
+        run(monkeypatch, str(indir.join('et4.gbs')), '-from', 'gaussian',
+            '-to', 'molpro', '-d', str(outdir), '-j', '1')
+        assert stat.S_IMODE(os.stat(out).st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_names_from_stem(tmpdir, monkeypatch, inputs):
+
+    indir, bases = inputs
+    run(monkeypatch, str(indir.join('et4.gbs')), '-from', 'gaussian',
+        '-to', 'binary')
+    run(monkeypatch, str(indir.join('et4.gbs')), '-from', 'gaussian',
+        '-to', 'binary', '-to', 'molpro', '-d', str(tmpdir.join('out')),
+        '-j', '1')
+
+    single = BasisStore(str(indir.join('et4.bsb')))
+    batch = BasisStore(str(tmpdir.join('out', 'et4.bsb')))
+    assert single.keys() == batch.keys() == [('H', 'et4'), ('Ne', 'et4')]
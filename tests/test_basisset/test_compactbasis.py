@@ -0,0 +1,205 @@
+
+import pickle
+import tracemalloc
+from copy import deepcopy
+
+from chemtools.basisset import BasisSet, merge
+from chemtools.compactbasis import CompactBasisSet, Shell
+import numpy as np
+import pytest
+
+
+MOLPRO = '''basis={
+s, LI , 1469.0000000, 220.5000000, 50.2600000, 14.2400000, 4.5810000, 1.5800000, 0.5640000, 0.0734500, 0.0280500, 0.0086400
+c, 1.8, 0.0007660, 0.0058920, 0.0296710, 0.1091800, 0.2827890, 0.4531230, 0.2747740, 0.0097510
+c, 1.8, -0.0001200, -0.0009230, -0.0046890, -0.0176820, -0.0489020, -0.0960090, -0.1363800, 0.5751020
+c, 9.9, 1
+c, 10.10, 1
+p, LI , 1.5340000, 0.2749000, 0.0736200, 0.0240300, 0.0057900
+c, 1.3, 0.0227840, 0.1391070, 0.5003750
+c, 4.4, 1
+c, 5.5, 1
+d, LI , 0.1239000, 0.0725000
+c, 1.1, 1
+c, 2.2, 1
+}'''
+
+WRITERS = ['to_gamessus', 'to_gaussian', 'to_molpro', 'to_nwchem',
+           'to_cfour', 'to_dalton', 'print_functions']
+
+
+@pytest.fixture
+def basis():
+    return BasisSet.from_str(MOLPRO, fmt='molpro', name='test')
+
+
+@pytest.fixture
+def compact(basis):
+    return CompactBasisSet.from_basisset(basis)
+
+
+def assert_same_functions(first, second, exact=True):
+
+    assert list(first.functions.keys()) == list(second.functions.keys())
+    for shell in first.functions.keys():
+        assert np.array_equal(first.functions[shell]['e'],
+                              second.functions[shell]['e'])
+        if exact:
+            assert np.array_equal(first.contraction_matrix(shell),
+                                  second.contraction_matrix(shell))
+        else:
+            assert np.allclose(first.contraction_matrix(shell),
+                               second.contraction_matrix(shell),
+                               rtol=1.0e-14, atol=0.0)
+
+
+def test_shell_roundtrip(basis):
+
+    fs = basis.functions['s']
+    shell = Shell.from_dict(fs)
+
+    assert shell.ncf == 4
+    assert np.array_equal(shell.indptr, [0, 8, 16, 17, 18])
+    for cf, ref in zip(shell['cf'], fs['cf']):
+        assert np.array_equal(cf, ref)
+    assert shell == Shell.from_dict(shell.to_dict())
+    assert shell == pickle.loads(pickle.dumps(shell))
+    assert deepcopy(shell) == shell and deepcopy(shell) is not shell
+
+
+def test_shell_set_exponents(basis):
+
+    shell = Shell.from_dict(basis.functions['s'])
+    with pytest.raises(ValueError):
+        shell['e'] = shell.e[:5]
+    assert shell.e.size == 10
+
+    # extra exponents not used by the contracted functions are allowed
+    shell['e'] = np.append(shell.e, 0.001)
+    assert shell.e.size == 11
+    assert np.array_equal(shell.indptr, [0, 8, 16, 17, 18])
+
+    unc = Shell(np.array([3.0, 1.0]))
+    unc['e'] = np.array([9.0, 3.0, 1.0])
+    assert unc.ncf == 3
+    assert np.array_equal(unc.contraction_matrix(), np.eye(3))
+
+
+def test_queries(basis, compact):
+
+    assert_same_functions(basis, compact)
+    for method in ['contractions_per_shell', 'primitives_per_shell',
+                   'primitives_per_contraction', 'contraction_scheme',
+                   'contraction_type', 'nf', 'nprimitive']:
+        assert getattr(basis, method)() == getattr(compact, method)()
+
+
+@pytest.mark.parametrize('writer', WRITERS)
+def test_writers(basis, compact, writer):
+
+    assert getattr(basis, writer)() == getattr(compact, writer)()
+
+
+def test_json(basis, compact):
+
+    assert basis.to_json() == compact.to_json()
+    loaded = CompactBasisSet.from_json(compact.to_json())
+    assert isinstance(loaded, CompactBasisSet)
+    assert_same_functions(loaded, basis)
+
+
+def test_to_basisset(basis, compact):
+
+    back = compact.to_basisset()
+    assert type(back) is BasisSet
+    assert back.to_json() == basis.to_json()
+
+
+def test_normalize_sort_uncontract(basis, compact):
+
+    basis.normalize()
+    compact.normalize()
+    assert_same_functions(basis, compact, exact=False)
+    assert np.allclose([n for _, _, n in compact.normalization()], 1.0)
+
+    for reverse in [True, False]:
+        basis.sort(reverse=reverse)
+        compact.sort(reverse=reverse)
+        assert_same_functions(basis, compact, exact=False)
+        assert basis.to_molpro() == compact.to_molpro()
+
+    unc = compact.uncontract(copy=True)
+    assert isinstance(unc, CompactBasisSet)
+    assert_same_functions(unc, basis.uncontract(copy=True))
+    assert compact.contraction_type() != unc.contraction_type()
+
+
+def test_add_append_merge(basis, compact):
+
+    other = BasisSet.from_sequence(name='seq', element='Li',
+                                   funs=[('p', 'et', 2, (0.01, 3.0)),
+                                         ('f', 'et', 2, (0.3, 2.5))])
+
+    assert_same_functions(basis + other, compact + other)
+    assert_same_functions(merge(basis, other), compact.merge(other))
+
+    appended = deepcopy(compact)
+    appended.append(CompactBasisSet.from_basisset(other))
+    assert_same_functions(appended, basis + other)
+    # the original is not modified
+    assert_same_functions(compact, basis)
+
+
+def test_partial_wave_expand(compact):
+
+    expanded = compact.partial_wave_expand()
+    assert [list(bs.functions.keys()) for bs in expanded] == \
+        [['s'], ['s', 'p'], ['s', 'p', 'd']]
+
+
+def test_from_sequence_and_pickle(tmpdir):
+
+    funs = [('s', 'et', 10, (0.01, 2.5)), ('p', 'et', 5, (0.05, 3.0))]
+    regular = BasisSet.from_sequence(name='seq', element='He', funs=funs)
+    compact = CompactBasisSet.from_sequence(name='seq', element='He',
+                                            funs=funs)
+
+    assert isinstance(compact, CompactBasisSet)
+    assert regular.to_json() == compact.to_json()
+    assert np.allclose(regular.completeness_profile(np.logspace(-2, 2, 20)),
+                       compact.completeness_profile(np.logspace(-2, 2, 20)))
+
+    fname = str(tmpdir.join('seq.pkl'))
+    compact.to_pickle(fname)
+    assert_same_functions(BasisSet.from_pickle(fname), regular)
+
+
+def test_shared_uncontracted_arrays(compact):
+
+    unc = compact.uncontract(copy=True)
+    unc.sort()
+    unc.normalize()
+    for fs in unc.functions.values():
+        assert not fs.indices.flags.writeable
+    assert deepcopy(unc).functions['s'].indices is unc.functions['s'].indices
+    # the contracted shells own their arrays
+    assert compact.functions['s'].indices.flags.writeable
+
+
+def test_memory():
+
+    funs = [(shell, 'et', 100, (0.01, 1.3)) for shell in 'spdfgh']
+    regular = BasisSet.from_sequence(name='seq', element='Xe', funs=funs)
+    compact = CompactBasisSet.from_basisset(regular)
+
+    def allocated(func):
+        tracemalloc.start()
+        func()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    regular_size = allocated(lambda: deepcopy(regular.functions))
+    compact_size = allocated(lambda: deepcopy(compact.functions))
+
+    assert compact_size * 10 < regular_size
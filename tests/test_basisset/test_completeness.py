@@ -0,0 +1,118 @@
+
+from chemtools import basisset
+from chemtools.basisset import (BasisSet, completeness_profiles, inverse_sqrt,
+                                orthonormal_contractions, primitive_overlap)
+from chemtools.basisparse import get_l
+from scipy.linalg import inv, sqrtm
+import numpy as np
+import pytest
+
+
+CONTRACTED_MOLPRO = '''basis={
+s, LI , 1469.0000000, 220.5000000, 50.2600000, 14.2400000, 4.5810000, 1.5800000, 0.5640000, 0.0734500, 0.0280500, 0.0086400
+c, 1.8, 0.0007660, 0.0058920, 0.0296710, 0.1091800, 0.2827890, 0.4531230, 0.2747740, 0.0097510
+c, 1.8, -0.0001200, -0.0009230, -0.0046890, -0.0176820, -0.0489020, -0.0960090, -0.1363800, 0.5751020
+c, 9.9, 1
+c, 10.10, 1
+p, LI , 1.5340000, 0.2749000, 0.0736200, 0.0240300, 0.0057900
+c, 1.3, 0.0227840, 0.1391070, 0.5003750
+c, 4.4, 1
+c, 5.5, 1
+d, LI , 0.1239000, 0.0725000
+c, 1.1, 1
+c, 2.2, 1
+}'''
+
+
+def completeness_profile_sqrtm(bs, zetas):
+    'reference implementation with inv(sqrtm(S))'
+
+    out = np.zeros((zetas.size, len(bs.functions)))
+    for i, (shell, fs) in enumerate(bs.functions.items()):
+        cc = bs.contraction_matrix(shell)
+        S = bs.shell_overlap(shell)
+        X = inv(sqrtm(S))
+        SO = primitive_overlap(get_l(shell), fs['e'], zetas)
+        J = np.dot(np.dot(cc, X).T, SO)
+        out[:, i] = np.sum(np.square(J), axis=0)
+    return out
+
+
+@pytest.fixture
+def bases():
+
+    contracted = BasisSet.from_str(CONTRACTED_MOLPRO, fmt='molpro')
+    return [contracted,
+            BasisSet.from_sequence(name='a', element='Li',
+                                   funs=[('s', 'et', 12, (0.01, 2.5)),
+                                         ('p', 'et', 6, (0.05, 2.8))]),
+            BasisSet.from_sequence(name='b', element='Li',
+                                   funs=[('s', 'et', 4, (0.1, 3.5)),
+                                         ('d', 'et', 3, (0.2, 2.5)),
+                                         ('f', 'et', 2, (0.4, 2.5))])]
+
+
+@pytest.fixture
+def zetas():
+    return np.logspace(-3, 4, 60)
+
+
+def test_inverse_sqrt():
+
+    A = np.random.RandomState(3).uniform(size=(6, 6))
+    S = np.dot(A, A.T) + 6.0 * np.eye(6)
+    X = inverse_sqrt(S)
+
+    assert np.allclose(X, inv(sqrtm(S)))
+    assert np.allclose(np.dot(X, np.dot(S, X)), np.eye(6))
+
+
+def test_profile_matches_sqrtm(bases, zetas):
+
+    for bs in bases:
+        assert np.allclose(bs.completeness_profile(zetas),
+                           completeness_profile_sqrtm(bs, zetas),
+                           rtol=1.0e-8, atol=1.0e-10)
+
+
+def test_batched_profiles(bases, zetas):
+
+    profiles = completeness_profiles(bases, zetas)
+    assert profiles.shape == (3, 4, zetas.size)
+
+    for ibs, bs in enumerate(bases):
+        single = bs.completeness_profile(zetas)
+        for ishell, shell in enumerate('spdf'):
+            if shell in bs.functions:
+                jshell = list(bs.functions.keys()).index(shell)
+                assert np.allclose(profiles[ibs, ishell], single[:, jshell],
+                                   rtol=1.0e-10, atol=1.0e-12)
+            else:
+                assert np.all(profiles[ibs, ishell] == 0.0)
+
+
+def test_batched_profiles_shells(bases, zetas):
+
+    profiles = completeness_profiles(bases, zetas, shells=['p', 'g'])
+    assert profiles.shape == (3, 2, zetas.size)
+    assert np.all(profiles[2, 0] == 0.0)
+    assert np.all(profiles[:, 1] == 0.0)
+
+
+def test_orthonormal_contractions_cache(bases):
+
+    basisset.INVSQRT_CACHE.clear()
+    bs = bases[0]
+    exps, cc = bs.functions['s']['e'], bs.contraction_matrix('s')
+
+    first = orthonormal_contractions(0, exps, cc)
+    assert len(basisset.INVSQRT_CACHE) == 1
+    assert orthonormal_contractions(0, exps.copy(), cc.copy()) is first
+    assert orthonormal_contractions(1, exps, cc) is not first
+    assert len(basisset.INVSQRT_CACHE) == 2
+
+    # orthonormality of the transformed functions
+    S = np.dot(first.T, np.dot(primitive_overlap(0, exps, exps), first))
+    assert np.allclose(S, np.eye(cc.shape[1]))
+    with pytest.raises(ValueError):
+        first[0, 0] = 1.0
@@ -0,0 +1,141 @@
+
+import json
+import os
+from collections import OrderedDict
+
+from chemtools.basisset import (BasisSet, format_blocks, format_rows,
+                                format_wrapped, partition_contractions,
+                                row_template, splitlist)
+from chemtools.basisparse import CFDTYPE
+from chemtools.compactbasis import CompactBasisSet
+import numpy as np
+import pytest
+
+
+# outputs of the writers recorded with the original string concatenation
+# implementation
+GOLDEN = os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                      'data', 'writers.json')
+
+MOLPRO = '''basis={
+s, LI , 1469.0000000, 220.5000000, 50.2600000, 14.2400000, 4.5810000, 1.5800000, 0.5640000, 0.0734500, 0.0280500, 0.0086400
+c, 1.8, 0.0007660, 0.0058920, 0.0296710, 0.1091800, 0.2827890, 0.4531230, 0.2747740, 0.0097510
+c, 1.8, -0.0001200, -0.0009230, -0.0046890, -0.0176820, -0.0489020, -0.0960090, -0.1363800, 0.5751020
+c, 9.9, 1
+c, 10.10, 1
+p, LI , 1.5340000, 0.2749000, 0.0736200, 0.0240300, 0.0057900
+c, 1.3, 0.0227840, 0.1391070, 0.5003750
+c, 4.4, 1
+c, 5.5, 1
+d, LI , 0.1239000, 0.0725000
+c, 1.1, 1
+c, 2.2, 1
+}'''
+
+
+def get_bases():
+
+    li = BasisSet.from_str(MOLPRO, fmt='molpro', name='li')
+    seq = BasisSet.from_sequence(name='seq', element='Ne',
+                                 funs=[('s', 'et', 8, (0.05, 3.1)),
+                                       ('p', 'et', 6, (0.08, 2.9)),
+                                       ('d', 'et', 4, (0.3, 2.5)),
+                                       ('f', 'et', 3, (0.5, 2.5)),
+                                       ('g', 'et', 2, (0.9, 2.5))])
+
+    # contracted functions with non consecutive exponent indices
+    funs = OrderedDict()
+    funs['s'] = {'e': np.array([5000.0, 750.5, 170.25, 48.1, 15.7, 5.6, 2.1,
+                                0.4, 0.11]),
+                 'cf': [np.array([(4, 0.21), (0, 0.0015), (2, 0.4),
+                                  (6, 0.12), (1, 0.0117)], dtype=CFDTYPE),
+                        np.array([(2, -0.16), (6, 0.53)], dtype=CFDTYPE),
+                        np.array([(7, 1.0)], dtype=CFDTYPE),
+                        np.array([(8, 1.0)], dtype=CFDTYPE)]}
+    funs['p'] = {'e': np.array([34.5, 7.9, 2.3, 0.72, 0.21]),
+                 'cf': [np.array([(0, 0.0159), (1, 0.0997), (2, 0.3105),
+                                  (3, 0.4911), (4, 0.3363)], dtype=CFDTYPE),
+                        np.array([(4, 1.0)], dtype=CFDTYPE)]}
+    funs['d'] = {'e': np.array([1.2]),
+                 'cf': [np.array([(0, 1.0)], dtype=CFDTYPE)]}
+    mixed = BasisSet(name='mixed', element='Na', functions=funs)
+
+    return {'li': li, 'seq': seq, 'mixed': mixed}
+
+
+with open(GOLDEN) as fgolden:
+    CASES = json.load(fgolden)
+
+
+@pytest.fixture(scope='module')
+def bases():
+    return get_bases()
+
+
+@pytest.mark.parametrize('case', CASES,
+                         ids=['{basis}-{method}-{0}'.format(i, **case)
+                              for i, case in enumerate(CASES)])
+def test_writers_golden(bases, case):
+
+    bs = bases[case['basis']]
+    assert getattr(bs, case['method'])(**case['kwargs']) == case['output']
+
+    compact = CompactBasisSet.from_basisset(bs)
+    assert getattr(compact, case['method'])(**case['kwargs']) == case['output']
+
+
+def test_molpro_does_not_modify_instance(bases):
+
+    bs = bases['mixed']
+    before = bs.to_json()
+    bs.to_molpro()
+    assert bs.to_json() == before
+
+
+def test_molpro_keeps_coefficient_order():
+
+    # coefficients are written in the stored order, not sorted by exponent
+    bs = BasisSet(name='order', element='H',
+                  functions={'s': {'e': np.array([3.0, 1.0, 0.2]),
+                                   'cf': [np.array([(1, 0.6), (0, 0.4)],
+                                                   dtype=CFDTYPE),
+                                          np.array([(2, 1.0)], dtype=CFDTYPE)]}})
+    assert bs.to_molpro(efmt='.1f', cfmt='.1f') == \
+        's, H, 3.0, 1.0, 0.2\nc, 1.2, 0.6, 0.4\nc, 3.3, 1.0\n'
+
+
+def test_row_template():
+
+    template = row_template(('3d', '>10.4f'), sep=' & ', lead='{', end='}\n')
+    assert template.format(1, 2.5) == '{  1 &     2.5000}\n'
+
+
+def test_format_wrapped_matches_splitlist():
+
+    rows = np.random.RandomState(7).uniform(size=(4, 12))
+    for width in [1, 5, 12, 20]:
+        ref = ''.join(''.join('{0:12.6f}'.format(x) for x in chunk) + '\n'
+                      for row in rows for chunk in splitlist(row, width))
+        assert format_wrapped(rows, '12.6f', width) == ref
+
+
+def test_format_blocks():
+
+    out = format_blocks(['a\n', 'b\n'], [2, 1], ([1, 2, 3], [0.5, 1.5, 2.5]),
+                        ('d', '.1f'), sep=' ')
+    assert out == 'a\n1 0.5\n2 1.5\nb\n3 2.5\n'
+    assert format_rows([], ()) == ''
+
+
+def test_partition_contractions():
+
+    exps = np.array([4.0, 2.0, 1.0])
+    cc = np.array([[0.5, 0.0, 0.0],
+                   [0.5, 0.0, 1.0],
+                   [0.0, 1.0, 0.0]])
+    (ce, block), (se, sc) = partition_contractions(exps, cc)
+
+    assert np.array_equal(ce, [4.0, 2.0])
+    assert np.array_equal(block, [[0.5], [0.5]])
+    assert np.array_equal(se, [1.0, 2.0])
+    assert np.array_equal(sc, [1.0, 1.0])
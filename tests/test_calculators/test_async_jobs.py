@@ -0,0 +1,160 @@
+
+import asyncio
+import os
+import pickle
+import stat
+import time
+
+from chemtools.calculators.calculator import Calculator
+from chemtools.calculators.dalton import Dalton
+from chemtools.calculators.molpro import Molpro
+from chemtools.calculators.psi4 import Psi4
+import pytest
+
+
+SCRIPT = '''#!/bin/sh
+echo "scratch $TMPDIR" > "$1.out"
+sleep "$2"
+echo "done" >> "$1.out"
+'''
+
+
+class ShellCalculator(Calculator):
+    'Calculator running a shell script that sleeps for the time in the input'
+
+    def get_job(self, inpfile):
+        base = os.path.splitext(inpfile)[0]
+        with open(inpfile, 'r') as finp:
+            delay = finp.read().strip()
+        return [self.executable, base, delay], base + '.out', None
+
+    def run(self, inpfile):
+        return self.run_multiple([inpfile])[0]
+
+    def parse(self, fname, objective, regexp=None):
+        pass
+
+    def write_input(self, fname, delay):
+        with open(fname, 'w') as finp:
+            finp.write(str(delay))
+
+
+@pytest.fixture
+def calc(tmpdir):
+
+    tmpdir.chdir()
+    script = tmpdir.join('prog.sh')
+    script.write(SCRIPT)
+    os.chmod(str(script), stat.S_IRWXU)
+    tmpdir.mkdir('scratch')
+    return ShellCalculator(executable=str(script),
+                           scratch=str(tmpdir.join('scratch')), maxjobs=2)
+
+
+def test_gather_order_and_scratch(calc, tmpdir):
+
+    inputs = []
+    for i, delay in enumerate([0.3, 0.0, 0.1]):
+        inputs.append('job{}.inp'.format(i))
+        calc.write_input(inputs[-1], delay)
+
+    outputs = calc.run_multiple(inputs)
+
+    assert outputs == ['job0.out', 'job1.out', 'job2.out']
+    scratches = set()
+    for out in outputs:
+        lines = tmpdir.join(out).read().split('\n')
+        assert lines[1] == 'done'
+        scratches.add(lines[0].split()[1])
+    # separate scratch directories, removed after the jobs finished
+    assert len(scratches) == 3
+    assert tmpdir.join('scratch').listdir() == []
+
+
+def test_running_loop(calc, tmpdir):
+
+    calc.write_input('job.inp', 0.0)
+
+    async def main():
+        return calc.run_multiple(['job.inp'])
+
+    assert asyncio.run(main()) == ['job.out']
+    assert tmpdir.join('job.out').read().split('\n')[1] == 'done'
+
+
+def test_concurrency_limit(calc):
+
+    inputs = []
+    for i in range(4):
+        inputs.append('job{}.inp'.format(i))
+        calc.write_input(inputs[-1], 0.5)
+
+    start = time.time()
+    calc.run_multiple(inputs)
+    elapsed = time.time() - start
+
+    # four jobs with at most two running at the same time
+    assert 1.0 <= elapsed < 1.9
+
+
+def test_timeout_kills_job(calc, tmpdir):
+
+    calc.write_input('slow.inp', 5)
+    calc.write_input('fast.inp', 0)
+
+    async def run():
+        return await calc.gather(['slow.inp', 'fast.inp'], timeout=0.5,
+                                 return_exceptions=True)
+
+    start = time.time()
+    results = asyncio.run(run())
+
+    assert time.time() - start < 4.0
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == 'fast.out'
+    assert 'done' not in tmpdir.join('slow.out').read()
+
+
+def test_pickle(calc):
+
+    calc.write_input('job.inp', 0)
+    calc.run_multiple(['job.inp'])
+    clone = pickle.loads(pickle.dumps(calc))
+    assert clone.maxjobs == 2
+
+
+def test_wrong_maxjobs(calc):
+
+    with pytest.raises(ValueError):
+        calc.maxjobs = 0
+
+
+@pytest.mark.parametrize('cls', [Molpro, Psi4])
+def test_stdout_captured(tmpdir, cls):
+
+    tmpdir.chdir()
+    script = tmpdir.join('echo.sh')
+    script.write('#!/bin/sh\necho "stdout of $1"\necho "stderr" >&2\n')
+    os.chmod(str(script), stat.S_IRWXU)
+    tmpdir.mkdir('scratch')
+    calc = cls(executable=str(script), runopts=[],
+               scratch=str(tmpdir.join('scratch')))
+
+    tmpdir.join('job.inp').write('')
+    assert calc.run_multiple(['job.inp']) == ['job.out']
+    assert tmpdir.join('job.out').read() == 'stdout of job.inp\nstderr\n'
+
+
+def test_dalton_stdout_captured(tmpdir):
+
+    tmpdir.chdir()
+    script = tmpdir.join('echo.sh')
+    script.write('#!/bin/sh\necho "stdout of $1 $2"\n')
+    os.chmod(str(script), stat.S_IRWXU)
+    tmpdir.mkdir('scratch')
+    calc = Dalton(executable=str(script), runopts=[],
+                  scratch=str(tmpdir.join('scratch')))
+
+    job = {'dal': 'job.dal', 'mol': 'h2.mol'}
+    assert calc.run_multiple([job]) == ['job_h2.out']
+    assert tmpdir.join('job_h2.log').read() == 'stdout of job h2\n'
@@ -1,8 +1,11 @@
 import numpy as np
 import os
+import shutil
+import tempfile
 import unittest
 
-from chemtools.calculators.gamessreader import DictionaryFile
+from chemtools.calculators.gamessreader import (RECORD_CACHE, DictionaryFile,
+                                                clear_record_cache)
 
 class TestDictionaryFileHeMini(unittest.TestCase):
 
@@ -503,5 +506,72 @@ class TestDictionaryFileNeDZ(unittest.TestCase):
        'B3G     ', 'AG      ', 'B2G     ', 'AG      ', '']
         self.assertListEqual([s.decode('utf-8') for s in self.daf.read_record(255)], labs)
 
+
+class TestDictionaryFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dictfile = os.path.join(self.tmpdir, 'ne_dz_guga.F10')
+        shutil.copy(os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                                 'data/ne/ne_dz_guga.F10'), self.dictfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_zero_copy_record(self):
+        daf = DictionaryFile(self.dictfile)
+        overlap = daf.read_record(12)
+        self.assertFalse(overlap.flags.writeable)
+        self.assertFalse(overlap.flags.owndata)
+        daf.file.close()
+
+    def test_cache(self):
+        first = DictionaryFile(self.dictfile)
+        second = DictionaryFile(self.dictfile)
+        self.assertIs(first.read_record(12), second.read_record(12))
+        self.assertIsNot(first.read_record(12, dtype='i8'), first.read_record(12))
+
+        # modified file is read again
+        stat = os.stat(self.dictfile)
+        os.utime(self.dictfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        third = DictionaryFile(self.dictfile)
+        self.assertIsNot(third.read_record(12), first.read_record(12))
+        self.assertTrue(np.array_equal(third.read_record(12), first.read_record(12)))
+        for daf in [first, second, third]:
+            daf.file.close()
+
+    def test_cache_same_mtime(self):
+        first = DictionaryFile(self.dictfile)
+        record = first.read_record(12)
+
+        # file rewritten within the same mtime tick
+        stat = os.stat(self.dictfile)
+        with open(self.dictfile, 'ab') as fobj:
+            fobj.write(b'\0' * 8)
+        os.utime(self.dictfile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = DictionaryFile(self.dictfile)
+        self.assertIsNot(second.read_record(12), record)
+        for daf in [first, second]:
+            daf.file.close()
+
+    def test_close(self):
+        with DictionaryFile(self.dictfile) as daf:
+            daf.read_record(12)
+            self.assertTrue(any(k[0] == daf.path for k in RECORD_CACHE))
+        self.assertTrue(daf.file.closed)
+        self.assertIsNone(daf.data)
+        self.assertFalse(any(k[0] == daf.path for k in RECORD_CACHE))
+        with self.assertRaises(ValueError):
+            daf.read_record(12)
+
+    def test_clear_record_cache(self):
+        with DictionaryFile(self.dictfile) as daf:
+            daf.read_record(12)
+            clear_record_cache()
+            self.assertEqual(len(RECORD_CACHE), 0)
+            self.assertTrue(np.array_equal(daf.read_record(12),
+                                           daf.read_record(12)))
+
+
 if __name__ == "__main__":
     unittest.main()
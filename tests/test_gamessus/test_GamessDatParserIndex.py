@@ -0,0 +1,101 @@
+
+import os
+import shutil
+
+from chemtools.calculators.gamessus import (GamessDatParser, get_naos_nmos,
+                                            to_gamess_vec)
+import numpy as np
+import pytest
+
+
+DATA = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
+
+
+def parse_orbitals_loop(vecstr, clength=15):
+    'reference implementation slicing the fields one by one'
+
+    naos, nmos, nlines = get_naos_nmos(vecstr)
+    orblines = vecstr.split('\n')
+    orbs = np.zeros((naos, nmos), dtype=float)
+    counter = -1
+    for i in range(0, nmos):
+        for j in range(0, nlines):
+            counter += 1
+            nitems = int(len(orblines[counter][5:])) // clength
+            orbs[5 * j: 5 * (j + 1), i] = \
+                [float(orblines[counter][5 + 15 * n: 5 + 15 * (n + 1)])
+                 for n in range(nitems)]
+    return orbs
+
+
+@pytest.mark.parametrize('dat, method', [('he/he_mini_hf.dat', 'hf'),
+                                         ('heh2/he-h2_avdz_ormas.dat', 'hf'),
+                                         ('heh2/he-h2_avdz_ormas.dat', 'ci'),
+                                         ('ne/ne_dz_guga.dat', 'guga')])
+def test_parse_orbitals_matches_loop(dat, method):
+
+    gdp = GamessDatParser(os.path.join(DATA, dat))
+    vecstr = gdp.get_vec_string(method)
+    assert np.array_equal(gdp.parse_orbitals(vecstr),
+                          parse_orbitals_loop(vecstr))
+
+
+@pytest.mark.parametrize('naos, nmos', [(1, 1), (5, 3), (27, 27), (13, 120)])
+def test_parse_orbitals_roundtrip(naos, nmos):
+
+    coeffs = np.random.RandomState(0).uniform(-2.0, 2.0, size=(naos, nmos))
+    vecstr = to_gamess_vec(coeffs)
+
+    orbs = GamessDatParser.parse_orbitals(vecstr)
+    assert orbs.shape == (naos, nmos)
+    assert np.allclose(orbs, coeffs, rtol=1.0e-8, atol=0.0)
+    assert np.array_equal(orbs, parse_orbitals_loop(vecstr))
+
+
+def test_sections():
+
+    gdp = GamessDatParser(os.path.join(DATA, 'heh2/he-h2_avdz_ormas.dat'))
+    sections = gdp.get_sections()
+
+    assert [sec['name'] for sec in sections] == ['VEC', 'OCCNO', 'VEC']
+    assert sections[0]['title'].startswith('--- CLOSED SHELL ORBITALS ---')
+    assert sections[1]['title'].startswith('- - - NO-S OF CI STATE  1')
+    assert len(gdp.get_sections('vec')) == 2
+
+    occ = gdp.get_occupations()
+    assert occ.size == 27
+    assert np.allclose(occ[:2], [1.9834456915, 1.9627294361])
+    assert np.array_equal(
+        occ, np.asarray(gdp.read_section(sections[1]).split(), dtype=float))
+
+
+def test_wrong_method():
+
+    gdp = GamessDatParser(os.path.join(DATA, 'he/he_mini_hf.dat'))
+    with pytest.raises(ValueError):
+        gdp.get_vec_string('mp2')
+    with pytest.raises(ValueError):
+        gdp.get_vec_string('mcscfnos')
+    with pytest.raises(ValueError):
+        gdp.get_occupations()
+
+
+def test_index_rebuilt_on_change(tmpdir):
+
+    dat = str(tmpdir.join('heh2.dat'))
+    shutil.copy(os.path.join(DATA, 'heh2/he-h2_avdz_ormas.dat'), dat)
+
+    gdp = GamessDatParser(dat)
+    ci = gdp.get_orbitals('ci')
+    assert gdp.index is gdp.index
+
+    # drop the CI natural orbitals
+    with open(dat, 'r') as fobj:
+        content = fobj.read()
+    with open(dat, 'w') as fobj:
+        fobj.write(content[:content.index('- - - NO-S')])
+
+    assert len(gdp.get_sections('vec')) == 1
+    with pytest.raises(ValueError):
+        gdp.get_orbitals('ci')
+    assert gdp.get_orbitals('hf').shape == ci.shape
@@ -0,0 +1,77 @@
+
+import os
+import unittest
+
+import numpy as np
+
+from chemtools.calculators.gamessreader import GamessFortranReader
+
+
+DATA = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data/ne')
+
+
+class TestGamessFortranReaderNeDZ(unittest.TestCase):
+
+    def setUp(self):
+        self.gfr = GamessFortranReader(os.path.join(DATA, 'ne_dz_guga.log'))
+
+    def test_read_twoeao(self):
+        ints = np.load(os.path.join(DATA, 'ne_dz_guga_aoints.npy'))
+        self.assertTrue(np.allclose(self.gfr.read_twoeao(), ints))
+
+    def test_read_twoemo(self):
+        ints = np.load(os.path.join(DATA, 'ne_dz_guga_moints.npy'))
+        self.assertTrue(np.allclose(self.gfr.read_twoemo(), ints))
+
+    def test_read_rdm2(self):
+        rdm2 = np.load(os.path.join(DATA, 'ne_dz_guga_rdm2.npy'))
+        self.assertTrue(np.allclose(self.gfr.read_rdm2(), rdm2))
+
+    def test_twoe_size(self):
+        ints = self.gfr.read_twoeao()
+        self.assertEqual(ints.size, self.gfr.get_twoe_size(aos=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+def write_seqfile(fname, labels, values, buff_size):
+    'Write a sequential file with int8 words holding pairs of small labels'
+
+    nidx = (buff_size + 1) // 2
+    with open(fname, 'wb') as fobj:
+        for start in range(0, len(values), buff_size):
+            lab = labels[start:start + buff_size]
+            val = values[start:start + buff_size]
+            packed = [(i << 24) | (j << 16) | (k << 8) | l for i, j, k, l in lab]
+            packed += [0] * (2 * nidx - len(packed))
+            words = np.zeros(nidx, dtype='i8')
+            words[:] = [(packed[2 * m] << 32) | packed[2 * m + 1] for m in range(nidx)]
+            vbuff = np.zeros(buff_size)
+            vbuff[:len(val)] = val
+            length = len(val) if start + buff_size < len(values) else -len(val)
+            reclen = 8 + 8 * nidx + 8 * buff_size
+            fobj.write(np.array([reclen], dtype='i4').tobytes())
+            fobj.write(np.array([length], dtype='i8').tobytes())
+            fobj.write(words.tobytes())
+            fobj.write(vbuff.tobytes())
+            fobj.write(np.array([reclen], dtype='i4').tobytes())
+
+
+def test_multiple_records(tmpdir):
+
+    nbf = 5
+    tmpdir.join('job.log').write(
+        ' NUMBER OF CARTESIAN GAUSSIAN BASIS FUNCTIONS =    {}\n'
+        ' ISPHER=-1\n'.format(nbf))
+    labels = [(i, j, k, l) for i in range(1, nbf + 1) for j in range(1, i + 1)
+              for k in range(1, nbf + 1) for l in range(1, k + 1)]
+    values = np.arange(1, len(labels) + 1, dtype=float)
+    write_seqfile(str(tmpdir.join('job.F08')), labels, values, buff_size=7)
+
+    gfr = GamessFortranReader(str(tmpdir.join('job.log')))
+    ints = gfr.read_twoe(gfr.twoeaofile, buff_size=7)
+
+    # the elements with ij < kl are overwritten by their symmetric partners
+    assert np.count_nonzero(ints) == ints.size
@@ -0,0 +1,72 @@
+
+import os
+import shutil
+
+from chemtools.calculators.gamessus import GamessLogParser
+import pytest
+
+
+DATA = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
+
+LOGS = ['he/he_mini_hf.log', 'ne/ne_dz_guga.log', 'heh2/he-h2_avdz_ormas.log']
+
+GETTERS = ['accomplished', 'get_version', 'get_charge', 'get_electrons',
+           'get_number_of_atoms', 'get_number_of_aos', 'get_number_of_mos',
+           'get_number_of_core_mos', 'get_linear_deps', 'get_scf_type',
+           'get_cc_type', 'get_ci_type', 'get_mplevel', 'get_hf_total_energy',
+           'get_cc_total_energy']
+
+
+@pytest.mark.parametrize('log', LOGS)
+def test_indexed_matches_full_search(log):
+
+    indexed = GamessLogParser(os.path.join(DATA, log))
+    plain = GamessLogParser(os.path.join(DATA, log), indexed=False)
+
+    for getter in GETTERS:
+        assert getattr(indexed, getter)() == getattr(plain, getter)(), getter
+
+    for orbs in ['hf orbs', 'ci orbs', 'lz values', 'ci coeffs']:
+        locstr = indexed.get_loc_strings(orbs)
+        try:
+            expected = plain.getlines(locstr)
+        except ValueError:
+            with pytest.raises(ValueError):
+                indexed.getlines(locstr)
+        else:
+            assert indexed.getlines(locstr) == expected
+
+    if indexed.get_ci_type() in ['GUGA', 'ORMAS']:
+        assert indexed.get_energy_components('ci') == \
+            plain.get_energy_components('ci')
+    assert indexed.get_energy_components('hf') == \
+        plain.get_energy_components('hf')
+
+
+def test_index_invalidation(tmpdir):
+
+    log = str(tmpdir.join('he.log'))
+    shutil.copy(os.path.join(DATA, 'he/he_mini_hf.log'), log)
+
+    glp = GamessLogParser(log)
+    assert glp.get_electrons() == 2
+    index = glp.index
+    assert glp.index is index
+
+    with open(log, 'r') as fobj:
+        content = fobj.read()
+    with open(log, 'w') as fobj:
+        fobj.write(content.replace('NUMBER OF ELECTRONS                          =    2',
+                                   'NUMBER OF ELECTRONS                          =   10'))
+    stat = os.stat(log)
+    os.utime(log, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert glp.get_electrons() == 10
+    assert glp.index is not index
+
+
+def test_small_blocks():
+
+    glp = GamessLogParser(os.path.join(DATA, 'ne/ne_dz_guga.log'))
+    full = glp.build_index()
+    assert glp.build_index(blocksize=97) == full
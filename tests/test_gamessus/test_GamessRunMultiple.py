@@ -0,0 +1,92 @@
+
+import os
+import stat
+import time
+
+from chemtools.calculators.gamessus import GamessUS
+import pytest
+
+
+RUNGMS = '''#!/bin/sh
+echo "$1 $USERSCR"
+test -f "$USERSCR/$1.dat" && exit 1
+sleep "$(cat $1.inp)"
+echo "punch $1" > "$USERSCR/$1.dat"
+echo " EXECUTION OF GAMESS TERMINATED NORMALLY"
+'''
+
+
+@pytest.fixture
+def gamess(tmpdir):
+
+    tmpdir.chdir()
+    gmsdir = tmpdir.mkdir('gamess')
+    rungms = gmsdir.join('rungms')
+    rungms.write(RUNGMS)
+    os.chmod(str(rungms), stat.S_IRWXU)
+    gmsdir.join('gamess.00.x').write('')
+    tmpdir.mkdir('scratch')
+    return GamessUS(executable=str(rungms), scratch=str(tmpdir.join('scratch')),
+                    maxjobs=2)
+
+
+def test_run_multiple(gamess, tmpdir):
+
+    inputs = []
+    for i, delay in enumerate([0.4, 0.0, 0.2, 0.0]):
+        inputs.append('job{}.inp'.format(i))
+        tmpdir.join(inputs[-1]).write(str(delay))
+    # stale PUNCH file from a previous run
+    tmpdir.join('scratch', 'job0.dat').write('old')
+
+    start = time.time()
+    outputs = gamess.run_multiple(inputs)
+
+    assert time.time() - start < 1.0
+    assert outputs == ['job0.log', 'job1.log', 'job2.log', 'job3.log']
+    userscr = set()
+    for i, out in enumerate(outputs):
+        assert gamess.accomplished(out)
+        name, scr = tmpdir.join(out).read().split('\n')[0].split()
+        assert name == 'job{}'.format(i)
+        userscr.add(scr)
+        assert tmpdir.join('scratch', 'job{}.dat'.format(i)).read() == \
+            'punch job{}\n'.format(i)
+    assert len(userscr) == 4
+
+
+RUNGMS_CSH = '''#!/bin/csh
+set TARGET=sockets
+set SCR=/scr/$USER
+  set USERSCR=~$USER/gamess-on-$TARGET
+setenv PUNCH $USERSCR/$JOB.dat
+'''
+
+
+def test_scratch_rungms(gamess, tmpdir):
+
+    # a script without scratch assignments is used as is
+    assert gamess.get_scratch_rungms() == gamess.rungms
+
+    tmpdir.join('gamess', 'rungms').write(RUNGMS_CSH)
+    wrapper = gamess.get_scratch_rungms()
+    assert os.path.dirname(wrapper) == gamess.scratch
+    assert os.access(wrapper, os.X_OK)
+    assert open(wrapper).read().split('\n')[2:4] == [
+        'if (! $?SCR) set SCR=/scr/$USER',
+        '  if (! $?USERSCR) set USERSCR=~$USER/gamess-on-$TARGET']
+    assert gamess.get_scratch_rungms() == wrapper
+    assert gamess.get_job('job.inp')[0][0] == wrapper
+
+
+def test_run_multiple_fixed_scratch(gamess, tmpdir):
+
+    # rungms ignoring the environment writes directly to the scratch
+    tmpdir.join('gamess', 'rungms').write(
+        RUNGMS.replace('$USERSCR', gamess.scratch))
+    tmpdir.join('job0.inp').write('0')
+
+    outputs = gamess.run_multiple(['job0.inp'])
+
+    assert gamess.accomplished(outputs[0])
+    assert tmpdir.join('scratch', 'job0.dat').read() == 'punch job0\n'
@@ -72,5 +72,80 @@ class TestSequentialFileNeDZ2RDM(unittest.TestCase):
         self.assertTrue(np.allclose(self.seq.readseq(mos=True, skip_first=False), ints))
 
 
+class TestSequentialFileNeDZStreaming(unittest.TestCase):
+
+    def setUp(self):
+        seqfile = os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                               'data/ne/ne_dz_guga.F08')
+        self.seq = SequentialFile(seqfile)
+        self.ints = np.load(os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                                         'data/ne/ne_dz_guga_aoints.npy'))
+
+    def tearDown(self):
+        self.seq.file.close()
+
+    def test_chunks_reproduce_supermatrix(self):
+        ints = np.zeros_like(self.ints)
+        for indices, values in self.seq.iterseq():
+            self.assertFalse(values.flags.writeable)
+            ints[indices] = values
+        self.assertTrue(np.allclose(ints, self.ints))
+
+    def test_labels(self):
+        for (labels, values), (indices, _) in zip(self.seq.iterseq(labels=True),
+                                                  self.seq.iterseq()):
+            self.assertEqual(labels.shape, (values.size, 4))
+            self.assertTrue(np.array_equal(self.seq.ijkl(*labels.T), indices))
+            self.assertTrue(np.allclose(self.ints[indices], values))
+
+
+class TestDecodeLabels(unittest.TestCase):
+
+    def setUp(self):
+        seqfile = os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                               'data/he/he_mini_hf.F08')
+        self.seq = SequentialFile(seqfile)
+        rng = np.random.RandomState(0)
+        self.length = 7
+        self.small = rng.randint(1, 255, size=(self.length, 4))
+        self.large = rng.randint(1, 1000, size=(self.length, 4))
+
+    def tearDown(self):
+        self.seq.file.close()
+
+    def check(self, buff, int_size, idx):
+        decoded = self.seq.decode_labels(buff, self.length, int_size)
+        self.assertTrue(np.array_equal(np.column_stack(decoded), idx))
+
+    def test_int4_small_labels(self):
+        self.seq.large_labels = False
+        labels = [(i << 24) | (j << 16) | (k << 8) | l for i, j, k, l in self.small]
+        self.check(np.array(labels + [0], dtype='i4'), 4, self.small)
+
+    def test_int4_large_labels(self):
+        self.seq.large_labels = True
+        labels = []
+        for i, j, k, l in self.large:
+            labels.extend([(i << 16) | j, (k << 16) | l])
+        self.check(np.array(labels + [0, 0], dtype='i4'), 4, self.large)
+
+    def test_int8_small_labels(self):
+        self.seq.large_labels = False
+        labels = [(i << 24) | (j << 16) | (k << 8) | l for i, j, k, l in self.small]
+        labels.append(0)
+        words = [(labels[m] << 32) | labels[m + 1] for m in range(0, len(labels), 2)]
+        self.check(np.array(words, dtype='i8'), 8, self.small)
+
+    def test_int8_large_labels(self):
+        self.seq.large_labels = True
+        labels = [(i << 48) | (j << 32) | (k << 16) | l for i, j, k, l in self.large]
+        self.check(np.array(labels, dtype='i8'), 8, self.large)
+
+    def test_ijkl_vectorized(self):
+        vec = self.seq.ijkl(*self.large.T)
+        ref = [self.seq.ijkl(int(i), int(j), int(k), int(l)) for i, j, k, l in self.large]
+        self.assertTrue(np.array_equal(vec, ref))
+
+
 if __name__ == "__main__":
     unittest.main()
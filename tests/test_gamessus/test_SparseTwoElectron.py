@@ -0,0 +1,75 @@
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from chemtools.calculators.gamessreader import (SequentialFile,
+                                                SparseTwoElectron, ijkl)
+
+
+DATA = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data/ne')
+
+
+class TestSparseTwoElectronNeDZ(unittest.TestCase):
+
+    def setUp(self):
+        self.seq = SequentialFile(os.path.join(DATA, 'ne_dz_guga.F08'))
+        self.ints = np.load(os.path.join(DATA, 'ne_dz_guga_aoints.npy'))
+        self.sparse = SparseTwoElectron.from_seqfile(self.seq)
+
+    def tearDown(self):
+        self.seq.file.close()
+
+    def test_to_dense(self):
+        self.assertEqual(self.sparse.nnz, np.count_nonzero(self.ints))
+        self.assertTrue(np.allclose(self.sparse.to_dense(), self.ints))
+
+    def test_from_seqfile_thresh(self):
+        sparse = SparseTwoElectron.from_seqfile(self.seq, thresh=1.0e-2)
+        dense = SparseTwoElectron.from_dense(self.ints, self.seq.nao,
+                                             thresh=1.0e-2)
+        self.assertLess(sparse.nnz, self.sparse.nnz)
+        self.assertTrue(np.array_equal(sparse.indices, dense.indices))
+        self.assertTrue(np.allclose(sparse.values, dense.values))
+
+    def test_from_dense(self):
+        sparse = SparseTwoElectron.from_dense(self.ints, self.seq.nao)
+        self.assertTrue(np.array_equal(sparse.indices, self.sparse.indices))
+        self.assertTrue(np.allclose(sparse.values, self.sparse.values))
+
+    def test_save_load(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmpdir, 'ne_dz_guga_sparse.npz')
+            self.sparse.save(fname)
+            loaded = SparseTwoElectron.load(fname)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(loaded.nbf, self.sparse.nbf)
+        self.assertTrue(np.array_equal(loaded.indices, self.sparse.indices))
+        self.assertTrue(np.array_equal(loaded.values, self.sparse.values))
+
+    def test_get_and_block(self):
+        nbf = self.seq.nao
+        full = self.sparse.block()
+        self.assertEqual(full.shape, (nbf,) * 4)
+        for i, j, k, l in [(0, 0, 0, 0), (1, 0, 2, 1), (3, 4, 0, 2)]:
+            value = self.ints[ijkl(i, j, k, l)]
+            self.assertAlmostEqual(self.sparse.get(i, j, k, l), value)
+            for p, q, r, s in [(i, j, k, l), (j, i, l, k), (k, l, i, j)]:
+                self.assertAlmostEqual(full[p, q, r, s], value)
+
+        sub = self.sparse.block([0, 2], [1], [0, 1, 2], [3, 4])
+        self.assertEqual(sub.shape, (2, 1, 3, 2))
+        self.assertTrue(np.allclose(sub, full[np.ix_([0, 2], [1], [0, 1, 2], [3, 4])]))
+
+
+def test_duplicates_keep_last():
+
+    sparse = SparseTwoElectron(2, [5, 1, 5, 0], [1.0, 2.0, 3.0, 4.0])
+    assert list(sparse.indices) == [0, 1, 5]
+    assert list(sparse.values) == [4.0, 2.0, 3.0]
+    assert np.allclose(sparse.lookup([0, 2, 5, 9]), [4.0, 0.0, 3.0, 0.0])
@@ -0,0 +1,296 @@
+
+from chemtools.basisset import BasisSet
+from chemtools.basisset import primitive_overlap as shell_primitive_overlap
+from chemtools.basisset import get_l, ncartesian
+from chemtools.integrals import (completeness_profile, contraction_matrix,
+                                 get_basinfo, get_basinfo_arrays, get_shells,
+                                 get_workers, norm, obara_saika, overlap_1d,
+                                 primitive_overlap, primitive_overlap_between,
+                                 shell_pair_overlap, xyzlist)
+import numpy as np
+import pytest
+
+
+CONTRACTED_MOLPRO = '''basis={
+s, H , 13.0100000, 1.9620000, 0.4446000, 0.1220000, 0.0297400
+c, 1.3, 0.0196850, 0.1379770, 0.4781480
+c, 4.4, 1
+c, 5.5, 1
+p, H , 0.7270000, 0.1410000
+c, 1.1, 1
+c, 2.2, 1
+s, LI , 1469.0000000, 220.5000000, 50.2600000, 14.2400000, 4.5810000, 1.5800000, 0.5640000, 0.0734500, 0.0280500, 0.0086400
+c, 1.8, 0.0007660, 0.0058920, 0.0296710, 0.1091800, 0.2827890, 0.4531230, 0.2747740, 0.0097510
+c, 1.8, -0.0001200, -0.0009230, -0.0046890, -0.0176820, -0.0489020, -0.0960090, -0.1363800, 0.5751020
+c, 9.9, 1
+c, 10.10, 1
+p, LI , 1.5340000, 0.2749000, 0.0736200, 0.0240300, 0.0057900
+c, 1.3, 0.0227840, 0.1391070, 0.5003750
+c, 4.4, 1
+c, 5.5, 1
+d, LI , 0.1239000, 0.0725000
+c, 1.1, 1
+c, 2.2, 1
+}'''
+
+
+def primitive_overlap_loop(bas1, bas2):
+    'reference implementation with the scalar recursion'
+
+    S = np.zeros((bas1.size, bas2.size), dtype=np.float64)
+    for i, fi in enumerate(bas1):
+        normi = norm(fi['ix'], fi['exp']) * norm(fi['iy'], fi['exp']) *\
+            norm(fi['iz'], fi['exp'])
+        for j, fj in enumerate(bas2):
+            normj = norm(fj['ix'], fj['exp']) * norm(fj['iy'], fj['exp']) *\
+                norm(fj['iz'], fj['exp'])
+            S[i, j] = normi * normj
+            for coord in 'xyz':
+                S[i, j] *= obara_saika(fi['i' + coord], fj['i' + coord],
+                                       fi['exp'], fj['exp'],
+                                       fi[coord], fj[coord])
+    return S
+
+
+def get_basinfo_loop(bases, positions, order='canonical'):
+    'reference implementation filling the records one by one'
+
+    dtype = [('exp', np.float64), ('shell', 'S1'), ('l', np.int32),
+             ('ix', np.int32), ('iy', np.int32), ('iz', np.int32),
+             ('atom', 'S3'), ('x', np.float64), ('y', np.float64), ('z', np.float64)]
+
+    nf = sum([bs.nprimitive(spherical=False) for bs in bases])
+    out = np.recarray((nf,), dtype=dtype)
+
+    index = -1
+    for basis, atom in zip(bases, positions):
+        for shell, fs in basis.functions.items():
+            l = get_l(shell)
+            for ex in fs['e']:
+                for ixyz in xyzlist(l, order=order):
+                    index += 1
+                    out[index] = (ex, shell, l, ixyz[0], ixyz[1], ixyz[2],
+                                  basis.element, atom[0], atom[1], atom[2])
+    return out
+
+
+def contraction_matrix_loop(bases):
+    'reference implementation assigning the coefficients per contraction'
+
+    nprim = sum([bs.nprimitive(spherical=False) for bs in bases])
+    nc = sum([bs.nf(spherical=False) for bs in bases])
+
+    cc = np.zeros((nprim, nc), dtype=np.float64)
+    icol = 0
+    irow = 0
+    for basis in bases:
+        for shell, fs in basis.functions.items():
+            ncart = ncartesian(get_l(shell))
+            for cf in fs['cf']:
+                rowidx = np.asarray([[i * ncart + n for i in cf['idx']]
+                                     for n in range(ncart)]).T
+                cc[rowidx + irow, np.arange(ncart) + icol] = \
+                    np.repeat(cf['cc'], ncart).reshape(cf.size, ncart)
+                icol += ncart
+            irow += len(fs['e']) * ncart
+    return cc
+
+
+@pytest.fixture
+def contracted():
+
+    bsd = BasisSet.from_str(CONTRACTED_MOLPRO, fmt='molpro')
+    return [bsd['Li'], bsd['H'], bsd['H'], bsd['Li']]
+
+
+@pytest.fixture
+def bases():
+
+    bs = BasisSet.from_sequence(name='seq', element='Ne',
+                                funs=[('s', 'et', 4, (0.1, 3.0)),
+                                      ('p', 'et', 3, (0.2, 3.0)),
+                                      ('d', 'et', 2, (0.5, 3.0)),
+                                      ('f', 'exp', 1, (0.8,))])
+    return [bs, bs]
+
+
+@pytest.mark.parametrize('la, lb', [(0, 0), (1, 0), (0, 2), (3, 2), (6, 6)])
+def test_overlap_1d(la, lb):
+
+    rng = np.random.RandomState(la * 7 + lb)
+    a = rng.uniform(0.1, 5.0, size=4)
+    b = rng.uniform(0.1, 5.0, size=3)
+    Ax, Bx = 0.3, -1.1
+
+    table = overlap_1d(la, lb, a[:, np.newaxis], b[np.newaxis, :], Ax, Bx)
+    assert table.shape == (la + 1, lb + 1, 4, 3)
+
+    for i in range(la + 1):
+        for j in range(lb + 1):
+            ref = [[obara_saika(i, j, ai, bj, Ax, Bx) for bj in b] for ai in a]
+            assert np.allclose(table[i, j], ref, rtol=1.0e-10, atol=1.0e-14)
+
+
+def test_norm():
+
+    assert np.isclose(norm(0, 1.0), (2.0 / np.pi)**0.25)
+    assert np.allclose(norm(np.arange(3), 0.5),
+                       [norm(n, 0.5) for n in range(3)])
+
+
+@pytest.mark.parametrize('l', [0, 1, 2, 3])
+def test_one_center_shell(l):
+
+    exps = np.array([0.2, 1.0, 4.5])
+    ncart = (l + 1) * (l + 2) // 2
+    bs = BasisSet.from_sequence(name='seq', element='H',
+                                funs=[('spdf'[l], 'exp', 3, exps)])
+    basinfo = get_basinfo([bs], [(0.0, 0.0, 0.0)])
+
+    S = primitive_overlap(basinfo)
+    assert np.allclose(np.diag(S), 1.0)
+    # the first component is x^l for which the overlap follows the radial
+    # formula
+    assert np.allclose(S[::ncart, ::ncart],
+                       shell_primitive_overlap(l, bs.functions['spdf'[l]]['e'],
+                                               bs.functions['spdf'[l]]['e']))
+
+
+def test_primitive_overlap_matches_loop(bases):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.3, -0.5, 1.4)])
+    S = primitive_overlap(basinfo)
+
+    assert np.array_equal(S, S.T)
+    assert np.allclose(S, primitive_overlap_loop(basinfo, basinfo),
+                       rtol=1.0e-10, atol=1.0e-14)
+
+
+def test_completeness_profile(bases):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.0, 0.0, 1.4)])
+    cc = contraction_matrix(bases)
+    scan = BasisSet.from_sequence(name='scan', element='H',
+                                  funs=[('s', 'et', 20, (0.01, 1.6))])
+    zetas = get_basinfo([scan], [(0.0, 0.0, 0.0)])
+
+    SO = primitive_overlap_between(basinfo, zetas)
+    assert np.allclose(SO, primitive_overlap_loop(basinfo, zetas),
+                       rtol=1.0e-10, atol=1.0e-14)
+
+    profile = completeness_profile(basinfo, cc, zetas)
+    assert profile.shape == (20,)
+    assert np.all(profile > 0.0)
+    assert np.all(profile < 1.0 + 1.0e-8)
+
+
+def test_get_shells(bases):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.0, 0.0, 1.4)])
+    shells = get_shells(basinfo)
+
+    assert [len(comps) for comps in shells] == [1, 3, 6, 10]
+    assert [firsts.size for firsts in shells.values()] == [8, 6, 4, 2]
+    assert np.array_equal(shells[((0, 0, 0),)][:4], np.arange(4))
+    assert np.array_equal(shells[((1, 0, 0), (0, 1, 0), (0, 0, 1))][:3],
+                          4 + 3 * np.arange(3))
+
+
+def test_shell_pair_overlap_between(bases):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.3, -0.5, 1.4)])
+    S = shell_pair_overlap(basinfo)
+
+    # the symmetric driver evaluates only the lower triangle of shell pairs
+    assert np.array_equal(S, S.T)
+    assert np.allclose(S, primitive_overlap_between(basinfo, basinfo),
+                       rtol=1.0e-12, atol=1.0e-16)
+
+
+def test_screening():
+
+    bs = BasisSet.from_sequence(name='seq', element='C',
+                                funs=[('s', 'et', 4, (0.5, 3.0)),
+                                      ('p', 'et', 2, (1.0, 3.0))])
+    positions = [(0.0, 0.0, 10.0 * i) for i in range(4)]
+    basinfo = get_basinfo([bs] * 4, positions)
+    nf = basinfo.size // 4
+
+    full = shell_pair_overlap(basinfo, threshold=0.0)
+    screened = shell_pair_overlap(basinfo, threshold=1.0e-10)
+
+    assert np.allclose(screened, full, rtol=0.0, atol=1.0e-9)
+    # blocks of distant atoms are neglected
+    assert np.all(screened[:nf, nf:] == 0.0)
+    assert np.all(screened[nf:, :nf] == 0.0)
+    assert np.array_equal(screened[:nf, :nf], full[:nf, :nf])
+    assert np.array_equal(screened, screened.T)
+
+
+@pytest.mark.parametrize('chunksize', [1, 7])
+def test_chunks(bases, chunksize):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.3, -0.5, 1.4)])
+    assert np.array_equal(shell_pair_overlap(basinfo, chunksize=chunksize),
+                          shell_pair_overlap(basinfo))
+
+
+@pytest.mark.parametrize('chunksize', [3, 4096])
+def test_parallel_identical(bases, chunksize):
+
+    basinfo = get_basinfo(bases, [(0.0, 0.0, 0.0), (0.3, -0.5, 1.4)])
+    scan = BasisSet.from_sequence(name='scan', element='H',
+                                  funs=[('s', 'et', 20, (0.01, 1.6))])
+    zetas = get_basinfo([scan], [(0.0, 0.0, 0.0)])
+
+    serial = shell_pair_overlap(basinfo, chunksize=chunksize, workers=1)
+    parallel = shell_pair_overlap(basinfo, chunksize=chunksize, workers=2)
+    assert np.array_equal(serial, parallel)
+
+    assert np.array_equal(
+        shell_pair_overlap(basinfo, zetas, chunksize=chunksize, workers=1),
+        shell_pair_overlap(basinfo, zetas, chunksize=chunksize, workers=3))
+
+    cc = contraction_matrix(bases)
+    assert np.array_equal(completeness_profile(basinfo, cc, zetas, workers=1),
+                          completeness_profile(basinfo, cc, zetas, workers=2))
+
+
+def test_get_workers(monkeypatch):
+
+    monkeypatch.delenv('CHEMTOOLS_INTEGRAL_WORKERS', raising=False)
+    assert get_workers() == 1
+    assert get_workers(4) == 4
+
+    monkeypatch.setenv('CHEMTOOLS_INTEGRAL_WORKERS', '3')
+    assert get_workers() == 3
+    assert get_workers(2) == 2
+
+    monkeypatch.setenv('CHEMTOOLS_INTEGRAL_WORKERS', 'many')
+    with pytest.raises(ValueError):
+        get_workers()
+    with pytest.raises(ValueError):
+        get_workers(0)
+
+
+@pytest.mark.parametrize('order', ['canonical', 'gamessus'])
+def test_get_basinfo_matches_loop(contracted, order):
+
+    positions = [(0.0, 0.0, 0.0), (0.0, 0.0, 1.6), (0.0, 1.2, -0.3),
+                 (2.0, 0.0, 0.0)]
+    basinfo = get_basinfo(contracted, positions, order=order)
+    ref = get_basinfo_loop(contracted, positions, order=order)
+
+    assert basinfo.dtype == ref.dtype
+    assert np.array_equal(basinfo, ref)
+
+    arrays = get_basinfo_arrays(contracted, positions, order=order)
+    assert list(arrays.keys()) == list(ref.dtype.names)
+    for name in ref.dtype.names:
+        assert np.array_equal(arrays[name], ref[name])
+
+
+def test_contraction_matrix_matches_loop(contracted):
+
+    cc = contraction_matrix(contracted)
+    assert np.array_equal(cc, contraction_matrix_loop(contracted))
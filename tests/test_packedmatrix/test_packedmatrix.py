@@ -0,0 +1,84 @@
+
+from chemtools.packedmatrix import (full2tri, packed_dot, packed_matmul,
+                                    tri2full, tri_dim, tri_size)
+import numpy as np
+import pytest
+
+
+def tri2full_loop(vector, sym=True):
+    'reference implementation with the double loop'
+
+    n = tri_dim(vector.size)
+    matrix = np.zeros((n, n), dtype=float, order='F')
+    ij = -1
+    for i in range(n):
+        for j in range(i + 1):
+            ij += 1
+            if sym:
+                matrix[i, j] = matrix[j, i] = vector[ij]
+            else:
+                matrix[i, j] = vector[ij]
+                matrix[j, i] = -vector[ij]
+    return matrix
+
+
+@pytest.fixture
+def vector():
+    return np.random.RandomState(1).uniform(size=tri_size(7))
+
+
+@pytest.mark.parametrize('sym', [True, False])
+@pytest.mark.parametrize('order', ['C', 'F'])
+def test_tri2full(vector, sym, order):
+
+    ref = tri2full_loop(vector, sym=sym)
+    assert np.array_equal(tri2full(vector, sym=sym), ref)
+
+    out = np.zeros((7, 7), order=order)
+    res = tri2full(vector, sym=sym, out=out)
+    assert res is out
+    assert np.array_equal(out, ref)
+
+
+@pytest.mark.parametrize('order', ['C', 'F'])
+def test_full2tri(vector, order):
+
+    full = np.asarray(tri2full(vector), order=order)
+    assert np.array_equal(full2tri(full), vector)
+
+    out = np.empty_like(vector)
+    assert full2tri(full, out=out) is out
+    assert np.array_equal(out, vector)
+
+    # non-contiguous input
+    big = np.zeros((14, 14))
+    big[::2, ::2] = full
+    assert np.array_equal(full2tri(big[::2, ::2]), vector)
+
+
+@pytest.mark.parametrize('sym', [True, False])
+def test_products(vector, sym):
+
+    full = tri2full_loop(vector, sym=sym)
+    other = np.random.RandomState(2).uniform(size=(7, 3))
+
+    assert np.allclose(packed_dot(vector, other[:, 0], sym=sym), full.dot(other[:, 0]))
+
+    out = np.empty((7, 3))
+    work = np.empty((7, 7))
+    assert packed_dot(vector, other, sym=sym, out=out, work=work) is out
+    assert np.allclose(out, full.dot(other))
+
+    second = vector[::-1].copy()
+    assert np.allclose(packed_matmul(vector, second, sym=sym, other_sym=True),
+                       full.dot(tri2full_loop(second)))
+
+
+def test_wrong_sizes(vector):
+
+    with pytest.raises(ValueError):
+        tri_dim(5)
+    with pytest.raises(ValueError):
+        tri2full(vector, out=np.zeros((6, 6)))
+    with pytest.raises(ValueError):
+        full2tri(np.zeros((3, 4)))